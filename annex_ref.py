@@ -0,0 +1,127 @@
+import re
+import sys
+import bisect
+import functools
+
+# Parsed Annex Ref. numbers. A reference becomes a tuple of (number, suffix) components, e.g.
+# "3.1.2a" -> ((3, ""), (1, ""), (2, "a")), so that "2.9" sorts before "2.10", formatting variants
+# ("4.2.1.", " 4.2 .1", "04.2.1") share one key and a chapter or section is one contiguous run of
+# the sorted keys. Keys are cached per value: the same references recur in every form and report.
+#
+# Spaces, hyphens, slashes, commas and semicolons between two parts of a reference are a separator,
+# kept in the key as one SEPARATOR component: "3.1-3.4", "3.1 / 3.4" and "3.1, 3.4" are all "3.1-3.4",
+# never the unrelated 3.13.4. Next to a dot or at either end they are formatting and dropped.
+
+NO_NUMBER = sys.maxsize  # Components without digits ("Appendix") sort after every numbered one
+SEPARATOR = (-1, "")  # Component between two parts; "3.1-3.4" sorts after 3.1, before 3.1.1
+_AFTER = (NO_NUMBER + 1, "")  # Greater than any component: key + (_AFTER,) bounds the references under key
+SORTABLE_DIGITS = 9  # Zero padding of the numbers in sortable_ref()
+
+_BRACKETED = re.compile(r"\s*[(\[]\s*(\w+)\s*[)\]]")  # "4.2.1 (a)" is 4.2.1a
+_IGNORED = re.compile(r"[^\w\s.,;/\-\u2010-\u2015]+")  # Other punctuation: dropped
+_SEPARATORS = re.compile(r"[\s,;/\-\u2010-\u2015]+")  # Runs of them become one "-"
+_LOOSE_SEPARATORS = re.compile(r"-*\.-*")  # A separator next to a dot is only spacing: "4.2 .1"
+_COMPONENT = re.compile(r"(\d*)(.*)")
+
+
+@functools.lru_cache(maxsize=65536)
+def ref_key(annex_ref):
+    """Tuple key of an Annex Ref., or None when it has no content."""
+    if annex_ref is None or annex_ref != annex_ref:  # None or NaN
+        return None
+    text = _IGNORED.sub("", _BRACKETED.sub(r"\1", str(annex_ref).lower()))
+    text = _LOOSE_SEPARATORS.sub(".", _SEPARATORS.sub("-", text)).strip("-")
+    key = []
+    for segment in text.split("-"):
+        if key:
+            key.append(SEPARATOR)
+        for part in segment.split("."):
+            if part:  # "4..2" and trailing dots add no level
+                digits, suffix = _COMPONENT.fullmatch(part).groups()
+                key.append((int(digits) if digits else NO_NUMBER, suffix))
+    return tuple(key) or None
+
+
+def _key_text(key, number_text):
+    # Components joined by "." except next to a separator, which stands for itself: "3.1-3.4"
+    text = ""
+    for previous, component in zip((None,) + key, key):
+        if component == SEPARATOR:
+            text += "-"
+            continue
+        if previous is not None and previous != SEPARATOR:
+            text += "."
+        number, suffix = component
+        text += number_text(number) + suffix
+    return text
+
+
+@functools.lru_cache(maxsize=65536)
+def canonical_ref(annex_ref):
+    # One spelling per key ("04.2.1." -> "4.2.1"), the form used to match references
+    key = ref_key(annex_ref)
+    if key is None:
+        return None
+    return _key_text(key, lambda number: "" if number == NO_NUMBER else str(number))
+
+
+def sortable_ref(annex_ref):
+    # String whose plain ordering is the key ordering ("000000002.000000009" < "000000002.000000010"),
+    # for storage that can only compare strings; the references under X are the range [X, X + "/"), and
+    # the separator "-" sorts between X and X + "."
+    key = ref_key(annex_ref)
+    if key is None:
+        return None
+    return _key_text(key, lambda number: "~" if number == NO_NUMBER else f"{number:0{SORTABLE_DIGITS}d}")
+
+
+def parse_ref_range(text):
+    # "3" -> ("3", "3"), "3.1-3.4" -> ("3.1", "3.4"): the bounds of a range lookup
+    first, _, last = text.partition("-")
+    if ref_key(first) is None or (last and ref_key(last) is None):
+        raise ValueError(f"Not an Annex Ref. range: {text!r}")
+    return first, last or first
+
+
+class RefIndex:
+    """Row positions sorted by Annex Ref. key, for exact, chapter and range lookups by bisection.
+
+    Rows without a reference are kept apart in unkeyed, in their original order.
+    """
+
+    def __init__(self, refs):
+        entries, self.unkeyed = [], []
+        for position, annex_ref in enumerate(refs):
+            key = ref_key(annex_ref)
+            if key is None:
+                self.unkeyed.append(position)
+            else:
+                entries.append((key, position))
+        entries.sort()  # Equal keys stay in row order
+        self.keys = [key for key, _ in entries]
+        self.positions = [position for _, position in entries]
+
+    def _between(self, low, high):
+        return self.positions[bisect.bisect_left(self.keys, low):bisect.bisect_left(self.keys, high)]
+
+    def find(self, annex_ref):
+        # Rows of exactly this reference
+        key = ref_key(annex_ref)
+        if key is None:
+            return []
+        return self.positions[bisect.bisect_left(self.keys, key):bisect.bisect_right(self.keys, key)]
+
+    def within(self, annex_ref):
+        # Rows of this reference and every reference under it: within("3") is all of chapter 3
+        return self.range(annex_ref, annex_ref)
+
+    def range(self, first, last):
+        # Rows from first to last, including the references under last, in key order
+        low, high = ref_key(first), ref_key(last)
+        if low is None or high is None:
+            return []
+        return self._between(low, high + (_AFTER,))
+
+    def sorted_positions(self):
+        # Every row in natural reference order, rows without a reference last
+        return self.positions + self.unkeyed
@@ -0,0 +1,343 @@
+import os
+import abc
+import time
+import logging
+import importlib.util
+from ooxml_form import read_form_table
+
+# Document backends for the Word engine. The conversions only talk to a backend (start / open / close /
+# quit); the documents it returns expose the Word object model (Tables, Cell, Range, FormFields, ...).
+
+# pywin32 is slow to import, so it is only looked up here and imported once Word is actually used.
+# Not on Windows (no pywin32): only the native (OOXML) engine is available
+WORD_AVAILABLE = importlib.util.find_spec("win32com") is not None and importlib.util.find_spec("pythoncom") is not None
+
+WD_FIELD_FORM_TEXT_INPUT = 70
+WD_FIELD_FORM_CHECK_BOX = 71
+WD_NO_PROTECTION = -1
+WD_COMMENTS = 2
+WD_DO_NOT_SAVE_CHANGES = 0
+WD_SAVE_CHANGES = -1
+
+
+class DocumentBackend(abc.ABC):
+    # Every method is abstract, so an incomplete backend fails when it is created, not mid-conversion
+    @abc.abstractmethod
+    def start(self):
+        ...
+
+    @abc.abstractmethod
+    def open(self, path):
+        ...
+
+    @abc.abstractmethod
+    def close(self, doc, save=False):
+        ...
+
+    @abc.abstractmethod
+    def quit(self):
+        ...
+
+
+class WordBackend(DocumentBackend): # Microsoft Word through COM
+    def __init__(self):
+        self.app = None
+
+    def start(self):
+        if not WORD_AVAILABLE:
+            raise RuntimeError("Word engine is not available on this system (pywin32 not installed). Use the native engine.")
+        import win32com.client as win32
+        self.app = win32.Dispatch('Word.Application')
+        self.app.Visible = False
+        self.app.DisplayAlerts = False
+
+    def open(self, path):
+        return self.app.Documents.Open(os.path.abspath(path))
+
+    def close(self, doc, save=False):
+        doc.Close(SaveChanges=WD_SAVE_CHANGES if save else WD_DO_NOT_SAVE_CHANGES)
+
+    def quit(self):
+        if self.app is not None:
+            self.app.Quit()
+            self.app = None
+
+
+class DocumentSession:
+    """One running backend application reused across many documents.
+
+    The application is started on the first open() and kept until quit(), so batch work pays the
+    Word start-up cost once instead of once per file. Also usable as a context manager.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or WordBackend()
+        self.started = False
+        self.documents = 0
+
+    def open(self, path):
+        if not self.started:
+            self.backend.start()
+            self.started = True
+            logging.info("Word application initialized")
+        self.documents += 1
+        return self.backend.open(path)
+
+    def close(self, doc, save=False):
+        self.backend.close(doc, save)
+
+    def quit(self):
+        if self.started:
+            self.started = False
+            self.backend.quit()
+            logging.info("Word application quit")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.quit()
+
+
+def init_com():
+    # COM must be initialized on every thread that drives Word
+    if WORD_AVAILABLE:
+        import pythoncom
+        pythoncom.CoInitialize()
+
+
+def uninit_com():
+    if WORD_AVAILABLE:
+        import pythoncom
+        pythoncom.CoUninitialize()
+
+
+# In-memory fake of the Word object model, for benchmarking and testing the pipelines without Word.
+# Documents are loaded with the native .docx reader; every property access or method call on a fake
+# object counts as one COM round trip and sleeps for the simulated per-call latency.
+
+class FakeWordBackend(DocumentBackend):
+    def __init__(self, latency=0.0, start_latency=0.0):
+        self.latency = latency
+        self.start_latency = start_latency  # Simulated application start-up time
+        self.calls = 0
+        self.starts = 0
+        self.saved = {}  # path -> FakeDocument, for inspecting what a fill wrote
+
+    def call(self):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def start(self):
+        self.starts += 1
+        if self.start_latency:
+            time.sleep(self.start_latency)
+
+    def open(self, path):
+        self.call()
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        column_count, rows = read_form_table(path)
+        return FakeDocument(self, path, column_count, rows)
+
+    def close(self, doc, save=False):
+        doc.Close(SaveChanges=WD_SAVE_CHANGES if save else WD_DO_NOT_SAVE_CHANGES)
+
+    def quit(self):
+        self.call()
+
+
+class _FakeObject:
+    def __init__(self, backend):
+        self._backend = backend
+
+    def _call(self):
+        self._backend.call()
+
+
+class _FakeCollection(_FakeObject):
+    def __init__(self, backend, items):
+        super().__init__(backend)
+        self._items = items
+
+    @property
+    def Count(self):
+        self._call()
+        return len(self._items)
+
+    def __call__(self, index):
+        self._call()
+        return self._items[index - 1]  # 1-based like COM collections
+
+    def __iter__(self):
+        self._call()
+        for item in self._items:
+            self._call()
+            yield item
+
+
+class _FakeCount(_FakeObject):
+    def __init__(self, backend, count):
+        super().__init__(backend)
+        self._count = count
+
+    @property
+    def Count(self):
+        self._call()
+        return self._count
+
+
+class FakeDocument(_FakeObject):
+    def __init__(self, backend, path, column_count, rows):
+        super().__init__(backend)
+        self.path = path
+        self.protection_type = WD_COMMENTS
+        self.saved_protection_type = None  # Protection as of the last save, what the file on disk keeps
+        self.closed = False
+        self.tables = [FakeTable(backend, column_count, rows)] if rows or column_count else []
+
+    @property
+    def ProtectionType(self):
+        self._call()
+        return self.protection_type
+
+    def Unprotect(self):
+        self._call()
+        self.protection_type = WD_NO_PROTECTION
+
+    def Protect(self, Type=WD_COMMENTS, NoReset=False):
+        self._call()
+        self.protection_type = Type
+
+    @property
+    def Tables(self):
+        self._call()
+        return _FakeCollection(self._backend, self.tables)
+
+    def Save(self):
+        self._call()
+        self.saved_protection_type = self.protection_type
+        self._backend.saved[self.path] = self
+
+    def Close(self, SaveChanges=WD_DO_NOT_SAVE_CHANGES):
+        self._call()
+        if SaveChanges == WD_SAVE_CHANGES:
+            self.saved_protection_type = self.protection_type
+            self._backend.saved[self.path] = self
+        self.closed = True
+
+
+class FakeTable(_FakeObject):
+    def __init__(self, backend, column_count, rows):
+        super().__init__(backend)
+        self.column_count = column_count
+        self.cells = [[FakeCell(backend, *cell) for cell in row] for row in rows]
+
+    @property
+    def Columns(self):
+        self._call()
+        return _FakeCount(self._backend, self.column_count)
+
+    @property
+    def Rows(self):
+        self._call()
+        return _FakeCount(self._backend, len(self.cells))
+
+    def Cell(self, row, column):
+        self._call()
+        return self.cells[row - 1][column - 1]
+
+    @property
+    def Range(self):
+        self._call()
+        return FakeTableRange(self)
+
+
+class FakeTableRange(_FakeObject):
+    # Range of a whole table: cells end with the end-of-cell marker, rows with an extra end-of-row marker
+    def __init__(self, table):
+        super().__init__(table._backend)
+        self._table = table
+
+    @property
+    def Text(self):
+        self._call()
+        return "".join("".join(cell.raw_text for cell in row) + "\r\x07" for row in self._table.cells)
+
+    @property
+    def FormFields(self):
+        self._call()
+        return _FakeCollection(self._backend, [field for row in self._table.cells for cell in row for field in cell.form_fields])
+
+
+class FakeCell(_FakeObject):
+    def __init__(self, backend, raw_text, checkboxes, text_fields):
+        super().__init__(backend)
+        self.raw_text = raw_text
+        self.form_fields = ([FakeFormField(backend, WD_FIELD_FORM_TEXT_INPUT, text) for text in text_fields] +
+                            [FakeFormField(backend, WD_FIELD_FORM_CHECK_BOX, checked) for checked in checkboxes])
+
+    @property
+    def Range(self):
+        self._call()
+        return FakeRange(self)
+
+
+class FakeRange(_FakeObject):
+    def __init__(self, cell):
+        super().__init__(cell._backend)
+        self._cell = cell
+
+    @property
+    def Text(self):
+        self._call()
+        return self._cell.raw_text
+
+    @property
+    def FormFields(self):
+        self._call()
+        return _FakeCollection(self._backend, self._cell.form_fields)
+
+
+class FakeFormField(_FakeObject):
+    def __init__(self, backend, field_type, value):
+        super().__init__(backend)
+        self.field_type = field_type
+        self.value = value  # Result text, or checked state for checkboxes
+
+    @property
+    def Type(self):
+        self._call()
+        return self.field_type
+
+    @property
+    def Result(self):
+        self._call()
+        return self.value
+
+    @Result.setter
+    def Result(self, value):
+        self._call()
+        self.value = value
+
+    @property
+    def CheckBox(self):
+        self._call()
+        return FakeCheckBox(self)
+
+
+class FakeCheckBox(_FakeObject):
+    def __init__(self, field):
+        super().__init__(field._backend)
+        self._field = field
+
+    @property
+    def Value(self):
+        self._call()
+        return self._field.value
+
+    @Value.setter
+    def Value(self, value):
+        self._call()
+        self._field.value = bool(value)
@@ -0,0 +1,190 @@
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import timeit
+import subprocess
+import tracemalloc
+
+import main
+import sanitize
+from backends import DocumentSession, FakeWordBackend
+from synthetic_data import synthetic_records, mutate_records, make_crystal_xml, make_efod_workbook, make_efod_form
+
+# Benchmarks of every conversion pipeline on synthetic inputs. Each stage is timed (best of --repeat runs)
+# and its peak Python memory measured in one extra run under tracemalloc; results can be saved as a
+# baseline and later runs compared against it, flagging stages that got slower.
+#
+#   python benchmark.py --sizes 1000 10000 --save-baseline
+#   python benchmark.py --sizes 1000 10000            # compare against benchmark_baseline.json
+#   python benchmark.py --micro                        # cell text cleanup, old loop vs sanitize
+
+DEFAULT_SIZES = [1000, 10000]  # 100000 is supported but takes minutes per stage
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+
+def make_inputs(directory, rows):
+    # One set of related inputs per size: the report, the form and the workbooks all share their records
+    records = synthetic_records(rows)
+    updated = mutate_records(records)
+    fillable = [[annex_ref, standard, "", "", "", ""] for annex_ref, standard, *_ in reversed(records)]
+    return {
+        "xml": make_crystal_xml(os.path.join(directory, "report.xml"), records),
+        "form": make_efod_form(os.path.join(directory, "form.docx"), records),
+        "workbook": make_efod_workbook(os.path.join(directory, "updated.xlsx"), updated),
+        "sample": make_efod_workbook(os.path.join(directory, "sample.xlsx"), records),
+        "fillable": make_efod_workbook(os.path.join(directory, "fillable.xlsx"), fillable),
+    }
+
+
+def _fill(inputs, work_dir, engine):
+    # The fill edits its form in place, so every run gets a fresh copy
+    form_path = shutil.copy(inputs["form"], os.path.join(work_dir, "form.docx"))
+    session = DocumentSession(FakeWordBackend()) if engine == "word" else None
+    return main.fill_form_from_excel(inputs["workbook"], form_path, main.Job(), engine=engine, session=session)
+
+
+def _startup(inputs, work_dir):
+    # Fresh interpreter importing main: what every GUI launch and CLI run pays before any work
+    return subprocess.run([sys.executable, "-c", "import main"], cwd=os.path.dirname(os.path.abspath(__file__)),
+                          check=True)
+
+
+# Stage name -> function(inputs, work_dir) running one conversion; the Word engine runs on the fake backend
+STAGES = {
+    "startup": _startup,
+    "xml-to-excel": lambda inputs, work_dir: main.xml_to_excel(inputs["xml"], work_dir, main.Job()),
+    "xml-to-csv": lambda inputs, work_dir: main.xml_to_excel(inputs["xml"], work_dir, main.Job(), fmt="csv"),
+    "xml-to-excel-dom": lambda inputs, work_dir: main.xml_to_excel(inputs["xml"], work_dir, main.Job(), streaming=False),
+    "form-to-excel-native": lambda inputs, work_dir: main.export_table_to_excel(
+        inputs["form"], work_dir, main.Job(), engine="ooxml"),
+    "form-to-excel-word": lambda inputs, work_dir: main.export_table_to_excel(
+        inputs["form"], work_dir, main.Job(), engine="word", session=DocumentSession(FakeWordBackend())),
+    "excel-to-form-native": lambda inputs, work_dir: _fill(inputs, work_dir, "ooxml"),
+    "excel-to-form-word": lambda inputs, work_dir: _fill(inputs, work_dir, "word"),
+    "excel-on-excel": lambda inputs, work_dir: main.excel_on_excel(
+        inputs["sample"], shutil.copy(inputs["fillable"], work_dir), main.Job()),
+}
+
+
+def run_stage(stage, inputs, repeat, measure_memory):
+    seconds = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as work_dir:
+            start = time.perf_counter()
+            output = STAGES[stage](inputs, work_dir)
+            seconds.append(time.perf_counter() - start)
+        if not output:
+            raise RuntimeError(f"{stage} failed, see the log")
+
+    peak_mb = None
+    if measure_memory:
+        with tempfile.TemporaryDirectory() as work_dir:
+            tracemalloc.start()
+            try:
+                STAGES[stage](inputs, work_dir)
+                peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+            finally:
+                tracemalloc.stop()
+    return {"seconds": min(seconds), "peak_mb": peak_mb}
+
+
+MICRO_LENGTHS = [100, 1000, 10000, 100000]  # Characters per cell
+
+
+def _char_loop_cell_text(raw_text, col_idx):
+    # The per-character cleanup that sanitize.cell_text replaced, kept as the reference of the micro-benchmarks
+    visible_text = ''
+    for char in raw_text:
+        if ord(char) < 32 and char not in ['\n', '\t', '\r']:
+            break
+        visible_text += char
+    return visible_text if col_idx in sanitize.PRESERVED_COLUMNS else visible_text.strip()
+
+
+def micro_benchmarks(lengths, repeat):
+    # Cleanup of one Standard cell (column 2) of each length, per call and in a 100-cell column batch
+    print(f"{'cell chars':>10}{'char loop us':>14}{'cell_text us':>14}{'speedup':>9}{'batch us/cell':>15}")
+    for length in lengths:
+        words = " ".join(main.EXCEL_HEADERS) + "\r"
+        raw_text = (words * (length // len(words) + 1))[:length] + main.CELL_END_MARK
+        column = [raw_text] * 100
+        loop = min(timeit.repeat(lambda: _char_loop_cell_text(raw_text, 2), number=10, repeat=repeat)) / 10
+        single = min(timeit.repeat(lambda: sanitize.cell_text(raw_text, 2), number=100, repeat=repeat)) / 100
+        batch = min(timeit.repeat(lambda: sanitize.cell_texts(column, 2), number=10, repeat=repeat)) / 1000
+        print(f"{length:>10}{loop * 1e6:>14.1f}{single * 1e6:>14.2f}{loop / single:>8.0f}x{batch * 1e6:>15.2f}")
+
+
+def compare(results, baseline, tolerance):
+    # Returns the names of the stages slower than their baseline by more than tolerance
+    regressions = []
+    print(f"{'stage':<24}{'rows':>8}{'time s':>10}{'peak MB':>10}{'baseline s':>12}{'change':>9}")
+    for name, result in results.items():
+        stage, rows = name.rsplit("@", 1)
+        peak = f"{result['peak_mb']:.1f}" if result["peak_mb"] is not None else "-"
+        line = f"{stage:<24}{rows:>8}{result['seconds']:>10.3f}{peak:>10}"
+        reference = baseline.get(name)
+        if reference:
+            change = result["seconds"] / reference["seconds"] - 1
+            line += f"{reference['seconds']:>12.3f}{change:>+9.0%}"
+            if change > tolerance:
+                regressions.append(name)
+                line += "  SLOWER"
+        print(line)
+    return regressions
+
+
+def run(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the EFOD Helper pipelines on synthetic data.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="rows per input (default: %(default)s)")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage, the best one counts")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline file (default: %(default)s)")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before failing (default: 20%%)")
+    parser.add_argument("--keep", help="generate the inputs into this directory and keep them")
+    parser.add_argument("--micro", action="store_true", help="only run the cell text cleanup micro-benchmarks")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.ERROR)
+    if args.micro:
+        micro_benchmarks(MICRO_LENGTHS, args.repeat)
+        return 0
+
+    results = {}
+    data_root = args.keep or tempfile.mkdtemp(prefix="efod-bench-")
+    try:
+        for rows in args.sizes:
+            directory = os.path.join(data_root, str(rows))
+            os.makedirs(directory, exist_ok=True)
+            start = time.perf_counter()
+            inputs = make_inputs(directory, rows)
+            print(f"Generated {rows} row inputs in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+            for stage in args.stages:
+                results[f"{stage}@{rows}"] = run_stage(stage, inputs, args.repeat, not args.no_memory)
+    finally:
+        if not args.keep:
+            shutil.rmtree(data_root, ignore_errors=True)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif regressions:
+        print(f"{len(regressions)} stage(s) slower than the baseline: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
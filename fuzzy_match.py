@@ -0,0 +1,61 @@
+import re
+import numpy as np
+
+# Fallback matching of rows by the similarity of their Standard text, for references renumbered between
+# amendments. Sample texts go into an inverted index of character n-grams; a query only looks at the
+# postings of its rarest n-grams, then scores the few best candidates exactly, so matching n rows
+# against m costs far less than the n * m comparisons of a full scan.
+
+NGRAM = 4
+PROBE_NGRAMS = 24  # Rarest n-grams of a query whose postings are read
+CANDIDATES = 8  # Candidates scored exactly per query
+
+_SPACES = re.compile(r"\s+")
+
+
+def ngrams(text, n=NGRAM):
+    if not isinstance(text, str):  # NaN from empty cells
+        return frozenset()
+    text = _SPACES.sub(" ", text).strip().lower()
+    return frozenset(text[i:i + n] for i in range(len(text) - n + 1))
+
+
+def similarity(grams_a, grams_b):
+    # Dice coefficient of two n-gram sets, 0..1
+    if not grams_a or not grams_b:
+        return 0.0
+    return 2 * len(grams_a & grams_b) / (len(grams_a) + len(grams_b))
+
+
+class NgramIndex:
+    """Inverted index of character n-grams over texts, answering best-match queries."""
+
+    def __init__(self, texts, n=NGRAM):
+        self.n = n
+        self.grams = [ngrams(text, n) for text in texts]
+        postings = {}
+        for doc, grams in enumerate(self.grams):
+            for gram in grams:
+                postings.setdefault(gram, []).append(doc)
+        self.postings = {gram: np.array(docs, dtype=np.int32) for gram, docs in postings.items()}
+
+    def best_match(self, text, exclude=()):
+        # (document, score) of the most similar text, or (None, 0.0); documents in exclude are skipped
+        grams = ngrams(text, self.n)
+        known = sorted((gram for gram in grams if gram in self.postings), key=lambda gram: len(self.postings[gram]))
+        if not known:
+            return None, 0.0
+        docs, counts = np.unique(np.concatenate([self.postings[gram] for gram in known[:PROBE_NGRAMS]]),
+                                 return_counts=True)
+        best, best_score, scored = None, 0.0, 0
+        for position in np.argsort(-counts, kind="stable"):
+            doc = int(docs[position])
+            if doc in exclude:
+                continue
+            score = similarity(grams, self.grams[doc])
+            if score > best_score:
+                best, best_score = doc, score
+            scored += 1
+            if scored == CANDIDATES:
+                break
+        return best, best_score
@@ -1,26 +1,80 @@
-import os ,shutil ,re ,logging ,webbrowser
-import win32com.client as win32
-import pandas as pd
-from openpyxl import load_workbook
-from openpyxl.worksheet.table import Table, TableStyleInfo
+import os ,sys ,glob ,time ,shutil ,re ,logging ,webbrowser ,warnings ,argparse ,json
+STARTED = time.perf_counter()  # Startup timings are measured from here
+import multiprocessing ,multiprocessing.util ,queue ,collections ,threading ,importlib
+from logging.handlers import RotatingFileHandler
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import tkinter as tk
-from tkinter import filedialog, messagebox, scrolledtext
+from tkinter import filedialog, messagebox, scrolledtext, ttk
 import xml.etree.ElementTree as ET
-
-# Custom logging handler to output to a Tkinter Text widget
+# pandas, numpy, openpyxl and pywin32 take most of the startup time, so they are imported by the code
+# that uses them (and warmed up in the background by the GUI); the modules below load only light ones
+from ooxml_form import read_form_table, iter_form_table, fill_form_table, FormTableError, RowCountMismatch
+from row_cache import RowCache
+from row_table import RowTable
+import sanitize
+from record_db import RecordDatabase
+from annex_ref import RefIndex, canonical_ref, parse_ref_range
+from table_formats import FormatUnavailable, INPUT_EXTENSIONS, available_formats, check_format, read_table, write_table
+from xlsx_reader import TableLayoutError
+from metrics import Metrics, format_summary, null_span
+from backends import DocumentSession, WORD_AVAILABLE, WD_COMMENTS, WD_NO_PROTECTION, init_com, uninit_com
+IMPORTED = time.perf_counter()
+
+# Heavy modules imported ahead of the first conversion by warm_up()
+WARM_UP_MODULES = ["numpy", "pandas", "openpyxl", "openpyxl.worksheet.table", "fuzzy_match", "report_store"]
+if WORD_AVAILABLE:
+    WARM_UP_MODULES += ["pythoncom", "win32com.client"]
+
+def warm_up(modules=WARM_UP_MODULES):
+    # Import the heavy modules while the user is still choosing a file
+    start = time.perf_counter()
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            logging.debug(f"Warm-up skipped {name}: {e}")
+    logging.debug(f"Warm-up imported {len(modules)} modules in {time.perf_counter() - start:.2f} s")
+
+def startup_summary(event):
+    # "<event> 1.23 s after start (imports 0.05 s)"
+    return f"{event} {time.perf_counter() - STARTED:.2f} s after start (imports {IMPORTED - STARTED:.2f} s)"
+
+# Custom logging handler to output to a Tkinter Text widget.
+# Records are only queued here; the Tk loop drains the queue in batches (poll), so logging never
+# redraws the window itself and works from any thread.
 class TextHandler(logging.Handler):
-    def __init__(self, text_widget, root):
+    def __init__(self, text_widget, root, max_lines=5000, poll_ms=100):
         super().__init__()
         self.text_widget = text_widget
-        self.root = root  # Reference to Tkinter root for updating
+        self.root = root  # Reference to Tkinter root for scheduling the drain
+        self.max_lines = max_lines  # The visible log keeps only the most recent lines
+        self.poll_ms = poll_ms
+        self.queue = queue.SimpleQueue()
+        self.root.after(self.poll_ms, self.poll)
 
     def emit(self, record):
-        msg = self.format(record)
-        self.text_widget.configure(state='normal')
-        self.text_widget.insert(tk.END, msg + '\n')
-        self.text_widget.configure(state='disabled')
-        self.text_widget.see(tk.END)  # Auto-scroll to the bottom
-        self.root.update()  # Force GUI update to show message immediately
+        try:
+            self.queue.put(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+    def poll(self):
+        # Ring buffer: if more lines arrived than the widget keeps, only the newest are inserted
+        batch = collections.deque(maxlen=self.max_lines)
+        try:
+            while True:
+                batch.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        if batch:
+            self.text_widget.configure(state='normal')
+            self.text_widget.insert(tk.END, '\n'.join(batch) + '\n')
+            excess = int(self.text_widget.index('end-1c').split('.')[0]) - 1 - self.max_lines
+            if excess > 0:
+                self.text_widget.delete('1.0', f'{excess + 1}.0')
+            self.text_widget.configure(state='disabled')
+            self.text_widget.see(tk.END)  # Auto-scroll to the bottom
+        self.root.after(self.poll_ms, self.poll)
 
 # Custom formatter to exclude level name except for ERROR
 class CustomFormatter(logging.Formatter):
@@ -36,6 +90,9 @@ class CustomFormatter(logging.Formatter):
             # Exclude level name for other levels
             return f"{timestamp} - {record.msg}"
 
+LOG_FILE_PATH = os.path.join(os.path.expanduser("~"), "EFOD-Helper.log")
+METRICS_FILE_PATH = os.path.join(os.path.expanduser("~"), "EFOD-Helper-metrics.json")  # Timings of the last GUI run
+
 def setup_logging(text_widget, root):
     # Set up logging to output to the text widget
     logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(message)s')
@@ -43,6 +100,25 @@ def setup_logging(text_widget, root):
     handler.setFormatter(CustomFormatter())
     logging.getLogger().handlers = []  # Clear default handlers
     logging.getLogger().addHandler(handler)
+    return handler
+
+def set_log_level(text_handler, level):
+    # The window shows records at `level`; the logger itself stays at DEBUG while the full trace goes to a file
+    text_handler.setLevel(level)
+    file_logging = any(isinstance(h, RotatingFileHandler) for h in logging.getLogger().handlers)
+    logging.getLogger().setLevel(logging.DEBUG if file_logging else level)
+
+def set_file_logging(enabled, path=LOG_FILE_PATH):
+    # Optional rotating log file with the full DEBUG trace (5 MB x 3 backups)
+    logger = logging.getLogger()
+    for handler in [h for h in logger.handlers if isinstance(h, RotatingFileHandler)]:
+        logger.removeHandler(handler)
+        handler.close()
+    if enabled:
+        handler = RotatingFileHandler(path, maxBytes=5 * 1024 * 1024, backupCount=3, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        handler.setLevel(logging.DEBUG)
+        logger.addHandler(handler)
 
 class Tooltip: # Tooltip class for hover text
     def __init__(self, widget, text):
@@ -69,46 +145,171 @@ class Tooltip: # Tooltip class for hover text
             self.tooltip_window.destroy()
             self.tooltip_window = None
 
-def export_table_to_excel(file_path, output_dir, root):
-    if not os.path.exists(file_path):
-        logging.error(f"File not found: {file_path}")
-        return None
+class JobCancelled(BaseException):
+    # BaseException so the conversions' "except Exception" handlers don't swallow it;
+    # their finally blocks still close the document and quit Word
+    pass
+
+class Job: # Context passed to the conversion functions: progress reporting and cooperative cancellation
+    def __init__(self):
+        self.cancel_event = threading.Event()
+        self.metrics = Metrics()  # Stage timings and per-row latency of this run
+
+    def span(self, name):
+        return self.metrics.span(name)
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def update(self):
+        # Cancellation checkpoint, called between rows and stages
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+
+    def progress(self, done, total=None):
+        # total=None means the amount of work is not known up front
+        self.update()
+
+    def rows_begin(self):
+        self.metrics.rows_begin()
+
+    def row_done(self):
+        # Latency sample of one produced row; progress() may be reported less often
+        self.metrics.row_done()
+
+    def error_dialog(self, title, message):
+        pass  # Headless (command line): the message is logged by the caller
+
+class GuiJob(Job): # Job run from the GUI: events are queued for the Tk thread, widgets are never touched here
+    def __init__(self, events):
+        super().__init__()
+        self.events = events
+
+    def progress(self, done, total=None):
+        self.events.put(("progress", done, total))
+        super().progress(done, total)
+
+    def error_dialog(self, title, message):
+        self.events.put(("error", title, message))
 
-    # Initialize Word application
+def run_in_worker(func, *args, **kwargs):
+    init_com()
     try:
-        word = win32.Dispatch('Word.Application')
-        word.Visible = False
-        word.DisplayAlerts = False
-        logging.info("Word application initialized")
-        root.update()  # Update GUI
-    except Exception as e:
-        logging.error(f"Failed to initialize Word: {e}")
+        return func(*args, **kwargs)
+    finally:
+        uninit_com()
+
+# Word table columns 4-9 hold the "Difference" checkboxes
+CHECKBOX_COLUMNS = range(4, 10)
+
+# Fixed checkbox text mapping
+CHECKBOX_TEXT_MAP = {
+    '4': 'No Difference',
+    '5': 'More Exacting',
+    '6': 'Different in character',
+    '7': 'Less protective or partially',
+    '8': 'Significant Difference',
+    '9': 'Not Applicable'
+}
+
+# Exactly 6 column headers for Excel
+EXCEL_HEADERS = [
+    "Annex Ref.",      # Word col 1
+    "Standard",        # Word col 2
+    "Difference",      # Checkboxes from Word cols 4-9
+    "State Ref.",      # Word col 3
+    "Details",         # Word col 10
+    "Remark"           # Word col 11
+]
+
+def clean_cell_text(row_idx, col_idx, raw_text):
+    cell_text = sanitize.cell_text(raw_text, col_idx)
+    # The raw texts can be long: only format them when debug logging is on
+    if logging.getLogger().isEnabledFor(logging.DEBUG) and (col_idx in sanitize.PRESERVED_COLUMNS or col_idx == 1):
+        logging.debug(f"Row {row_idx}, Col {col_idx} raw: {repr(raw_text)}, final: {repr(cell_text)}")
+    return cell_text
+
+def build_excel_row(cell_texts, checked_indices):
+    # Determine text for checked checkboxes
+    if len(checked_indices) == 0:
+        checked_text = ""  # No checkboxes checked
+    elif len(checked_indices) == 1:
+        checked_text = DIFFERENCE_NORMALIZER.labels.get(int(checked_indices[0]), "")
+    else:
+        checked_text = MULTI_CHECKBOX_DIFFERENCE
+
+    # Word cols 1, 2, 3, 10, 11 go to Excel, with "Difference" inserted as the third column
+    return [cell_texts[1], cell_texts[2], checked_text, cell_texts[3], cell_texts[10], cell_texts[11]]
+
+# Legacy form fields of one EFOD row in document order: text (col 3), checkboxes (cols 4-9), text (cols 10, 11)
+EFOD_ROW_FIELD_TYPES = [70] + [71] * 6 + [70, 70]
+CELL_END_MARK = '\r\x07'  # Ends every cell in Range.Text; each row ends with one more
+
+def read_rows_bulk(table, max_rows, job):
+    # Bulk read: the table's text in one Range call and its form fields in one enumeration. A row then
+    # costs 30 COM calls (9 fields enumerated, their 9 Type reads, 6 CheckBox.Value reads at 2 calls
+    # each) instead of the 75 of reading it cell by cell; tests/test_word_bulk_read.py checks this.
+    # Returns None when the table layout does not allow it (merged cells, unexpected fields).
+    pieces = table.Range.Text.split(CELL_END_MARK)
+    if len(pieces) != max_rows * 12 + 1:
+        logging.debug(f"Bulk read: table text splits into {len(pieces)} pieces, expected {max_rows * 12 + 1}")
         return None
+    fields = list(table.Range.FormFields)
+    field_types = [field.Type for field in fields]
+    if field_types != EFOD_ROW_FIELD_TYPES * max_rows:
+        logging.debug(f"Bulk read: {len(fields)} form fields do not follow the EFOD row layout")
+        return None
+
+    table_data = RowTable(EXCEL_HEADERS)
+    fields_per_row = len(EFOD_ROW_FIELD_TYPES)
+    # Column col_idx is every 12th piece (a row is 11 cells and its own end mark), cleaned in one batch
+    columns = {col_idx: sanitize.cell_texts([text + CELL_END_MARK for text in pieces[col_idx - 1:max_rows * 12:12]], col_idx)
+               for col_idx in range(1, 12)}
+    job.rows_begin()
+    for row_idx in range(1, max_rows + 1):
+        cell_texts = {col_idx: texts[row_idx - 1] for col_idx, texts in columns.items()}
+        row_fields = fields[(row_idx - 1) * fields_per_row:row_idx * fields_per_row]
+        checked_indices = [str(col_idx) for col_idx, field in zip(CHECKBOX_COLUMNS, row_fields[1:7])
+                           if field.CheckBox.Value]
+        table_data.append(build_excel_row(cell_texts, checked_indices))
+        job.row_done()
+        job.progress(row_idx, max_rows)
+    return table_data
+
+def read_table_word(file_path, job, session=None, bulk=True):
+    # Reuse the caller's session (one Word instance for many documents), or run a private one
+    own_session = session is None
+    if own_session:
+        session = DocumentSession()
+    doc = None
 
     try:
-        # Open the document
-        doc = word.Documents.Open(os.path.abspath(file_path))
+        # Open the document (starts Word on first use)
+        try:
+            with job.span("open"):
+                doc = session.open(file_path)
+        except Exception as e:
+            if not session.started:
+                logging.error(f"Failed to initialize Word: {e}")
+                return None
+            raise
         logging.info(f"Opened document: {file_path}")
-        root.update()
+        job.update()
 
         # Handle protection (Type 2 - Comments, no password)
-        WD_NO_PROTECTION = -1
-        WD_COMMENTS = 2
-
         if doc.ProtectionType == WD_COMMENTS:
             logging.info("Document is protected (Comments mode). Unprotecting...")
             try:
-                doc.Unprotect()  # No password needed
+                with job.span("unprotect"):
+                    doc.Unprotect()  # No password needed
                 logging.info("Document unprotected successfully.")
-                root.update()
+                job.update()
             except Exception as e:
                 logging.error(f"Failed to unprotect document: {e}")
-                doc.Close()
                 return None
 
         if doc.Tables.Count == 0:
             logging.error("No tables found in the document.")
-            doc.Close()
             return None
 
         # Get the first table
@@ -117,166 +318,643 @@ def export_table_to_excel(file_path, output_dir, root):
         # Verify Word table has 11 columns
         if table.Columns.Count != 11:
             logging.error(f"Expected 11 columns in Word table, found {table.Columns.Count}")
-            doc.Close()
             return None
 
-        # Prepare data structure
-        table_data = []
-        checkbox_columns = range(4, 10)  # Columns 4-9 (1-based: 4, 5, 6, 7, 8, 9)
-
-        # Fixed checkbox text mapping
-        checkbox_text_map = {
-            '4': 'No Difference',
-            '5': 'More Exacting',
-            '6': 'Different in character',
-            '7': 'Less protective or partially',
-            '8': 'Significant Difference',
-            '9': 'Not Applicable'
-        }
-
         # Iterate through rows (1-based indexing)
         max_rows = table.Rows.Count
         # max_rows = min(30, table.Rows.Count)  # Limit to first 30 rows; comment out to process all rows
         logging.info(f"Processing up to {max_rows} rows")
-        root.update()
-        for row_idx in range(1, max_rows + 1):  # Process up to max_rows
-            row_data = []
-            checked_indices = []
+        job.update()
 
-            # Iterate through all 11 columns
-            for col_idx in range(1, 12):  # 1-based: 1 to 11
-                cell = table.Cell(row_idx, col_idx)
-                # Get raw text
-                raw_text = cell.Range.Text
-                # Include tabs, newlines, and carriage returns, exclude other control characters
-                visible_text = ''
-                for char in raw_text:
-                    if ord(char) < 32 and char not in ['\n', '\t', '\r']:
+        if bulk:
+            with job.span("parse"):
+                table_data = read_rows_bulk(table, max_rows, job)
+            if table_data is not None:
+                return table_data
+            logging.info("Table layout does not allow a bulk read, reading cell by cell")
+
+        # Prepare data structure
+        table_data = RowTable(EXCEL_HEADERS)
+        with job.span("parse"):
+            job.rows_begin()
+            for row_idx in range(1, max_rows + 1):  # Process up to max_rows
+                cell_texts = {}
+                checked_indices = []
+
+                # Iterate through all 11 columns
+                for col_idx in range(1, 12):  # 1-based: 1 to 11
+                    cell = table.Cell(row_idx, col_idx)
+                    # Get raw text
+                    raw_text = cell.Range.Text
+                    cell_texts[col_idx] = clean_cell_text(row_idx, col_idx, raw_text)
+                    # Handle checkbox columns (4-9)
+                    if col_idx in CHECKBOX_COLUMNS:
+                        for field in cell.Range.FormFields:
+                            if field.Type == 71:  # wdFieldFormCheckBox
+                                if field.CheckBox.Value:
+                                    checked_indices.append(str(col_idx))
+                                # Debug: Print raw cell content if problematic
+                                if any(ord(c) < 32 and c not in ['\n', '\t', '\r'] for c in raw_text):
+                                    logging.debug(f"Row {row_idx}, Col {col_idx} raw content: {repr(raw_text)}")
+
+                table_data.append(build_excel_row(cell_texts, checked_indices))
+                job.row_done()
+                job.progress(row_idx, max_rows)
+
+        return table_data
+
+    except Exception as e:
+        logging.error(f"An error occurred in read_table_word: {e}")
+        return None
+
+    finally:
+        try:
+            if doc is not None:
+                with job.span("close"):
+                    session.close(doc)  # Without saving: a cancelled job leaves the file untouched
+                logging.info("Document closed")
+        except:
+            pass
+        if own_session:
+            try:
+                with job.span("quit"):
+                    session.quit()
+            except:
+                pass
+
+def read_table_ooxml(file_path, job):
+    # Read the first table straight from word/document.xml, no Word installation needed. Rows are
+    # converted as the parser yields them, so the raw cell texts of the whole table are never held at once
+    table_data = RowTable(EXCEL_HEADERS)
+    column_count = None
+    try:
+        # Parsing happens as rows are pulled, so it is timed together with the extraction
+        with job.span("parse"):
+            job.rows_begin()
+            for row_idx, (grid_columns, cells) in enumerate(iter_form_table(file_path), start=1):
+                if column_count is None:
+                    logging.info(f"Opened document (native engine): {file_path}")
+                    column_count = grid_columns or len(cells)
+                    # Verify Word table has 11 columns
+                    if column_count != 11:
                         break
-                    visible_text += char
-                # Preserve all spaces, tabs, newlines, and carriage returns for columns 2, 3, 10, 11
-                if col_idx in [2, 3, 10, 11]:
-                    cell_text = visible_text  # No stripping to keep spaces, tabs, newlines, and carriage returns
-                else:
-                    cell_text = visible_text.strip()  # Strip for column 1 and others
-                # Log raw and processed text for columns 2, 3, 10, 11
-                if col_idx in [2, 3, 10, 11]:
-                    logging.debug(f"Row {row_idx}, Col {col_idx} raw: {repr(raw_text)}, visible: {repr(visible_text)}, final: {repr(cell_text)}")
-                # If in first column, extract numeric part
-                if col_idx == 1:
-                    numeric_match = re.match(r'^\d+(?:\.\d+)?(?![.\d])', cell_text)
-                    if numeric_match:
-                        cell_text = numeric_match.group(0)
-                        logging.debug(
-                            f"Row {row_idx}, Col {col_idx} raw: {repr(raw_text)}, visible: {repr(visible_text)}, matched: {cell_text}, remainder: {repr(raw_text[len(visible_text):].strip())}")
-                    else:
-                        cell_text = visible_text
-                        logging.debug(
-                            f"Row {row_idx}, Col {col_idx} raw: {repr(raw_text)}, visible: {repr(visible_text)}, cleaned: {cell_text} (no numeric match)")
-                # Handle checkbox columns (4-9)
-                if col_idx in checkbox_columns:
-                    for field in cell.Range.FormFields:
-                        if field.Type == 71:  # wdFieldFormCheckBox
-                            if field.CheckBox.Value:
-                                checked_indices.append(str(col_idx))
-                            # Debug: Print raw cell content if problematic
-                            if any(ord(c) < 32 and c not in ['\n', '\t', '\r'] for c in raw_text):
-                                logging.debug(f"Row {row_idx}, Col {col_idx} raw content: {repr(raw_text)}")
-                # Add specific columns to row_data in desired order
-                elif col_idx in [1, 2, 3, 10, 11]:  # Only these go to Excel
-                    if col_idx == 1:
-                        row_data.append(cell_text)  # Annex Ref. (Excel col 1)
-                    elif col_idx == 2:
-                        row_data.append(cell_text)  # Standard (Excel col 2)
-                    elif col_idx == 3:
-                        row_data.append(cell_text)  # State Ref. (Excel col 4)
-                    elif col_idx == 10:
-                        row_data.append(cell_text)  # Details (Excel col 5)
-                    elif col_idx == 11:
-                        row_data.append(cell_text)  # Remark (Excel col 6)
-
-            # Determine text for checked checkboxes
-            if len(checked_indices) == 0:
-                checked_text = ""  # No checkboxes checked
-            elif len(checked_indices) == 1:
-                checked_text = checkbox_text_map.get(checked_indices[0], "")
-            else:
-                checked_text = "error-multi checkbox"
-
-            # Insert checked text as the third column (Excel col 3)
-            row_data.insert(2, checked_text)  # Inserts "Difference" at index 2
-            table_data.append(row_data)
-            root.update()  # Update GUI after each row
-
-        # Define exactly 6 column headers for Excel
-        headers = [
-            "Annex Ref.",      # Word col 1
-            "Standard",        # Word col 2
-            "Difference",      # Checkboxes from Word cols 4-9
-            "State Ref.",      # Word col 3
-            "Details",         # Word col 10
-            "Remark"           # Word col 11
-        ]
-
-        # Create DataFrame with exactly 6 columns
-        df = pd.DataFrame(table_data, columns=headers)
+                # Merged cells leave a row short; pad so every row has all 11 columns
+                cells = cells[:11] + [("\r\x07", [], [])] * (11 - len(cells))
+                cell_texts = {}
+                checked_indices = []
+                for col_idx, (raw_text, checkboxes, _) in enumerate(cells, start=1):
+                    cell_texts[col_idx] = clean_cell_text(row_idx, col_idx, raw_text)
+                    if col_idx in CHECKBOX_COLUMNS:
+                        checked_indices.extend(str(col_idx) for checked in checkboxes if checked)
+                table_data.append(build_excel_row(cell_texts, checked_indices))
+                job.row_done()  # Includes parsing the row
+                job.progress(row_idx)  # Total unknown while streaming
+    except FormTableError as e:
+        logging.error(str(e))
+        return None
+    except Exception as e:
+        logging.error(f"Failed to read document {file_path}: {e}")
+        return None
+
+    if column_count != 11:
+        logging.error(f"Expected 11 columns in Word table, found {column_count or 0}")
+        return None
+    logging.info(f"Processed {len(table_data)} rows")
+    job.update()
+    return table_data
+
+def write_excel_table(output_excel_path, headers, rows, span=null_span):
+    # Single write: rows are streamed into a write-only workbook together with the
+    # FormDataTable definition and the frozen header, no save/reload/save round trip
+    from openpyxl import Workbook
+    from openpyxl.utils import get_column_letter
+    from openpyxl.worksheet.table import Table, TableColumn, TableStyleInfo
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.freeze_panes = 'A2'  # Freezes row 1 (must be set before any row is written)
+    headers = [str(header) for header in headers]
+    ws.append(headers)
+    row_count = 0
+    with span("xlsx write"):
+        for row_data in rows:
+            ws.append(row_data)
+            row_count += 1
+
+    with span("table styling"):
+        if row_count:
+            # Define the table range (A1 to F<rows+1> for 6 columns)
+            table_range = f"A1:{get_column_letter(len(headers))}{row_count + 1}"
+
+            # Create an Excel table
+            tab = Table(displayName="FormDataTable", ref=table_range)
+            # Write-only sheets cannot read the header row back, so table columns are named explicitly
+            tab.tableColumns = [TableColumn(id=idx, name=header) for idx, header in enumerate(headers, start=1)]
+            style = TableStyleInfo(name="TableStyleMedium2", showFirstColumn=False,
+                                   showLastColumn=False, showRowStripes=True, showColumnStripes=False)
+            tab.tableStyleInfo = style
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")  # openpyxl warns about table columns even when they are set
+                ws.add_table(tab)
+
+    with span("save"):
+        wb.save(output_excel_path)
+    return row_count
+
+def write_output(output_path, headers, rows, span=null_span):
+    # Output table in the format of its extension: xlsx for people, CSV, Parquet or Feather for programs
+    if output_path.lower().endswith(".xlsx"):
+        return write_excel_table(output_path, headers, rows, span=span)
+    with span("table write"):
+        return write_table(output_path, headers, rows)
 
+def output_format_ok(fmt):
+    try:
+        check_format(fmt)
+        return True
+    except (ValueError, FormatUnavailable) as e:
+        logging.error(str(e))
+        return False
+
+def dataframe_rows(df):
+    # DataFrame rows as plain tuples, with NaN written as empty cells (as DataFrame.to_excel does)
+    return df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+
+# Version of the rows each extractor produces, part of the row cache key: bump when the extraction changes
+FORM_ROWS_VERSION = "efod-form/1"
+XML_ROWS_VERSION = "crystal-xml/2"
+
+def cache_lookup(cache, file_path, version):
+    # Returns (cache key, cached rows or None); a cache that cannot be used never fails the conversion
+    if cache is None:
+        return None, None
+    try:
+        key = cache.key(file_path, version)
+        cached = cache.get(key)
+    except OSError as e:
+        logging.warning(f"Row cache unavailable: {e}")
+        return None, None
+    if cached is None:
+        return key, None
+    rows = RowTable.from_columns(*cached)
+    logging.info(f"Loaded {len(rows)} rows from cache, skipping parsing of {file_path}")
+    return key, rows
+
+def cache_store(cache, key, columns, rows):
+    if key is None:
+        return
+    try:
+        cache.put(key, columns, rows.data)  # A RowTable is stored column by column as it is
+        logging.debug(f"Cached {len(rows)} rows ({key[:12]})")
+    except OSError as e:
+        logging.warning(f"Failed to write row cache: {e}")
+
+def cache_writer(cache, key, columns):
+    # Streaming counterpart of cache_store: rows are appended as they are converted, committed at the end
+    if key is None:
+        return None
+    try:
+        return cache.writer(key, columns)
+    except OSError as e:
+        logging.warning(f"Failed to write row cache: {e}")
+        return None
+
+def cache_commit(writer):
+    if writer is None:
+        return
+    try:
+        if writer.commit():
+            logging.debug(f"Cached {writer.rows} rows ({writer.key[:12]})")
+    except OSError as e:
+        logging.warning(f"Failed to write row cache: {e}")
+
+def db_store(db, source, rows):
+    # Upsert a conversion's rows into the optional record database; a failure never fails the conversion
+    if db is None:
+        return
+    try:
+        count = db.upsert_rows(source, rows)
+        logging.info(f"Stored {count} rows of {source} in {db.path}")
+    except Exception as e:
+        logging.warning(f"Failed to store rows in the record database: {e}")
+
+def order_rows(rows, sort=False, refs=None):
+    # Rows in natural Annex Ref. order (sort) and/or only those in an Annex Ref. range such as ("3", "3")
+    if not sort and refs is None:
+        return rows
+    index = RefIndex(row[0] for row in rows)
+    if refs is None:
+        positions = index.sorted_positions()
+    else:
+        positions = index.range(*refs)
+        if not sort:
+            positions.sort()  # Document order
+    logging.info(f"Kept {len(positions)} of {len(rows)} rows" + (", sorted by Annex Ref." if sort else ""))
+    return rows.take(positions)
+
+def export_table_to_excel(file_path, output_dir, job, engine="word", session=None, cache=None, db=None, sort=False,
+                          refs=None, fmt="xlsx"):
+    if not os.path.exists(file_path):
+        logging.error(f"File not found: {file_path}")
+        return None
+    if not output_format_ok(fmt):
+        return None
+
+    with job.span("cache"):
+        cache_key, table_data = cache_lookup(cache, file_path, FORM_ROWS_VERSION)
+    if table_data is None:
+        # "word" drives Word through COM; "ooxml" parses the .docx package directly
+        if engine == "ooxml":
+            table_data = read_table_ooxml(file_path, job)
+        else:
+            table_data = read_table_word(file_path, job, session)
+        if table_data is None:
+            return None
+        cache_store(cache, cache_key, EXCEL_HEADERS, table_data)
+    with job.span("database"):
+        db_store(db, file_path, table_data)
+
+    try:
         # Generate output filename
-        base_name = os.path.splitext(os.path.basename(file_path))[0] + ".xlsx"
+        base_name = os.path.splitext(os.path.basename(file_path))[0] + "." + fmt
         output_excel_path = os.path.join(output_dir, base_name)
         counter = 1
         while os.path.exists(output_excel_path):
-            output_excel_path = os.path.join(output_dir, f"{os.path.splitext(base_name)[0]}_{counter}.xlsx")
+            output_excel_path = os.path.join(output_dir, f"{os.path.splitext(base_name)[0]}_{counter}.{fmt}")
             counter += 1
 
-        # Export to Excel initially
-        df.to_excel(output_excel_path, index=False, engine='openpyxl')
+        table_data = order_rows(table_data, sort, refs)
 
-        # Load the workbook to modify it
-        wb = load_workbook(output_excel_path)
-        ws = wb.active
+        # Export to Excel with the table and frozen headers in a single write
+        write_output(output_excel_path, EXCEL_HEADERS, table_data, span=job.span)
+        logging.info(f"Table data exported to {output_excel_path} (Processed {len(table_data)} rows) with table and frozen headers")
+        job.update()
+        return output_excel_path
 
-        # Define the table range (A1 to F<rows+1> for 6 columns)
-        num_rows = len(table_data) + 1  # +1 for header
-        table_range = f"A1:F{num_rows}"
+    except Exception as e:
+        logging.error(f"An error occurred in export_table_to_excel: {e}")
+        return None
 
-        # Create an Excel table
-        tab = Table(displayName="FormDataTable", ref=table_range)
-        style = TableStyleInfo(name="TableStyleMedium2", showFirstColumn=False,
-                               showLastColumn=False, showRowStripes=True, showColumnStripes=False)
-        tab.tableStyleInfo = style
-        ws.add_table(tab)
+# "Difference" values accepted in Excel and the Word checkbox column (4-9) each one selects
+DIFFERENCE_CHECKBOX_MAP = {
+    'no': 4,  # Short form
+    'no difference': 4,  # Full form
+    'more': 5,  # Short form
+    'more exacting': 5,  # Full form
+    'more exacting or exceeds': 5,  # Full form
+    'difference': 6,  # Short form
+    'difference in character': 6,  # Full form
+    'difference in character or other means of compliance': 6,  # Full form
+    'less': 7,  # Short form
+    'less protective': 7,  # Short form
+    'less protective or partially': 7,  # Short form
+    'partially implemented': 7,  # Short form
+    'not implemented': 7,  # Short form
+    'less protective or partially implemented or not implemented': 7,  # Full form
+    'significant': 8,  # Short form
+    'significant difference': 8,  # Full form
+    'not applicable': 9,  # Full form
+}
+
+MULTI_CHECKBOX_DIFFERENCE = 'error-multi checkbox'  # Exported for rows with more than one checkbox checked
+UNCHECKED_DIFFERENCES = ('', MULTI_CHECKBOX_DIFFERENCE)  # Valid, but select no checkbox
+UNRECOGNIZED = -1
+
+class DifferenceNormalizer:
+    """Validates and maps a whole "Difference" column in one vectorized call.
+
+    The column is factorized first, so the text work (strip, lower-case, table lookup, prefix rules)
+    runs once per distinct value instead of once per row. normalize() returns the checkbox column of
+    every row (4-9, 0 for none, UNRECOGNIZED) together with the (Excel row, value) report of the
+    unrecognized ones. labels are the texts written back for each checkbox column; every label is
+    accepted, so a table this application exported always validates.
+    """
+
+    def __init__(self, columns, prefixes=(), labels=None):
+        # columns maps lower-case text to a checkbox column (0 for none); prefixes are (prefix, column)
+        # rules tried in order for text not in the table; labels maps a checkbox column to its text
+        self.labels = dict(labels or {})
+        self.columns = {label.lower(): column for column, label in self.labels.items()}
+        self.columns.update(columns)
+        self.prefixes = tuple(prefixes)
+        self._table = None  # Lookup index, built on first use so that pandas is not needed at import
+
+    def normalize(self, values):
+        import numpy as np
+        import pandas as pd
+
+        if self._table is None:
+            self._table = pd.Index(list(self.columns))
+            self._columns = np.array(list(self.columns.values()), dtype=np.int8)
+        values = pd.Series(values, dtype=object).reset_index(drop=True)
+        codes, uniques = pd.factorize(values)  # Empty cells (NaN/None) get code -1
+        keys = pd.Index(uniques.astype(str)).str.strip().str.lower()
+        positions = self._table.get_indexer(keys)
+        unique_columns = np.full(len(keys) + 1, UNRECOGNIZED, dtype=np.int8)
+        unique_columns[:-1][positions >= 0] = self._columns[positions[positions >= 0]]
+        unique_columns[-1] = 0  # Position -1: empty cell, no checkbox
+        for prefix, column in self.prefixes:
+            unmatched = unique_columns[:-1] == UNRECOGNIZED
+            unique_columns[:-1][unmatched & np.asarray(keys.str.startswith(prefix), dtype=bool)] = column
+        row_columns = unique_columns[codes]
+        invalid_rows = [(idx + 2, values.iat[idx]) for idx in np.flatnonzero(row_columns == UNRECOGNIZED)]  # Excel row numbers
+        return row_columns, invalid_rows
+
+    def relabel(self, values, labels):
+        # Replace each value whose checkbox column has a label in labels; other values are kept as they are
+        row_columns, _ = self.normalize(values)
+        return [labels.get(column, value) for column, value in zip(row_columns.tolist(), values)]
+
+# Form <-> Excel: the form export writes the CHECKBOX_TEXT_MAP labels, the fill accepts them and every
+# other spelling in DIFFERENCE_CHECKBOX_MAP
+DIFFERENCE_NORMALIZER = DifferenceNormalizer(
+    dict(DIFFERENCE_CHECKBOX_MAP, **dict.fromkeys(UNCHECKED_DIFFERENCES, 0)),
+    labels={int(column): label for column, label in CHECKBOX_TEXT_MAP.items()})
+
+def difference_error_message(invalid_rows):
+    # Report of the unrecognized "Difference" values, followed by every spelling DIFFERENCE_NORMALIZER
+    # accepts (its keys are lower-case; matching ignores case)
+    error_message = "Invalid values found in the 'Difference' column. The following rows contain unrecognized values:\n\n"
+    for row_num, value in invalid_rows:
+        error_message += f"Row {row_num}: '{value}'\n"
+    error_message += "\nExpected values are: " + ", ".join(
+        f"'{v}'" for v in DIFFERENCE_NORMALIZER.columns if v) + ", or empty (case does not matter)."
+    return error_message
+
+# Crystal Reports export: StateDifferenceLevel1 values are matched by prefix and written in their full form
+CRYSTAL_DIFFERENCE_NORMALIZER = DifferenceNormalizer({}, prefixes=(("less p", 7), ("more e", 5), ("difference", 6)))
+CRYSTAL_DIFFERENCE_LABELS = {
+    7: "Less protective or Partially Implemented or Not Implemented",
+    5: "More Exacting or Exceeds",
+    6: "Difference in character or Other means of compliance",
+}
+
+# Form fields written by the fill: Word column -> Excel column
+FILL_COLUMNS = ((3, "State Ref."), (10, "Details"), (11, "Remark"))
+
+def truncate_field_text(cell_text, row_idx, col_idx):
+    if len(cell_text) > sanitize.FIELD_TEXT_LIMIT:
+        logging.warning(f"Row {row_idx}, Col {col_idx}: Text truncated from {len(cell_text)} to {sanitize.FIELD_TEXT_LIMIT} characters.")
+        cell_text = cell_text[:sanitize.FIELD_TEXT_LIMIT]
+    return cell_text
+
+def build_fill_plan(df, checkbox_columns):
+    # Target state of every table row, computed once: ({col: sanitized text}, expected checkbox column);
+    # checkbox_columns comes from DIFFERENCE_NORMALIZER (0 and unrecognized values: all unchecked)
+    plan = []
+    texts_by_column = {col_idx: sanitize.field_texts(df[header]) for col_idx, header in FILL_COLUMNS}
+    for row_idx, checkbox_column in enumerate(checkbox_columns.tolist(), start=1):
+        texts = {col_idx: truncate_field_text(column[row_idx - 1], row_idx, col_idx)
+                 for col_idx, column in texts_by_column.items()}
+        plan.append((texts, checkbox_column if checkbox_column > 0 else None))
+    return plan
+
+def snapshot_form_fields(form_path, max_rows):
+    # Current state of every form field, read from the .docx without Word: (rows, field count), where each
+    # row lists per cell its fields as (kind, value) in document order. None if the file cannot be mapped.
+    try:
+        _, rows = read_form_table(form_path)
+    except Exception as e:
+        logging.debug(f"Native snapshot of {form_path} failed: {e}")
+        return None
+    if len(rows) != max_rows:
+        return None
+    snapshot = []
+    count = 0
+    for row in rows:
+        cells = []
+        for _, checkboxes, text_fields in row:
+            if checkboxes and text_fields:
+                return None  # Order of mixed fields within a cell is unknown
+            cells.append([("text", text) for text in text_fields] + [("checkbox", checked) for checked in checkboxes])
+            count += len(cells[-1])
+        snapshot.append(cells)
+    return snapshot, count
+
+def snapshot_form_fields_word(form_fields, max_rows):
+    # Same snapshot through Word, for tables following the EFOD row layout
+    fields = list(form_fields)
+    field_types = [field.Type for field in fields]
+    if field_types != EFOD_ROW_FIELD_TYPES * max_rows:
+        return None
+    snapshot = []
+    values = iter(field.Result if field_type == 70 else bool(field.CheckBox.Value)
+                  for field, field_type in zip(fields, field_types))
+    for _ in range(max_rows):
+        cells = [[] for _ in range(11)]
+        cells[2].append(("text", next(values)))
+        for col_idx in CHECKBOX_COLUMNS:
+            cells[col_idx - 1].append(("checkbox", next(values)))
+        cells[9].append(("text", next(values)))
+        cells[10].append(("text", next(values)))
+        snapshot.append(cells)
+    return snapshot, len(fields)
+
+# Line breaks as a form holds them (\x0b manual break, \r paragraph) and as a cell holds them (\n, \r\n)
+FIELD_LINE_BREAKS = str.maketrans({"\x0b": "\n", "\r": "\n"})
+
+def same_field_text(current, wanted):
+    # Word shows an empty text field as five en spaces; line breaks compare equal in any form
+    if current == wanted:
+        return True
+    if not wanted:
+        return not current.strip("\u2002 ")
+    return current.replace("\r\n", "\n").translate(FIELD_LINE_BREAKS) == wanted.replace("\r\n", "\n").translate(FIELD_LINE_BREAKS)
+
+def plan_field_updates(plan, snapshot):
+    # Diff the fill plan against the snapshot: returns (updates, warnings), each update being
+    # (row, col, 1-based index into the table's FormFields, kind, new value)
+    updates = []
+    warnings = []
+    index = 0
+    for row_idx, ((texts, expected_col), cells) in enumerate(zip(plan, snapshot), start=1):
+        first_index = {}
+        for col_idx, cell_fields in enumerate(cells, start=1):
+            first_index[col_idx] = index + 1
+            index += len(cell_fields)
+        for col_idx, cell_text in texts.items():
+            cell_fields = cells[col_idx - 1] if col_idx <= len(cells) else []
+            if not cell_fields:
+                warnings.append((row_idx, col_idx, "No form field - skipping"))
+            elif cell_fields[0][0] != "text":
+                warnings.append((row_idx, col_idx, f"Expected text field, found {cell_fields[0][0]} field"))
+            elif not same_field_text(cell_fields[0][1], cell_text):
+                updates.append((row_idx, col_idx, first_index[col_idx], "text", cell_text))
+        for col_idx in CHECKBOX_COLUMNS:
+            if col_idx > len(cells):
+                continue
+            for offset, (kind, checked) in enumerate(cells[col_idx - 1]):
+                want = col_idx == expected_col
+                if kind == "checkbox" and checked != want:
+                    updates.append((row_idx, col_idx, first_index[col_idx] + offset, "checkbox", want))
+    return updates, warnings
+
+def fill_rows_cell_by_cell(table, plan, job):
+    # Fallback for tables the fill plan cannot be mapped onto: walk every cell through Word
+    max_rows = len(plan)
+    for row_idx, (texts, expected_col) in enumerate(plan, start=1):
+        # Fill text fields (columns 3, 10, 11)
+        for col_idx, cell_text in texts.items():
+            try:
+                cell = table.Cell(row_idx, col_idx)
+                if cell.Range.FormFields.Count > 0:
+                    field = cell.Range.FormFields(1)
+                    if field.Type == 70:  # wdFieldFormTextInput
+                        # Set the field
+                        field.Result = cell_text
 
-        # Freeze the first row (headers)
-        ws.freeze_panes = ws['A2']  # Freezes row 1
+                        if cell_text:logging.debug(f"Set text field in Row {row_idx}, Col {col_idx}: '{cell_text}'")
+                        else:
+                            logging.debug(f"Cleared text field in Row {row_idx}, Col {col_idx} (empty)")
+                    else:
+                        logging.warning(f"Expected text field, found type {field.Type} in Row {row_idx}, Col {col_idx}")
+                else:
+                    logging.warning(f"No form field in Row {row_idx}, Col {col_idx} - skipping")
+            except Exception as e:
+                logging.error(f"Failed to set text in Row {row_idx}, Col {col_idx}: {e}")
+        job.update()
 
-        # Save the modified workbook
-        wb.save(output_excel_path)
-        logging.info(f"Table data exported to {output_excel_path} (Processed {len(table_data)} rows) with table and frozen headers")
-        root.update()
-        return output_excel_path
+        # Handle checkboxes (columns 4-9)
+        # First, determine the current checkbox state - detect ALL checked boxes
+        current_checked_cols = []
+        for col_idx in range(4, 10):  # Columns 4-9
+            try:
+                cell = table.Cell(row_idx, col_idx)
+                if cell.Range.FormFields.Count > 0:
+                    for field in cell.Range.FormFields:
+                        if field.Type == 71:  # wdFieldFormCheckBox
+                            if field.CheckBox.Value:
+                                current_checked_cols.append(col_idx)
+                                # logging.debug(f"Row {row_idx}: Found checked checkbox in Col {col_idx}")
+            except Exception as e:
+                logging.error(f"Error reading checkbox in Row {row_idx}, Col {col_idx}: {e}")
+
+        # # Log current and expected state
+        # if len(current_checked_cols) > 1:
+        #     logging.warning(f"Row {row_idx}: Multiple checkboxes detected! Currently checked: {current_checked_cols}, Expected: {expected_col or 'none'}")
+        # elif len(current_checked_cols) == 1:
+        #     logging.debug(f"Row {row_idx}: Single checkbox currently checked in Col {current_checked_cols[0]}, Expected: {expected_col or 'none'}")
+        # else:
+        #     logging.debug(f"Row {row_idx}: No checkboxes currently checked, Expected: {expected_col or 'none'}")
+
+        # Determine if any changes are needed
+        needs_change = False
+        if expected_col is None:
+            # Expected: all unchecked
+            needs_change = len(current_checked_cols) > 0
+        else:
+            # Expected: specific one checked
+            needs_change = (len(current_checked_cols) != 1) or (current_checked_cols[0] != expected_col)
+
+        if not needs_change:
+            logging.debug(f"Row {row_idx}: No Checkbox changes needed")
+        else:
+            # logging.debug(f"Row {row_idx}: Checkbox state change needed - current: {current_checked_cols}, expected: {expected_col or 'none'}")
+
+            # Whenever change is needed, first Uncheck ALL currently checked boxes
+            for col_idx in current_checked_cols:
+                try:
+                    cell = table.Cell(row_idx, col_idx)
+                    if cell.Range.FormFields.Count > 0:
+                        for field in cell.Range.FormFields:
+                            if field.Type == 71:  # wdFieldFormCheckBox
+                                field.CheckBox.Value = False
+                                logging.debug(f"Row {row_idx}: Unchecked box in Col {col_idx}")
+                except Exception as e:
+                    logging.error(f"Row {row_idx}: Error unchecking checkbox in Col {col_idx}: {e}")
+
+            # Check the expected one (if any)
+            if expected_col:
+                try:
+                    cell = table.Cell(row_idx, expected_col)
+                    if cell.Range.FormFields.Count > 0:
+                        for field in cell.Range.FormFields:
+                            if field.Type == 71:  # wdFieldFormCheckBox
+                                field.CheckBox.Value = True
+                                logging.debug(f"Row {row_idx}: Checked box in Col {expected_col}")
+                except Exception as e:
+                    logging.error(f"Row {row_idx}: Error setting checkbox in Col {expected_col}: {e}")
+
+            # Comprehensive verification - check ALL checkboxes in columns 4-9
+            # logging.debug(f"Row {row_idx}: Verifying final checkbox state...")
+            final_checked_cols = []
+            for col_idx in range(4, 10):
+                try:
+                    cell = table.Cell(row_idx, col_idx)
+                    if cell.Range.FormFields.Count > 0:
+                        for field in cell.Range.FormFields:
+                            if field.Type == 71:  # wdFieldFormCheckBox
+                                if field.CheckBox.Value:
+                                    final_checked_cols.append(col_idx)
+                                    if col_idx != expected_col:
+                                        # Unexpected checkbox is still checked - force uncheck
+                                        # logging.warning(f"Row {row_idx}: Unexpected checkbox found in Col {col_idx} - force unchecking")
+                                        field.CheckBox.Value = False
+                                        final_checked_cols.remove(
+                                            col_idx)  # Remove from list since we just fixed it
+                except Exception as e:
+                    logging.error(f"Row {row_idx}: Error verifying checkbox in Col {col_idx}: {e}")
 
+            # Double-check the expected one is actually checked
+            if expected_col:
+                try:
+                    cell = table.Cell(row_idx, expected_col)
+                    if cell.Range.FormFields.Count > 0:
+                        for field in cell.Range.FormFields:
+                            if field.Type == 71 and not field.CheckBox.Value:
+                                logging.error(
+                                    f"Row {row_idx}: Expected checkbox in Col {expected_col} is not checked - force setting!")
+                                field.CheckBox.Value = True
+                                final_checked_cols.append(expected_col)
+                except Exception as e:
+                    logging.error(f"Row {row_idx}: Error double-checking checkbox in Col {expected_col}: {e}")
+
+            # Final state validation
+            if expected_col is None:
+                # Should be all unchecked
+                if final_checked_cols:
+                    logging.error(f"Row {row_idx}: Verification failed! Expected all unchecked but found {final_checked_cols} still checked")
+                else:
+                    logging.debug(f"Row {row_idx}: Verification passed - all checkboxes unchecked as expected")
+            else:
+                # Should have exactly one checked (the expected one)
+                if len(final_checked_cols) == 1 and final_checked_cols[0] == expected_col:
+                    logging.debug(
+                        f"Row {row_idx}: Verification passed - Col {expected_col} checked, others unchecked")
+                else:
+                    logging.error(f"Row {row_idx}: Verification failed! Expected Col {expected_col} checked, but found {final_checked_cols}")
+
+        job.row_done()
+        job.progress(row_idx, max_rows)
+
+def fill_form_ooxml(df, form_path, job, checkbox_columns):
+    # Patch the form fields in word/document.xml directly, no Word installation needed
+    with job.span("plan"):
+        rows = build_fill_plan(df, checkbox_columns)
+    logging.info(f"Processing {len(rows)} rows (native engine)")
+    job.update()
+
+    try:
+        with job.span("save"):
+            changes, warnings = fill_form_table(form_path, rows)
+    except RowCountMismatch as e:
+        logging.error(str(e))
+        job.error_dialog("Error", str(e))
+        return None
+    except FormTableError as e:
+        logging.error(str(e))
+        return None
     except Exception as e:
-        logging.error(f"An error occurred in export_table_to_excel: {e}")
+        logging.error(f"An error occurred in fill_form_ooxml: {e}")
         return None
 
-    finally:
-        try:
-            doc.Close()
-            logging.info("Document closed")
-            root.update()
-        except:
-            pass
-        try:
-            word.Quit()
-            logging.info("Word application quit")
-            root.update()
-        except:
-            pass
+    for row_idx, col_idx, message in warnings:
+        logging.warning(f"Row {row_idx}, Col {col_idx}: {message}")
+    logging.info(f"Changes saved to original document: {form_path} ({changes} form fields updated, protection kept)")
+    job.update()
+    return form_path
 
-def fill_form_from_excel(excel_path, form_path, root):
-    WD_NO_PROTECTION = -1
-    WD_COMMENTS = 2
+def fill_form_from_excel(excel_path, form_path, job, engine="word", session=None):
     if not os.path.exists(excel_path):
         logging.error(f"Excel file not found: {excel_path}")
         return None
@@ -284,55 +962,27 @@ def fill_form_from_excel(excel_path, form_path, root):
         logging.error(f"Form file not found: {form_path}")
         return None
 
-    # Read Excel data
+    # Read Excel data: only the six EFOD columns, the header row is checked before any data row is read
     try:
-        df = pd.read_excel(excel_path)
-        if list(df.columns) != ["Annex Ref.", "Standard", "Difference", "State Ref.", "Details", "Remark"]:
-            logging.error("Excel file does not match expected column structure")
-            return None
+        with job.span("dataframe build"):
+            df = read_table(excel_path, columns=EXCEL_HEADERS)
         logging.info("Excel data loaded successfully")
-        root.update()
+        job.update()
+    except TableLayoutError as e:
+        logging.error(f"Excel file does not match expected column structure: {e}")
+        return None
     except Exception as e:
         logging.error(f"Failed to read Excel file: {e}")
         return None
 
     # Validate "Difference" column values
-    checkbox_text_map = {
-        'no': 4,  # Short form
-        'no difference': 4,  # Full form
-        'more': 5,  # Short form
-        'more exacting': 5,  # Full form
-        'more exacting or exceeds': 5,  # Full form
-        'difference': 6,  # Short form
-        'difference in character': 6,  # Full form
-        'difference in character or other means of compliance': 6,  # Full form
-        'less': 7,  # Short form
-        'less protective': 7,  # Short form
-        'less protective or partially': 7,  # Short form
-        'partially implemented': 7,  # Short form
-        'not implemented': 7,  # Short form
-        'less protective or partially implemented or not implemented': 7,  # Full form
-        'significant': 8,  # Short form
-        'significant difference': 8,  # Full form
-        'not applicable': 9,  # Full form
-    }
-    valid_values = list(checkbox_text_map.keys()) + ['error-multi checkbox',
-                                                     '']  # Allow empty string and error-multi checkbox
-    invalid_rows = []
-    for idx, value in enumerate(df["Difference"]):
-        # Convert value to string and normalize for comparison
-        diff_value = str(value).strip().lower() if pd.notna(value) else ''
-        if diff_value not in valid_values:
-            invalid_rows.append((idx + 2, value))  # Excel row number (index + 2 due to header)
+    with job.span("validate"):
+        checkbox_columns, invalid_rows = DIFFERENCE_NORMALIZER.normalize(df["Difference"])
 
     if invalid_rows:
-        error_message = "Invalid values found in the 'Difference' column. The following rows contain unrecognized values:\n\n"
-        for row_num, value in invalid_rows:
-            error_message += f"Row {row_num}: '{value}'\n"
-        error_message += "\nExpected values are: " + ", ".join(
-            f"'{v}'" for v in checkbox_text_map.keys()) + ", 'error-multi checkbox', or empty."
+        error_message = difference_error_message(invalid_rows)
         logging.error(error_message)
-        messagebox.showerror("Invalid Difference Values", error_message)
+        job.error_dialog("Invalid Difference Values", error_message)
         return None
 
     # Create backup of the form file
@@ -344,35 +994,42 @@ def fill_form_from_excel(excel_path, form_path, root):
         while os.path.exists(backup_path):
             backup_path = os.path.join(output_dir, f"{base_name}_beforefilling_{counter}.docx")
             counter += 1
-        shutil.copy2(form_path, backup_path)  # Copy the file preserving metadata
+        with job.span("backup"):
+            shutil.copy2(form_path, backup_path)  # Copy the file preserving metadata
         logging.info(f"Created backup: {backup_path}")
-        root.update()
+        job.update()
     except Exception as e:
         logging.error(f"Failed to create backup: {e}")
         return None
 
-    # Initialize Word application
-    try:
-        word = win32.Dispatch('Word.Application')
-        word.Visible = False
-        word.DisplayAlerts = False
-        logging.info("Word application initialized")
-        root.update()
-    except Exception as e:
-        logging.error(f"Failed to initialize Word: {e}")
-        return None
+    if engine == "ooxml":
+        return fill_form_ooxml(df, form_path, job, checkbox_columns)
+    with job.span("plan"):
+        plan = build_fill_plan(df, checkbox_columns)
+
+    # Reuse the caller's session (one Word instance for many documents), or run a private one
+    own_session = session is None
+    if own_session:
+        session = DocumentSession()
+    doc = None
 
     try:
-        # Open the original document
+        # Open the original document (starts Word on first use)
         logging.debug(f"Attempting to open document: {form_path}")
-        doc = word.Documents.Open(os.path.abspath(form_path))
+        try:
+            with job.span("open"):
+                doc = session.open(form_path)
+        except Exception as e:
+            if not session.started:
+                logging.error(f"Failed to initialize Word: {e}")
+                return None
+            raise
         logging.info(f"Opened document: {form_path}")
-        root.update()
+        job.update()
 
         # Get the first table
         if doc.Tables.Count == 0:
             logging.error("No tables found in the document.")
-            doc.Close()
             return None
 
         table = doc.Tables(1)
@@ -381,7 +1038,6 @@ def fill_form_from_excel(excel_path, form_path, root):
         logging.debug("Verifying column count")
         if table.Columns.Count != 11:
             logging.error(f"Expected 11 columns in Word table, found {table.Columns.Count}")
-            doc.Close()
             return None
 
         # Check if number of rows matches
@@ -389,199 +1045,55 @@ def fill_form_from_excel(excel_path, form_path, root):
         word_rows = table.Rows.Count
         if excel_rows != word_rows:
             logging.error(f"Row count mismatch: Excel has {excel_rows} rows, Word table has {word_rows} rows")
-            messagebox.showerror("Error", f"Row count mismatch: Excel has {excel_rows} rows, Word table has {word_rows} rows")
-            doc.Close()
+            job.error_dialog("Error", f"Row count mismatch: Excel has {excel_rows} rows, Word table has {word_rows} rows")
             return None
         logging.info(f"Row count matches: {excel_rows} rows in both Excel and Word table")
-        root.update()
+        job.update()
 
-        # Iterate through rows
-        max_rows = table.Rows.Count
+        max_rows = word_rows
         logging.info(f"Processing {max_rows} rows")
-        root.update()
-        for row_idx in range(1, max_rows + 1):
-            row_data = df.iloc[row_idx - 1]  # 0-based index for pandas
-
-            # Fill text fields (columns 3, 10, 11)
-            for col_idx, value in [(3, row_data["State Ref."]), (10, row_data["Details"]), (11, row_data["Remark"])]:
-                try:
-                    cell = table.Cell(row_idx, col_idx)
-                    if cell.Range.FormFields.Count > 0:
-                        field = cell.Range.FormFields(1)
-                        if field.Type == 70:  # wdFieldFormTextInput
-                            # Handle NaN values
-                            if pd.isna(value):
-                                cell_text = ""
-                            else:
-                                # Convert to string and clean up whitespace
-                                cell_text = str(value)
-
-                                # Remove leading/trailing whitespace (including Unicode spaces)
-                                cell_text = cell_text.strip()
-
-                                # Remove internal Unicode whitespace characters that are effectively empty
-                                # Keep regular spaces, tabs, and newlines, but remove exotic Unicode spaces
-                                if not cell_text or len(cell_text) <= 3:
-                                    # For very short strings, check if it's just whitespace
-                                    cleaned = re.sub(r'[\u2000-\u200B\u2028\u2029\u202F\u205F\u3000]+', '', cell_text)
-                                    if not cleaned:
-                                        cell_text = ""  # Treat as empty if only Unicode whitespace
-                                    else:
-                                        cell_text = cleaned  # Keep the cleaned content
-                                else:
-                                    # For longer content, just strip and keep as-is
-                                    pass
-                            #  Truncate to 255 chars (Word form field limit) ---
-                            if len(cell_text) > 255:
-                                logging.warning(f"Row {row_idx}, Col {col_idx}: Text truncated from {len(cell_text)} to 255 characters.")
-                                cell_text = cell_text[:255]
-                            
-                            # Set the field
-                            field.Result = cell_text
-
-                            if cell_text:logging.debug(f"Set text field in Row {row_idx}, Col {col_idx}: '{cell_text}'")
-                            else:
-                                logging.debug(f"Cleared text field in Row {row_idx}, Col {col_idx} (empty)")
-                        else:
-                            logging.warning(f"Expected text field, found type {field.Type} in Row {row_idx}, Col {col_idx}")
-                    else:
-                        logging.warning(f"No form field in Row {row_idx}, Col {col_idx} - skipping")
-                except Exception as e:
-                    logging.error(f"Failed to set text in Row {row_idx}, Col {col_idx}: {e}")
-            root.update()
-
-            # Handle checkboxes (columns 4-9)
-            diff_value = row_data["Difference"]
-            expected_col = None
-
-            # First, determine the current checkbox state - detect ALL checked boxes
-            current_checked_cols = []
-            for col_idx in range(4, 10):  # Columns 4-9
-                try:
-                    cell = table.Cell(row_idx, col_idx)
-                    if cell.Range.FormFields.Count > 0:
-                        for field in cell.Range.FormFields:
-                            if field.Type == 71:  # wdFieldFormCheckBox
-                                if field.CheckBox.Value:
-                                    current_checked_cols.append(col_idx)
-                                    # logging.debug(f"Row {row_idx}: Found checked checkbox in Col {col_idx}")
-                except Exception as e:
-                    logging.error(f"Error reading checkbox in Row {row_idx}, Col {col_idx}: {e}")
-
-            # Determine what the checkbox state should be
-            if pd.notna(diff_value) and diff_value != "error-multi checkbox":
-                diff_key = str(diff_value).strip().lower()
-                if diff_key in checkbox_text_map:
-                    expected_col = checkbox_text_map[diff_key]
-                else:
-                    # Unrecognized value - should all be unchecked
-                    expected_col = None
-            else:
-                # NaN or "error-multi checkbox" - should all be unchecked
-                expected_col = None
-
-            # # Log current and expected state
-            # if len(current_checked_cols) > 1:
-            #     logging.warning(f"Row {row_idx}: Multiple checkboxes detected! Currently checked: {current_checked_cols}, Expected: {expected_col or 'none'}")
-            # elif len(current_checked_cols) == 1:
-            #     logging.debug(f"Row {row_idx}: Single checkbox currently checked in Col {current_checked_cols[0]}, Expected: {expected_col or 'none'}")
-            # else:
-            #     logging.debug(f"Row {row_idx}: No checkboxes currently checked, Expected: {expected_col or 'none'}")
-
-            # Determine if any changes are needed
-            needs_change = False
-            if expected_col is None:
-                # Expected: all unchecked
-                needs_change = len(current_checked_cols) > 0
-            else:
-                # Expected: specific one checked
-                needs_change = (len(current_checked_cols) != 1) or (current_checked_cols[0] != expected_col)
-
-            if not needs_change:
-                logging.debug(f"Row {row_idx}: No Checkbox changes needed")
-            else:
-                # logging.debug(f"Row {row_idx}: Checkbox state change needed - current: {current_checked_cols}, expected: {expected_col or 'none'}")
-
-                # Whenever change is needed, first Uncheck ALL currently checked boxes
-                for col_idx in current_checked_cols:
-                    try:
-                        cell = table.Cell(row_idx, col_idx)
-                        if cell.Range.FormFields.Count > 0:
-                            for field in cell.Range.FormFields:
-                                if field.Type == 71:  # wdFieldFormCheckBox
-                                    field.CheckBox.Value = False
-                                    logging.debug(f"Row {row_idx}: Unchecked box in Col {col_idx}")
-                    except Exception as e:
-                        logging.error(f"Row {row_idx}: Error unchecking checkbox in Col {col_idx}: {e}")
-
-                # Check the expected one (if any)
-                if expected_col:
-                    try:
-                        cell = table.Cell(row_idx, expected_col)
-                        if cell.Range.FormFields.Count > 0:
-                            for field in cell.Range.FormFields:
-                                if field.Type == 71:  # wdFieldFormCheckBox
-                                    field.CheckBox.Value = True
-                                    logging.debug(f"Row {row_idx}: Checked box in Col {expected_col}: {diff_value}")
-                    except Exception as e:
-                        logging.error(f"Row {row_idx}: Error setting checkbox in Col {expected_col}: {e}")
 
-                # Comprehensive verification - check ALL checkboxes in columns 4-9
-                # logging.debug(f"Row {row_idx}: Verifying final checkbox state...")
-                final_checked_cols = []
-                for col_idx in range(4, 10):
-                    try:
-                        cell = table.Cell(row_idx, col_idx)
-                        if cell.Range.FormFields.Count > 0:
-                            for field in cell.Range.FormFields:
-                                if field.Type == 71:  # wdFieldFormCheckBox
-                                    if field.CheckBox.Value:
-                                        final_checked_cols.append(col_idx)
-                                        if col_idx != expected_col:
-                                            # Unexpected checkbox is still checked - force uncheck
-                                            # logging.warning(f"Row {row_idx}: Unexpected checkbox found in Col {col_idx} - force unchecking")
-                                            field.CheckBox.Value = False
-                                            final_checked_cols.remove(
-                                                col_idx)  # Remove from list since we just fixed it
-                    except Exception as e:
-                        logging.error(f"Row {row_idx}: Error verifying checkbox in Col {col_idx}: {e}")
-
-                # Double-check the expected one is actually checked
-                if expected_col:
+        # Compare the fill plan against one snapshot of the form's current state and write only the differences
+        with job.span("snapshot"):
+            updates = None
+            snapshot = snapshot_form_fields(form_path, max_rows)
+            form_fields = table.Range.FormFields
+            if snapshot is not None and form_fields.Count != snapshot[1]:
+                logging.debug(f"Snapshot has {snapshot[1]} form fields, Word reports {form_fields.Count}")
+                snapshot = None
+            if snapshot is None:
+                snapshot = snapshot_form_fields_word(form_fields, max_rows)
+            if snapshot is not None:
+                updates, warnings = plan_field_updates(plan, snapshot[0])
+                for row_idx, col_idx, message in warnings:
+                    logging.warning(f"Row {row_idx}, Col {col_idx}: {message}")
+
+        if updates is None:
+            logging.info("Form layout does not allow a planned fill, filling cell by cell")
+            with job.span("write fields"):
+                fill_rows_cell_by_cell(table, plan, job)
+        else:
+            logging.info(f"{len(updates)} form fields differ from the Excel data")
+            with job.span("write fields"):
+                for done, (row_idx, col_idx, index, kind, value) in enumerate(updates, start=1):
                     try:
-                        cell = table.Cell(row_idx, expected_col)
-                        if cell.Range.FormFields.Count > 0:
-                            for field in cell.Range.FormFields:
-                                if field.Type == 71 and not field.CheckBox.Value:
-                                    logging.error(
-                                        f"Row {row_idx}: Expected checkbox in Col {expected_col} is not checked - force setting!")
-                                    field.CheckBox.Value = True
-                                    final_checked_cols.append(expected_col)
+                        field = form_fields(index)
+                        if kind == "text":
+                            field.Result = value
+                            logging.debug(f"Set text field in Row {row_idx}, Col {col_idx}: '{value}'")
+                        else:
+                            field.CheckBox.Value = value
+                            logging.debug(f"Row {row_idx}: {'Checked' if value else 'Unchecked'} box in Col {col_idx}")
                     except Exception as e:
-                        logging.error(f"Row {row_idx}: Error double-checking checkbox in Col {expected_col}: {e}")
-
-                # Final state validation
-                if expected_col is None:
-                    # Should be all unchecked
-                    if final_checked_cols:
-                        logging.error(f"Row {row_idx}: Verification failed! Expected all unchecked but found {final_checked_cols} still checked")
-                    else:
-                        logging.debug(f"Row {row_idx}: Verification passed - all checkboxes unchecked as expected")
-                else:
-                    # Should have exactly one checked (the expected one)
-                    if len(final_checked_cols) == 1 and final_checked_cols[0] == expected_col:
-                        logging.debug(
-                            f"Row {row_idx}: Verification passed - Col {expected_col} checked, others unchecked")
-                    else:
-                        logging.error(f"Row {row_idx}: Verification failed! Expected Col {expected_col} checked, but found {final_checked_cols}")
-
-            root.update()
-
-        # Save changes to the original document
-        doc.Save()
-        logging.info(f"Changes saved to original document: {form_path}")
-
-        # Re-apply original protection (Type 2 - Comments, no password)
+                        logging.error(f"Failed to update form field in Row {row_idx}, Col {col_idx}: {e}")
+                    job.progress(done, len(updates))
+            if not updates:
+                logging.info(f"Form already matches the Excel data, nothing to save: {form_path}")
+                job.update()
+                return form_path
+
+        # Re-apply original protection (Type 2 - Comments, no password) before saving: the document is
+        # closed without saving, so protection applied after Save() would be lost
         if doc.ProtectionType == WD_NO_PROTECTION:  # Check if we unprotected it
             try:
                 doc.Protect(Type=WD_COMMENTS, NoReset=False)
@@ -589,7 +1101,12 @@ def fill_form_from_excel(excel_path, form_path, root):
             except Exception as e:
                 logging.warning(f"Failed to re-apply protection: {e}")
 
-        root.update()
+        # Save changes to the original document
+        with job.span("save"):
+            doc.Save()
+        logging.info(f"Changes saved to original document: {form_path}")
+
+        job.update()
         return form_path
 
     except Exception as e:
@@ -598,128 +1115,341 @@ def fill_form_from_excel(excel_path, form_path, root):
 
     finally:
         try:
-            doc.Close()
-            logging.info("Document closed")
-            root.update()
-        except:
-            pass
-        try:
-            word.Quit()
-            logging.info("Word application quit")
-            root.update()
+            if doc is not None:
+                with job.span("close"):
+                    session.close(doc)  # Without saving: a cancelled job leaves the file untouched
+                logging.info("Document closed")
         except:
             pass
-
-def xml_to_excel(xml_path, output_dir, root):
+        if own_session:
+            try:
+                with job.span("quit"):
+                    session.quit()
+            except:
+                pass
+
+CRYSTAL_NAMESPACES = {'ns': 'urn:crystal-reports:schemas:report-detail'}
+_CRYSTAL_NS = '{urn:crystal-reports:schemas:report-detail}'
+_CRYSTAL_DETAILS_TAG = _CRYSTAL_NS + 'Details'
+
+# Crystal Reports field names (Field/@Name) and the Excel column each one fills
+CRYSTAL_FIELDS = {
+    "AnnexReferenceNumber1": "Annex Ref.",
+    "SARP11": "Standard",
+    "StateDifferenceLevel1": "Difference",
+    "StateReference1": "State Ref.",
+    "StateDifference1": "Details",
+    "StateComments1": "Remark",
+}
+
+class CrystalFieldExtractor:
+    """Single-pass extractor for ns:Details records.
+
+    Walks the record's Field elements once and dispatches on @Name through a lookup table, instead of
+    one descendant search per column. fields maps field names to columns; several names may feed the
+    same column (the first one present wins) and columns not in EXCEL_HEADERS are appended after them.
+    """
+
+    def __init__(self, fields=None):
+        fields = dict(CRYSTAL_FIELDS, **(fields or {}))
+        self.columns = list(EXCEL_HEADERS) + [c for c in dict.fromkeys(fields.values()) if c not in EXCEL_HEADERS]
+        self._slots = {name: self.columns.index(column) for name, column in fields.items()}
+        self.version = ";".join(f"{name}={column}" for name, column in fields.items())  # Identifies the field mapping
+        self._field_tag = _CRYSTAL_NS + 'Field'
+        self._value_tag = _CRYSTAL_NS + 'Value'
+
+    def extract(self, details):
+        values = [None] * len(self.columns)
+        slots = self._slots
+        for field in details.iter(self._field_tag):
+            slot = slots.get(field.get('Name'))
+            if slot is None or values[slot] is not None:
+                continue
+            value = field.find(self._value_tag)
+            if value is not None:
+                values[slot] = value
+        # Check if elements are found and extract text
+        return [value.text if value is not None else "Not Found" for value in values]
+
+DEFAULT_EXTRACTOR = CrystalFieldExtractor()
+
+def details_to_row(details, extractor=DEFAULT_EXTRACTOR):
+    row_data = extractor.extract(details)
+
+    # Log the extracted data
+    logging.debug(f"Annex Ref: {row_data[0]}, Standard: {row_data[1]}, State Ref: {row_data[3]}, "
+                  f"Difference: {row_data[2]}, Details: {row_data[4]}, Remark: {row_data[5]}")
+    return row_data
+
+def normalize_crystal_differences(rows):
+    # Full-form "Difference" text for a RowTable of extracted rows, in one call
+    rows.set_column(2, CRYSTAL_DIFFERENCE_NORMALIZER.relabel(rows.column(2), CRYSTAL_DIFFERENCE_LABELS))
+    return rows
+
+CRYSTAL_BATCH_ROWS = 1000  # Streamed rows are normalized in batches of this size
+
+def iter_details_rows(xml_path, extractor=DEFAULT_EXTRACTOR, row_done=None):
+    # Stream the report: each Details record is converted when it closes, then detached from the tree.
+    # row_done is called as each row is extracted (rows are yielded in batches, after normalization)
+    parents = []
+    batch = RowTable(extractor.columns)
+    for event, elem in ET.iterparse(xml_path, events=("start", "end")):
+        if event == "start":
+            parents.append(elem)
+            continue
+        parents.pop()
+        if elem.tag == _CRYSTAL_DETAILS_TAG:
+            batch.append(details_to_row(elem, extractor))
+            if row_done is not None:
+                row_done()
+            elem.clear()
+            if parents:
+                parents[-1].remove(elem)
+            if len(batch) == CRYSTAL_BATCH_ROWS:
+                yield from normalize_crystal_differences(batch)
+                batch = RowTable(extractor.columns)
+    yield from normalize_crystal_differences(batch)
+
+def xml_to_excel_streaming(xml_path, output_excel_path, job, extractor=DEFAULT_EXTRACTOR, collect=()):
+    # Rows go straight into the output writer, so memory stays flat regardless of report size; collect
+    # lists more sinks for every row (the row cache writer, which spools to disk, or a RowTable)
+    def rows():
+        job.rows_begin()
+        for row_count, row_data in enumerate(iter_details_rows(xml_path, extractor, job.row_done), start=1):
+            for sink in collect:
+                sink.append(row_data)
+            yield row_data
+            if row_count % 100 == 0:
+                job.progress(row_count)  # Total unknown while streaming
+
+    # Parsing happens as the writer pulls rows, so it is timed as part of "xlsx write"
+    row_count = write_output(output_excel_path, extractor.columns, rows(), span=job.span)
+    if not row_count:
+        os.remove(output_excel_path)
+    return row_count
+
+def xml_to_excel(xml_path, output_dir, job, streaming=True, fields=None, base_name="output_from_xml", cache=None,
+                 db=None, sort=False, refs=None, fmt="xlsx"):
     if not os.path.exists(xml_path):
         logging.error(f"XML file not found: {xml_path}")
         return None
+    if not output_format_ok(fmt):
+        return None
 
     try:
+        # Generate unique output filename
+        output_excel_path = os.path.join(output_dir, f"{base_name}.{fmt}")
+        counter = 1
+        while os.path.exists(output_excel_path):
+            output_excel_path = os.path.join(output_dir, f"{base_name}_{counter}.{fmt}")
+            counter += 1
+
+        # Additional Crystal Reports field names (or aliases) on top of CRYSTAL_FIELDS
+        extractor = CrystalFieldExtractor(fields) if fields else DEFAULT_EXTRACTOR
+
+        with job.span("cache"):
+            cache_key, table_data = cache_lookup(cache, xml_path, f"{XML_ROWS_VERSION} {extractor.version}")
+        if table_data:
+            with job.span("database"):
+                db_store(db, xml_path, table_data)
+            table_data = order_rows(table_data, sort, refs)
+            write_output(output_excel_path, extractor.columns, table_data, span=job.span)
+            logging.info(f"XML data exported to {output_excel_path} (Processed {len(table_data)} rows) with table and frozen headers")
+            job.update()
+            return output_excel_path
+
+        # Sorting and range selection need every row first, so they take the in-memory path
+        if streaming and not sort and refs is None:
+            # The cache entry is spooled to disk as rows stream; only the record database needs them in memory
+            spool = cache_writer(cache, cache_key, extractor.columns)
+            collected = RowTable(extractor.columns) if db is not None else None
+            try:
+                row_count = xml_to_excel_streaming(xml_path, output_excel_path, job, extractor,
+                                                   [sink for sink in (spool, collected) if sink is not None])
+                if not row_count:
+                    logging.error("No data extracted from XML.")
+                    return None
+                with job.span("cache"):
+                    cache_commit(spool)
+            finally:
+                if spool is not None:
+                    spool.close()
+            with job.span("database"):
+                db_store(db, xml_path, collected)
+            logging.info(f"XML data exported to {output_excel_path} (Processed {row_count} rows) with table and frozen headers")
+            job.update()
+            return output_excel_path
+
         # Parse the XML file
-        tree = ET.parse(xml_path)
+        with job.span("parse"):
+            tree = ET.parse(xml_path)
         xml_root = tree.getroot()
 
-        # Define namespaces
-        namespaces = {'ns': 'urn:crystal-reports:schemas:report-detail'}
-
         # Extract relevant data
-        table_data = []
-        for details in xml_root.findall('.//ns:Details', namespaces):
-            row_data = []
-            annex_ref = details.find('.//ns:Field[@Name="AnnexReferenceNumber1"]/ns:Value', namespaces)
-            standard = details.find('.//ns:Field[@Name="SARP11"]/ns:Value', namespaces)
-            state_ref = details.find('.//ns:Field[@Name="StateReference1"]/ns:Value', namespaces)
-            difference = details.find('.//ns:Field[@Name="StateDifferenceLevel1"]/ns:Value', namespaces)
-            state_difference = details.find('.//ns:Field[@Name="StateDifference1"]/ns:Value', namespaces)
-            state_comments = details.find('.//ns:Field[@Name="StateComments1"]/ns:Value', namespaces)
-
-            # Check if elements are found and extract text
-            annex_ref_text = annex_ref.text if annex_ref is not None else "Not Found"
-            standard_text = standard.text if standard is not None else "Not Found"
-            state_ref_text = state_ref.text if state_ref is not None else "Not Found"
-            difference_text = difference.text if difference is not None else "Not Found"
-            if difference_text.lower().startswith("less p"):
-                difference_text = "Less protective or Partially Implemented or Not Implemented"
-            elif difference_text.lower().startswith("more e"):
-                difference_text = "More Exacting or Exceeds"
-            elif difference_text.lower().startswith("difference"):
-                difference_text = "Difference in character or Other means of compliance"
-            state_difference_text = state_difference.text if state_difference is not None else "Not Found"
-            state_comments_text = state_comments.text if state_comments is not None else "Not Found"
-
-            # Log the extracted data
-            logging.debug(f"Annex Ref: {annex_ref_text}, Standard: {standard_text}, State Ref: {state_ref_text}, "
-                          f"Difference: {difference_text}, Details: {state_difference_text}, Remark: {state_comments_text}")
-
-            row_data.append(annex_ref_text)
-            row_data.append(standard_text)
-            row_data.append(difference_text)
-            row_data.append(state_ref_text)
-            row_data.append(state_difference_text)
-            row_data.append(state_comments_text)
-
-            table_data.append(row_data)
+        table_data = RowTable(extractor.columns)
+        all_details = xml_root.findall('.//ns:Details', CRYSTAL_NAMESPACES)
+        with job.span("extract"):
+            job.rows_begin()
+            for row_count, details in enumerate(all_details, start=1):
+                table_data.append(details_to_row(details, extractor))
+                job.row_done()
+                job.progress(row_count, len(all_details))
+            normalize_crystal_differences(table_data)
 
         if not table_data:
             logging.error("No data extracted from XML.")
             return None
+        cache_store(cache, cache_key, extractor.columns, table_data)
+        with job.span("database"):
+            db_store(db, xml_path, table_data)
+        table_data = order_rows(table_data, sort, refs)
 
-        # Define column headers for Excel
-        headers = [
-            "Annex Ref.",
-            "Standard",
-            "Difference",
-            "State Ref.",
-            "Details",
-            "Remark"
-        ]
-
-        # Create DataFrame
-        df = pd.DataFrame(table_data, columns=headers)
-        logging.debug(f"DataFrame created with data:\n{df}")
-
-        # Generate unique output filename
-        base_name = "output_from_xml.xlsx"
-        output_excel_path = os.path.join(output_dir, base_name)
-        counter = 1
-        while os.path.exists(output_excel_path):
-            output_excel_path = os.path.join(output_dir, f"output_from_xml_{counter}.xlsx")
-            counter += 1
+        # Export to Excel with the table and frozen headers in a single write
+        write_output(output_excel_path, extractor.columns, table_data, span=job.span)
+        logging.info(f"XML data exported to {output_excel_path} (Processed {len(table_data)} rows) with table and frozen headers")
+        job.update()
+        return output_excel_path
 
-        # Export to Excel initially
-        df.to_excel(output_excel_path, index=False, engine='openpyxl')
+    except Exception as e:
+        logging.error(f"An error occurred in xml_to_excel: {e}")
+        return None
 
-        # Load the workbook to modify it
-        wb = load_workbook(output_excel_path)
-        ws = wb.active
 
-        # Define the table range (A1 to F<rows+1> for 6 columns)
-        num_rows = len(table_data) + 1  # +1 for header
-        table_range = f"A1:F{num_rows}"
+def ingest_report(xml_path, store_dir, job, state=None, fields=None):
+    # Parse one Crystal Reports export into the consolidated store, every row tagged with its state and report
+    import pandas as pd
+    from report_store import ReportStore
 
-        # Create an Excel table
-        tab = Table(displayName="FormDataTable", ref=table_range)
-        style = TableStyleInfo(name="TableStyleMedium2", showFirstColumn=False,
-                               showLastColumn=False, showRowStripes=True, showColumnStripes=False)
-        tab.tableStyleInfo = style
-        ws.add_table(tab)
+    if not os.path.exists(xml_path):
+        logging.error(f"XML file not found: {xml_path}")
+        return None
 
-        # Freeze the first row (headers)
-        ws.freeze_panes = ws['A2']  # Freezes row 1
+    report = os.path.basename(xml_path)
+    state = state or os.path.splitext(report)[0]
+    extractor = CrystalFieldExtractor(fields) if fields else DEFAULT_EXTRACTOR
+    try:
+        table_data = RowTable(extractor.columns)
+        with job.span("parse"):
+            job.rows_begin()
+            for row_count, row_data in enumerate(iter_details_rows(xml_path, extractor, job.row_done), start=1):
+                table_data.append(row_data)
+                if row_count % 100 == 0:
+                    job.progress(row_count)
+        if not table_data:
+            logging.error("No data extracted from XML.")
+            return None
 
-        # Save the modified workbook
-        wb.save(output_excel_path)
-        logging.info(f"XML data exported to {output_excel_path} (Processed {len(table_data)} rows) with table and frozen headers")
-        root.update()
-        return output_excel_path
+        with job.span("dataframe build"):
+            df = pd.DataFrame(dict(zip(extractor.columns, table_data.data)), columns=extractor.columns)
+            df.insert(0, "Report", report)
+            df.insert(0, "State", state)
+        with job.span("save"):
+            part_path = ReportStore(store_dir).write_part(state, report, df)
+        logging.info(f"Ingested {len(df)} rows of {state} into {part_path}")
+        job.update()
+        return part_path
 
     except Exception as e:
-        logging.error(f"An error occurred in xml_to_excel: {e}")
+        logging.error(f"An error occurred in ingest_report: {e}")
         return None
 
+# Columns copied from the sample row on a match (by position); column 2 ("Standard") is preserved
+MERGE_COLUMNS = (0, 2, 3, 4, 5)
+FUZZY_MERGE_COLUMNS = (2, 3, 4, 5)  # A fuzzy match keeps the fillable row's own Annex Ref.
+FUZZY_THRESHOLD = 0.9  # Minimum Standard text similarity (0..1) of a fuzzy match, when they are enabled
+
+def normalize_ref_keys(refs):
+    # Annex Ref. join key: the canonical form of the first column, so "4.2.1." and " 04.2.1" match 4.2.1
+    return refs.map(canonical_ref, na_action='ignore')
+
+def fuzzy_match_rows(sample_df, fillable_df, rows, claimed, threshold):
+    # Best sample row by Standard text (second column) for each of the given fillable rows. Sample rows
+    # claimed by a key match are not indexed at all, and each sample row is used by one fuzzy match at most
+    import numpy as np
+    from fuzzy_match import NgramIndex
+
+    candidates = np.setdiff1d(np.arange(len(sample_df)), claimed)
+    index = NgramIndex(sample_df.iloc[candidates, 1].tolist())
+    used = set()
+    standards = fillable_df.iloc[:, 1].to_numpy(dtype=object)
+    matches = []
+    for row in rows:
+        candidate, score = index.best_match(standards[row], used)
+        if candidate is not None and score >= threshold:
+            used.add(candidate)
+            matches.append((row, int(candidates[candidate]), score))
+    return matches
+
+def merge_on_annex_ref(sample_df, fillable_df, fuzzy_threshold=None):
+    """Fill fillable_df from sample_df by matching Annex Ref. (first column) in a single key join.
+
+    Duplicate sample keys resolve to the last occurrence, rows with an empty Annex Ref. are left as is.
+    With a fuzzy_threshold (off by default), rows whose Annex Ref. has no match fall back to the sample
+    row with the most similar Standard text, if it is at least fuzzy_threshold similar; of equally similar
+    sample rows the first one wins.
+    Returns the updated DataFrame and a report of matched, fuzzy matched, unmatched and duplicate keys.
+    """
+    import numpy as np
+    import pandas as pd
+
+    sample_keys = normalize_ref_keys(sample_df.iloc[:, 0])
+    last_occurrence = ~sample_keys.duplicated(keep='last').to_numpy() & sample_keys.notna().to_numpy()
+    sample_unique = sample_df.iloc[last_occurrence]
+    sample_index = pd.Index(sample_keys[last_occurrence])
+
+    fillable_keys = normalize_ref_keys(fillable_df.iloc[:, 0])
+    has_ref = fillable_keys.notna().to_numpy()
+    positions = sample_index.get_indexer(fillable_keys)
+    matched = has_ref & (positions >= 0)
+
+    fuzzy = []
+    if fuzzy_threshold is not None and (has_ref & ~matched).any():
+        claimed = np.flatnonzero(last_occurrence)[positions[matched]]  # Sample rows (in sample_df) already used
+        fuzzy = fuzzy_match_rows(sample_df, fillable_df, np.flatnonzero(has_ref & ~matched), claimed, fuzzy_threshold)
+
+    merged = fillable_df.copy()
+    if matched.any() or fuzzy:
+        fuzzy_rows = np.array([row for row, _, _ in fuzzy], dtype=int)
+        fuzzy_sources = np.array([sample_row for _, sample_row, _ in fuzzy], dtype=int)
+        for col in MERGE_COLUMNS:
+            values = merged.iloc[:, col].to_numpy(dtype=object, copy=True)
+            values[matched] = sample_unique.iloc[:, col].to_numpy(dtype=object)[positions[matched]]
+            if col in FUZZY_MERGE_COLUMNS:
+                values[fuzzy_rows] = sample_df.iloc[:, col].to_numpy(dtype=object)[fuzzy_sources]
+            merged.isetitem(col, values)
+    unmatched = has_ref & ~matched
+    unmatched[[row for row, _, _ in fuzzy]] = False
+
+    report = {
+        'sample_keys': len(sample_index),
+        'matched': int(matched.sum()),
+        'processed': int(has_ref.sum()),
+        'skipped': int((~has_ref).sum()),
+        'fuzzy': [{'row': row + 2,  # Excel row, after the header
+                   'fillable_ref': fillable_df.iat[row, 0], 'sample_ref': sample_df.iat[sample_row, 0],
+                   'score': score,
+                   'fillable_standard': fillable_df.iat[row, 1], 'sample_standard': sample_df.iat[sample_row, 1]}
+                  for row, sample_row, score in fuzzy],
+        'unmatched': fillable_keys[unmatched].tolist(),
+        'duplicate_sample_keys': sample_keys[sample_keys.notna() & sample_keys.duplicated()].unique().tolist(),
+        'duplicate_fillable_keys': fillable_keys[has_ref & fillable_keys.duplicated(keep=False).to_numpy()].unique().tolist(),
+    }
+    return merged, report
+
+FUZZY_REPORT_HEADERS = ["Row", "Fillable Annex Ref.", "Sample Annex Ref.", "Similarity", "Fillable Standard",
+                        "Sample Standard"]
 
-def excel_on_excel(sample_excel_path, fillable_excel_path, root):
+def write_fuzzy_report(output_excel_path, fuzzy, span=null_span):
+    # Fuzzy matches next to the output, for review: output_fuzzy_matches.xlsx
+    report_path = os.path.splitext(output_excel_path)[0] + "_fuzzy_matches.xlsx"
+    rows = [[match['row'], match['fillable_ref'], match['sample_ref'], round(match['score'], 3),
+             match['fillable_standard'], match['sample_standard']] for match in fuzzy]
+    write_excel_table(report_path, FUZZY_REPORT_HEADERS, rows, span=span)
+    return report_path
+
+def excel_on_excel(sample_excel_path, fillable_excel_path, job, db=None, fuzzy_threshold=None, fmt="xlsx"):
+    if not output_format_ok(fmt):
+        return None
     if not os.path.exists(sample_excel_path):
         logging.error(f"Sample Excel file not found: {sample_excel_path}")
         return None
@@ -729,111 +1459,344 @@ def excel_on_excel(sample_excel_path, fillable_excel_path, root):
 
     # Read sample Excel data
     try:
-        sample_df = pd.read_excel(sample_excel_path, dtype={0: str})
+        with job.span("dataframe build"):
+            sample_df = read_table(sample_excel_path, dtype={0: str}, count=len(EXCEL_HEADERS))  # Only the merged columns
         logging.info(f"Sample Excel loaded: {len(sample_df)} rows, columns: {list(sample_df.columns)}")
         logging.debug(f"Sample first column values: {sample_df.iloc[:, 0].tolist()}")
-        root.update()
+        job.update()
     except Exception as e:
         logging.error(f"Failed to read sample Excel: {e}")
         return None
 
     # Read fillable Excel data
     try:
-        fillable_df = pd.read_excel(fillable_excel_path, dtype={0: str})
+        with job.span("dataframe build"):
+            fillable_df = read_table(fillable_excel_path, dtype={0: str})
         logging.info(f"Fillable Excel loaded: {len(fillable_df)} rows, columns: {list(fillable_df.columns)}")
         logging.debug(f"Fillable first column values: {fillable_df.iloc[:, 0].tolist()}")
-        root.update()
+        job.update()
     except Exception as e:
         logging.error(f"Failed to read fillable Excel: {e}")
         return None
 
-    # Create sample dictionary
+    # Join on the normalized Annex Ref. key in one pass
     try:
-        sample_dict = {str(row.iloc[0]).strip(): row for index, row in sample_df.iterrows()}
-        logging.info(f"Sample dictionary created with {len(sample_dict)} unique keys")
-        logging.debug(f"Sample dictionary keys: {list(sample_dict.keys())}")
+        with job.span("merge"):
+            fillable_df, report = merge_on_annex_ref(sample_df, fillable_df, fuzzy_threshold)
     except Exception as e:
-        logging.error(f"Failed to create sample dictionary: {e}")
+        logging.error(f"Failed to merge Excel data: {e}")
         return None
-
-    # Process fillable_df
-    processed_rows = 0
-    for index, row in fillable_df.iterrows():
-        try:
-            logging.debug(f"Processing row {index + 2} (index {index})")
-            # Validate first column
-            if pd.isna(row.iloc[0]):
-                logging.warning(f"Row {index + 2}: First column is NaN, skipping update")
-                continue
-
-            fillable_ref = str(row.iloc[0]).strip()
-            logging.debug(f"Row {index + 2}: fillable_ref = {repr(fillable_ref)}")
-
-            # Check DataFrame state
-            logging.debug(f"Row {index + 2}: fillable_df shape before update: {fillable_df.shape}")
-
-            sample_row = sample_dict.get(fillable_ref)
-            if sample_row is not None:
-                # Log sample row data
-                logging.debug(f"Row {index + 2}: Found match, sample_row = {sample_row.tolist()}")
-                # Update specific columns, preserving column 2 ("Standard") from fillable_df
-                fillable_df.iloc[index, 0] = sample_row.iloc[0]  # Annex Ref.
-                fillable_df.iloc[index, 2] = sample_row.iloc[2]  # Difference
-                fillable_df.iloc[index, 3] = sample_row.iloc[3]  # State Ref.
-                fillable_df.iloc[index, 4] = sample_row.iloc[4]  # Details
-                fillable_df.iloc[index, 5] = sample_row.iloc[5]  # Remark
-                logging.info(f"Row {index + 2}: Updated columns 1,3,4,5,6 for fillable_ref = {fillable_ref}, preserved Standard = {repr(fillable_df.iloc[index, 1])}")
-            else:
-                logging.debug(f"Row {index + 2}: No match found for fillable_ref = {fillable_ref}")
-
-            # Increment counter
-            processed_rows += 1
-            logging.debug(f"Row {index + 2}: fillable_df shape after update: {fillable_df.shape}")
-
-            root.update()
-        except Exception as e:
-            logging.error(f"Error processing row {index + 2}: {e}")
-            logging.debug(f"Row {index + 2}: row data = {row.tolist()}")
-            raise  # Re-raise to stop and inspect
-
-    logging.info(f"Processed {processed_rows} rows out of {len(fillable_df)}")
+    job.update()
+
+    logging.info(f"Sample keys: {report['sample_keys']} unique, {len(report['duplicate_sample_keys'])} duplicated (last row wins)")
+    logging.info(f"Matched {report['matched']} rows, updated columns 1,3,4,5,6 and preserved Standard; "
+                 f"{len(report['unmatched'])} rows without a match, {report['skipped']} rows with an empty Annex Ref.")
+    if report['duplicate_sample_keys']:
+        logging.warning(f"Duplicate Annex Ref. in sample: {report['duplicate_sample_keys']}")
+    if report['duplicate_fillable_keys']:
+        logging.warning(f"Duplicate Annex Ref. in fillable: {report['duplicate_fillable_keys']}")
+    if report['fuzzy']:
+        logging.warning(f"{len(report['fuzzy'])} rows matched by Standard text instead of Annex Ref. "
+                        f"(similarity >= {fuzzy_threshold}), please review them")
+        for match in report['fuzzy']:
+            logging.debug(f"Row {match['row']}: {match['fillable_ref']} -> sample {match['sample_ref']} ({match['score']:.2f})")
+    if report['unmatched']:
+        logging.debug(f"No match found for: {report['unmatched']}")
+    logging.info(f"Processed {report['processed']} rows out of {len(fillable_df)}")
 
     # Generate output filename
     output_dir = os.path.dirname(fillable_excel_path)
-    base_name = os.path.splitext(os.path.basename(fillable_excel_path))[0] + "_filled.xlsx"
+    base_name = os.path.splitext(os.path.basename(fillable_excel_path))[0] + "_filled." + fmt
     output_excel_path = os.path.join(output_dir, base_name)
     counter = 1
     while os.path.exists(output_excel_path):
-        output_excel_path = os.path.join(output_dir, f"{os.path.splitext(os.path.basename(fillable_excel_path))[0]}_filled_{counter}.xlsx")
+        output_excel_path = os.path.join(output_dir, f"{os.path.splitext(os.path.basename(fillable_excel_path))[0]}_filled_{counter}.{fmt}")
         counter += 1
 
     # Export to Excel
     try:
-        fillable_df.to_excel(output_excel_path, index=False, engine='openpyxl')
-        logging.debug(f"Excel saved to {output_excel_path}")
-
-        # Load workbook to add table
-        wb = load_workbook(output_excel_path)
-        ws = wb.active
-        num_rows = len(fillable_df) + 1
-        num_cols = len(fillable_df.columns)
-        table_range = f"A1:{chr(64 + num_cols)}{num_rows}"
-        tab = Table(displayName="FormDataTable", ref=table_range)
-        style = TableStyleInfo(name="TableStyleMedium2", showFirstColumn=False,
-                               showLastColumn=False, showRowStripes=True, showColumnStripes=False)
-        tab.tableStyleInfo = style
-        ws.add_table(tab)
-        ws.freeze_panes = ws['A2']
-        wb.save(output_excel_path)
+        write_output(output_excel_path, fillable_df.columns, dataframe_rows(fillable_df), span=job.span)
         logging.info(f"Excel saved: {output_excel_path} ({len(fillable_df)} rows)")
-        root.update()
+        if report['fuzzy']:
+            logging.info(f"Fuzzy matches for review saved: {write_fuzzy_report(output_excel_path, report['fuzzy'], job.span)}")
+        with job.span("database"):
+            # Stored under the fillable input, so a rerun replaces its rows instead of adding each new output
+            db_store(db, fillable_excel_path, list(dataframe_rows(fillable_df)))
+        job.update()
         return output_excel_path
     except Exception as e:
         logging.error(f"Failed to save Excel: {e}")
         return None
 
 
-def gui():
+# Command-line batch mode: run the conversions over many files in a process pool
+CLI_INPUT_EXTENSIONS = {
+    "form-to-excel": (".docx",),
+    "excel-to-form": INPUT_EXTENSIONS,
+    "xml-to-excel": (".xml",),
+    "excel-on-excel": INPUT_EXTENSIONS,
+    "ingest-xml": (".xml",),
+}
+
+# Names of the files excel-on-excel writes (x_filled.xlsx, x_filled_2.csv, x_filled_fuzzy_matches.xlsx)
+EXCEL_ON_EXCEL_OUTPUT = re.compile(r".*_filled(_\d+)?(_fuzzy_matches)?\.[^.]+$", re.IGNORECASE)
+
+def expand_inputs(patterns, extensions, exclude=(), skip_names=None):
+    # Files, directories (their matching files) and glob patterns, in order and without duplicates.
+    # Directories and patterns leave out the paths in exclude and the names matching skip_names (the
+    # tool's own outputs), so rerunning over the same folder does not take them as inputs; files named
+    # explicitly are always kept
+    excluded = {os.path.abspath(path) for path in exclude}
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = sorted(os.path.join(pattern, name) for name in os.listdir(pattern)
+                             if name.lower().endswith(extensions))
+        elif glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern))
+        else:
+            matches = [pattern]
+        for path in matches:
+            # Skip Office lock files (~$name.docx) left next to open documents
+            if os.path.basename(path).startswith("~$") or path in paths:
+                continue
+            if path != pattern and (os.path.abspath(path) in excluded or
+                                    (skip_names and skip_names.match(os.path.basename(path)))):
+                continue
+            paths.append(path)
+    return paths
+
+def init_cli_logging(level):
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(CustomFormatter())
+    logging.getLogger().handlers = [handler]
+    logging.getLogger().setLevel(level)
+
+_cli_session = None
+
+def cli_session():
+    # One Word instance per worker process, reused for every form that process converts
+    global _cli_session
+    if _cli_session is None:
+        _cli_session = DocumentSession()
+        multiprocessing.util.Finalize(_cli_session, _cli_session.quit, exitpriority=10)
+    return _cli_session
+
+def run_cli_job(command, input_path, options):
+    # Runs one conversion; top-level so it can be sent to worker processes
+    start = time.perf_counter()
+    job = Job()
+    output_dir = options.get("output_dir") or os.path.dirname(os.path.abspath(input_path))
+    session = cli_session() if options.get("engine") == "word" else None
+    cache = RowCache() if options.get("cache") else None
+    db = RecordDatabase(options["db"]) if options.get("db") else None
+    try:
+        if command == "form-to-excel":
+            output = export_table_to_excel(input_path, output_dir, job, engine=options["engine"], session=session,
+                                           cache=cache, db=db, sort=options.get("sort"), refs=options.get("refs"),
+                                           fmt=options.get("format") or "xlsx")
+        elif command == "excel-to-form":
+            form_path = options["forms"].get(input_path)
+            if form_path is None:
+                logging.error(f"No EFOD form found for {input_path}")
+                output = None
+            else:
+                output = fill_form_from_excel(input_path, form_path, job, engine=options["engine"], session=session)
+        elif command == "xml-to-excel":
+            base_name = os.path.splitext(os.path.basename(input_path))[0]
+            output = xml_to_excel(input_path, output_dir, job, base_name=base_name, cache=cache, db=db,
+                                  sort=options.get("sort"), refs=options.get("refs"), fmt=options.get("format") or "xlsx")
+        elif command == "ingest-xml":
+            output = ingest_report(input_path, options["store"], job, state=options.get("state"))
+        else:
+            output = excel_on_excel(options["sample"], input_path, job, db=db, fuzzy_threshold=options.get("fuzzy_threshold"),
+                                    fmt=options.get("format") or "xlsx")
+    except Exception as e:
+        logging.error(f"An error occurred while processing {input_path}: {e}")
+        output = None
+    finally:
+        if db is not None:
+            db.close()
+    job.metrics.finish()
+    return output, time.perf_counter() - start, job.metrics.as_dict()
+
+def pair_forms(excel_paths, forms):
+    # Each Excel file is paired with the form of the same name (name.xlsx -> name.docx)
+    if os.path.isdir(forms):
+        pairs = {}
+        for path in excel_paths:
+            form_path = os.path.join(forms, os.path.splitext(os.path.basename(path))[0] + ".docx")
+            if os.path.exists(form_path):
+                pairs[path] = form_path
+        return pairs
+    if len(excel_paths) != 1:
+        raise ValueError("--forms must be a directory when more than one Excel file is given")
+    return {excel_paths[0]: forms}
+
+def run_query(db_path, annex_ref, states=None, difference=None):
+    # annex_ref is one reference, a chapter or section ("3.*") or a range ("3.1-3.4")
+    if not os.path.exists(db_path):
+        print(f"Database not found: {db_path}", file=sys.stderr)
+        return 1
+    start = time.perf_counter()
+    if "-" in annex_ref or annex_ref.endswith("*"):
+        try:
+            first, last = parse_ref_range(annex_ref.rstrip("*"))
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 2
+    else:
+        first, last = annex_ref, None
+    with RecordDatabase(db_path) as db:
+        rows = db.query(first, states, difference, last=last)
+    elapsed = time.perf_counter() - start
+    for row in rows:
+        print(f"{row['annex_ref'] or '':<12} {row['state'] or '':<20} {row['difference'] or '-':<40} {row['state_ref'] or '':<15} {row['details'] or ''}")
+    print(f"{len(rows)} rows for {annex_ref} in {elapsed * 1000:.1f} ms")
+    return 0
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(prog="EFOD-Helper", description="Batch conversions without the GUI.")
+    parser.add_argument("-j", "--workers", type=int, default=min(4, os.cpu_count() or 1),
+                        help="number of worker processes (default: %(default)s)")
+    parser.add_argument("-v", "--verbose", action="count", default=0, help="log INFO (-v) or DEBUG (-vv) to stderr")
+    parser.add_argument("--metrics", action="store_true", help="print per-stage timings and row latency of every file")
+    parser.add_argument("--metrics-json", metavar="PATH", help="write per-stage timings of every file to a JSON file")
+    parser.add_argument("--db", metavar="PATH", help="also store the converted rows in this SQLite database")
+    parser.add_argument("--format", choices=available_formats(), default="xlsx",
+                        help="output table format of form-to-excel, xml-to-excel and excel-on-excel (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    form_to_excel = commands.add_parser("form-to-excel", help="EFOD Word forms → Excel")
+    form_to_excel.add_argument("inputs", nargs="+", help=".docx files, directories or glob patterns")
+    form_to_excel.add_argument("-o", "--output-dir", help="output directory (default: next to each input)")
+    form_to_excel.add_argument("--engine", choices=["word", "ooxml"], default="word" if WORD_AVAILABLE else "ooxml")
+    form_to_excel.add_argument("--no-cache", action="store_true", help="always parse, ignoring the row cache")
+    form_to_excel.add_argument("--sort", action="store_true", help="sort rows by Annex Ref. (2.9 before 2.10)")
+    form_to_excel.add_argument("--refs", metavar="RANGE", help="only these Annex Refs., e.g. 3 (all of chapter 3) or 3.1-3.4")
+
+    excel_to_form = commands.add_parser("excel-to-form", help="Excel → EFOD Word forms")
+    excel_to_form.add_argument("inputs", nargs="+", help=".xlsx, .csv, .parquet or .feather files, directories or glob patterns")
+    excel_to_form.add_argument("--forms", required=True,
+                               help="directory of forms matched by name (name.xlsx → name.docx), or a single .docx")
+    excel_to_form.add_argument("--engine", choices=["word", "ooxml"], default="word" if WORD_AVAILABLE else "ooxml")
+
+    xml_to_excel_parser = commands.add_parser("xml-to-excel", help="SAP Crystal Reports XML → Excel")
+    xml_to_excel_parser.add_argument("inputs", nargs="+", help=".xml files, directories or glob patterns")
+    xml_to_excel_parser.add_argument("-o", "--output-dir", help="output directory (default: next to each input)")
+    xml_to_excel_parser.add_argument("--no-cache", action="store_true", help="always parse, ignoring the row cache")
+    xml_to_excel_parser.add_argument("--sort", action="store_true", help="sort rows by Annex Ref. (2.9 before 2.10)")
+    xml_to_excel_parser.add_argument("--refs", metavar="RANGE", help="only these Annex Refs., e.g. 3 (all of chapter 3) or 3.1-3.4")
+
+    excel_on_excel_parser = commands.add_parser("excel-on-excel", help="fill Excel files from a sample Excel file")
+    excel_on_excel_parser.add_argument("inputs", nargs="+", help="fillable .xlsx, .csv, .parquet or .feather files, "
+                                                                 "directories or glob patterns")
+    excel_on_excel_parser.add_argument("--sample", required=True, help="sample table file to read from")
+    excel_on_excel_parser.add_argument("--fuzzy", action="store_true",
+                                       help="also match rows without a matching Annex Ref. by their Standard text; "
+                                            "the matches are listed in a _fuzzy_matches file for review")
+    excel_on_excel_parser.add_argument("--fuzzy-threshold", type=float, default=FUZZY_THRESHOLD,
+                                       help="minimum Standard text similarity of a --fuzzy match, 0..1 (default: %(default)s)")
+
+    ingest_parser = commands.add_parser("ingest-xml", help="SAP Crystal Reports XML of many states → one consolidated store")
+    ingest_parser.add_argument("inputs", nargs="+", help=".xml files, directories or glob patterns")
+    ingest_parser.add_argument("--store", required=True, help="store directory (created if missing)")
+    ingest_parser.add_argument("--state", help="state of the rows (default: each report's file name)")
+
+    query_parser = commands.add_parser("query", help="look up an Annex Ref. across every stored form and report")
+    query_parser.add_argument("annex_ref", help="Annex Ref. to look up: 4.2.1, 3.* (all of chapter 3) or 3.1-3.4")
+    query_parser.add_argument("--state", action="append", help="only these states (repeatable)")
+    query_parser.add_argument("--difference", help="only rows with this Difference")
+
+    args = parser.parse_args(argv)
+    log_level = {0: logging.WARNING, 1: logging.INFO}.get(args.verbose, logging.DEBUG)
+    init_cli_logging(log_level)
+
+    if args.command == "query":
+        if not args.db:
+            parser.error("query needs --db")
+        return run_query(args.db, args.annex_ref, args.state, args.difference)
+
+    if args.command == "excel-on-excel":
+        # The sample and earlier outputs in an input folder are not fillable inputs
+        inputs = expand_inputs(args.inputs, CLI_INPUT_EXTENSIONS[args.command], exclude=[args.sample],
+                               skip_names=EXCEL_ON_EXCEL_OUTPUT)
+    else:
+        inputs = expand_inputs(args.inputs, CLI_INPUT_EXTENSIONS[args.command])
+    if not inputs:
+        parser.error("no input files matched")
+
+    options = {
+        "output_dir": getattr(args, "output_dir", None),
+        "engine": getattr(args, "engine", None),
+        "sample": getattr(args, "sample", None),
+        "forms": {},
+        "cache": not getattr(args, "no_cache", True),
+        "store": getattr(args, "store", None),
+        "state": getattr(args, "state", None),
+        "db": args.db,
+        "format": args.format,
+        "sort": getattr(args, "sort", False),
+        "fuzzy_threshold": args.fuzzy_threshold if getattr(args, "fuzzy", False) else None,
+        "refs": None,
+    }
+    if getattr(args, "fuzzy", False) and not 0 < args.fuzzy_threshold <= 1:
+        parser.error("--fuzzy-threshold must be above 0 and at most 1")
+    if getattr(args, "refs", None):
+        try:
+            options["refs"] = parse_ref_range(args.refs)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.command == "excel-to-form":
+        try:
+            options["forms"] = pair_forms(inputs, args.forms)
+        except ValueError as e:
+            parser.error(str(e))
+    if options["output_dir"]:
+        os.makedirs(options["output_dir"], exist_ok=True)
+
+    start = time.perf_counter()
+    workers = max(1, min(args.workers, len(inputs)))
+    if workers == 1:
+        results = [run_cli_job(args.command, inputs[0], options)]
+        first_done = time.perf_counter()
+        results += [run_cli_job(args.command, path, options) for path in inputs[1:]]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_cli_logging, initargs=(log_level,)) as executor:
+            # Submitted all at once, reported in input order
+            futures = [executor.submit(run_cli_job, args.command, path, options) for path in inputs]
+            futures[0].result()
+            first_done = time.perf_counter()  # First file in input order
+            results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+
+    failed = 0
+    for path, (output, duration, metrics) in zip(inputs, results):
+        if output:
+            print(f"OK    {path} -> {output} ({duration:.2f} s)")
+        else:
+            failed += 1
+            print(f"FAIL  {path} ({duration:.2f} s)")
+        if args.metrics:
+            print(format_summary(metrics) + "\n")
+
+    if args.metrics:
+        print(startup_summary("Finished") + f", first file done {first_done - STARTED:.2f} s after start")
+
+    if args.metrics_json:
+        with open(args.metrics_json, "w", encoding="utf-8") as f:
+            json.dump({path: metrics for path, (_, _, metrics) in zip(inputs, results)}, f, indent=2)
+
+    total_mb = sum(os.path.getsize(path) for path in inputs if os.path.exists(path)) / 1e6
+    print(f"{len(inputs)} files: {len(inputs) - failed} succeeded, {failed} failed in {elapsed:.2f} s "
+          f"with {workers} worker(s) ({len(inputs) / elapsed:.2f} files/s, {total_mb / elapsed:.2f} MB/s)")
+    return 1 if failed else 0
+
+
+# Table inputs accepted by Excel → EFOD and Excel → Excel
+TABLE_FILETYPES = [("Excel files", "*.xlsx"), ("Other tables", "*.csv *.parquet *.feather")]
+
+def gui(background_warm_up=True):
     root = tk.Tk()
     root.title("EFOD Helper")
     root.state('zoomed')  # Maximize window on startup
@@ -843,56 +1806,152 @@ def gui():
     button_frame = tk.Frame(root, bg="#1C2526")
     button_frame.pack(pady=10, fill=tk.X)  # Fill horizontally
 
+    # Progress of the running conversion
+    status_frame = tk.Frame(root, bg="#1C2526")
+    status_frame.pack(padx=10, fill=tk.X)
+    progress_bar = ttk.Progressbar(status_frame, mode='determinate')
+    progress_bar.pack(side=tk.LEFT, fill=tk.X, expand=True)
+    progress_label = tk.Label(status_frame, text="", width=20, bg="#1C2526", fg="#E0E0E0", font=("Arial", 10))
+    progress_label.pack(side=tk.LEFT, padx=10)
+
     # Log display area (dynamic width)
     log_text = scrolledtext.ScrolledText(root, height=20, state='disabled',bg="#2E2E2E", fg="#E0E0E0",insertbackground="#E0E0E0", font=("Arial", 10))
     log_text.pack(pady=10, fill=tk.BOTH, expand=True)  # Fill both directions and expand
 
     # Set up logging to the text widget
-    setup_logging(log_text, root)
+    text_handler = setup_logging(log_text, root)
+
+    # Document engine: Word via COM, or the native OOXML reader (always used when Word is unavailable)
+    native_engine = tk.BooleanVar(value=not WORD_AVAILABLE)
+
+    def form_engine():
+        return "ooxml" if native_engine.get() else "word"
+
+    # Reuse rows parsed earlier from identical forms and reports
+    use_cache = tk.BooleanVar(value=True)
+
+    def row_cache():
+        return RowCache() if use_cache.get() else None
+
+    # Excel -> Excel: also match rows by Standard text when their Annex Ref. has no match (off by default)
+    use_fuzzy = tk.BooleanVar(value=False)
+
+    # Output table format; the non-xlsx formats are for further processing by other programs
+    output_format = tk.StringVar(value="xlsx")
+
+    # Conversions run on a single background worker; the Tk loop polls it for progress and the result
+    executor = ThreadPoolExecutor(max_workers=1)
+    events = queue.SimpleQueue()
+    running = {"job": None, "future": None, "success": None, "converted": False}
+
+    def start_job(success_message, func, *args, **kwargs):
+        job = GuiJob(events)
+        running["job"] = job
+        running["success"] = success_message
+        running["future"] = executor.submit(run_in_worker, func, *args, job=job, **kwargs)
+        for widget in job_widgets:
+            widget.configure(state='disabled')
+        btn_cancel.configure(state='normal')
+        progress_bar.configure(mode='determinate', value=0)
+        progress_label.configure(text="Working...")
+        root.after(100, poll_job)
+
+    def poll_job():
+        try:
+            while True:
+                event = events.get_nowait()
+                if event[0] == "progress":
+                    _, done, total = event
+                    if total:
+                        progress_bar.configure(mode='determinate', maximum=total, value=done)
+                        progress_label.configure(text=f"{done} / {total} rows")
+                    else:
+                        progress_bar.configure(mode='indeterminate')
+                        progress_bar.step(5)
+                        progress_label.configure(text=f"{done} rows")
+                elif event[0] == "error":
+                    messagebox.showerror(event[1], event[2], parent=root)
+        except queue.Empty:
+            pass
+
+        future = running["future"]
+        if not future.done():
+            root.after(100, poll_job)
+            return
+
+        for widget in job_widgets:
+            widget.configure(state='normal')
+        btn_cancel.configure(state='disabled')
+        metrics = running["job"].metrics
+        metrics.finish()
+        logging.info("Timing summary:\n" + metrics.summary())
+        if log_to_file.get():
+            try:
+                metrics.write_json(METRICS_FILE_PATH)  # Next to the log file, for tools that read the timings
+            except OSError as e:
+                logging.warning(f"Failed to write {METRICS_FILE_PATH}: {e}")
+        if not running["converted"]:
+            running["converted"] = True
+            logging.info(startup_summary("First conversion finished"))  # Time to first conversion
+        try:
+            output_file = future.result()
+        except JobCancelled:
+            logging.warning("Conversion cancelled")
+            progress_label.configure(text="Cancelled")
+            messagebox.showwarning("Cancelled", "Conversion cancelled.", parent=root)
+            return
+        except Exception as e:
+            logging.error(f"Unexpected error: {e}")
+            output_file = None
+        progress_label.configure(text="Done" if output_file else "Failed")
+        if output_file:
+            messagebox.showinfo("Success", running["success"] + output_file, parent=root)
+        else:
+            messagebox.showerror("Error", "Conversion failed. Check logs for details.", parent=root)
+
+    def cancel_job():
+        if running["job"] is not None:
+            running["job"].cancel()
+            btn_cancel.configure(state='disabled')
+            progress_label.configure(text="Cancelling...")
+
+    def on_close():
+        cancel_job()  # The worker stops at its next checkpoint and closes the document
+        executor.shutdown(wait=False)
+        root.destroy()
+
+    root.protocol("WM_DELETE_WINDOW", on_close)
 
     def form_to_excel():
         form_path = filedialog.askopenfilename(title="Select Word Form", filetypes=[("Word files", "*.docx")])
         if form_path:
             output_dir = os.path.dirname(form_path)
-            output_file = export_table_to_excel(form_path, output_dir, root)
-            if output_file:
-                messagebox.showinfo("Success", f"Conversion completed. Output saved as: {output_file}",parent=root)
-            else:
-                messagebox.showerror("Error", "Conversion failed. Check logs for details.", parent=root)
+            start_job("Conversion completed. Output saved as: ", export_table_to_excel, form_path, output_dir, engine=form_engine(),
+                      cache=row_cache(), fmt=output_format.get())
 
     def excel_to_form():
-        excel_path = filedialog.askopenfilename(title="Select Excel File", filetypes=[("Excel files", "*.xlsx")])
+        excel_path = filedialog.askopenfilename(title="Select Excel File", filetypes=TABLE_FILETYPES)
         if excel_path:
             form_path = filedialog.askopenfilename(title="Select EFOD Form to Edit", filetypes=[("Word files", "*.docx")])
             if form_path:
-                output_file = fill_form_from_excel(excel_path, form_path, root)
-                if output_file:
-                    messagebox.showinfo("Success", f"Form filled and saved as: {output_file}", parent=root)
-                else:
-                    messagebox.showerror("Error", "Conversion failed. Check logs for details.", parent=root)
+                start_job("Form filled and saved as: ", fill_form_from_excel, excel_path, form_path, engine=form_engine())
 
     def xml_to_excel_conversion():
         xml_path = filedialog.askopenfilename(title="Select XML File of a country, Exported from SAP Crystal Reports", filetypes=[("XML files", "*.xml")])
         if xml_path:
             output_dir = os.path.dirname(xml_path)
-            output_file = xml_to_excel(xml_path, output_dir, root)
-            if output_file:
-                messagebox.showinfo("Success", f"Conversion completed. Output saved as: {output_file}", parent=root)
-            else:
-                messagebox.showerror("Error", "Conversion failed. Check logs for details.", parent=root)
+            start_job("Conversion completed. Output saved as: ", xml_to_excel, xml_path, output_dir, cache=row_cache(),
+                      fmt=output_format.get())
 
     def excel_on_excel_conversion():
         sample_excel_path = filedialog.askopenfilename(title="Select Sample Excel File (to read from)",
-                                                       filetypes=[("Excel files", "*.xlsx")])
+                                                       filetypes=TABLE_FILETYPES)
         if sample_excel_path:
             fillable_excel_path = filedialog.askopenfilename(title="Select Fillable Excel File",
-                                                             filetypes=[("Excel files", "*.xlsx")])
+                                                             filetypes=TABLE_FILETYPES)
             if fillable_excel_path:
-                output_file = excel_on_excel(sample_excel_path, fillable_excel_path, root)
-                if output_file:
-                    messagebox.showinfo("Success", f"Excel filled and saved as: {output_file}", parent=root)
-                else:
-                    messagebox.showerror("Error", "Conversion failed. Check logs for details.", parent=root)
+                start_job("Excel filled and saved as: ", excel_on_excel, sample_excel_path, fillable_excel_path,
+                          fuzzy_threshold=FUZZY_THRESHOLD if use_fuzzy.get() else None, fmt=output_format.get())
 
     def show_help_dialog():
         # Create a custom dialog box
@@ -948,6 +2007,60 @@ def gui():
     btn_excel_on_excel.pack(side=tk.LEFT, padx=10)
     Tooltip(btn_excel_on_excel, "Fill one Excel file with data from another Excel file based on matching annex ref. number")
 
+    chk_native_engine = tk.Checkbutton(button_frame, text="Native engine (no Word)", variable=native_engine,
+                                       bg="#1C2526", fg="#E0E0E0", selectcolor="#37474F", activebackground="#1C2526",
+                                       activeforeground="#E0E0E0", font=("Arial", 10), bd=0)
+    chk_native_engine.pack(side=tk.LEFT, padx=10)
+    Tooltip(chk_native_engine, "Read and write EFOD forms directly from the .docx file instead of through Microsoft Word")
+
+    chk_cache = tk.Checkbutton(button_frame, text="Cache", variable=use_cache,
+                               bg="#1C2526", fg="#E0E0E0", selectcolor="#37474F", activebackground="#1C2526",
+                               activeforeground="#E0E0E0", font=("Arial", 10), bd=0)
+    chk_cache.pack(side=tk.LEFT, padx=10)
+    Tooltip(chk_cache, "Skip parsing forms and XML reports that were converted before (cached by file content)")
+
+    chk_fuzzy = tk.Checkbutton(button_frame, text="Fuzzy match", variable=use_fuzzy,
+                               bg="#1C2526", fg="#E0E0E0", selectcolor="#37474F", activebackground="#1C2526",
+                               activeforeground="#E0E0E0", font=("Arial", 10), bd=0)
+    chk_fuzzy.pack(side=tk.LEFT, padx=10)
+    Tooltip(chk_fuzzy, f"Excel → Excel: fill rows whose Annex Ref. has no match from the sample row with the most similar "
+                       f"Standard text (at least {FUZZY_THRESHOLD:.0%}), listed in a _fuzzy_matches file for review")
+
+    opt_output_format = tk.OptionMenu(button_frame, output_format, *available_formats())
+    opt_output_format.configure(bg="#37474F", fg="#E0E0E0", activebackground="#546E7A", activeforeground="#E0E0E0",
+                                font=("Arial", 10), bd=0, highlightthickness=0)
+    opt_output_format.pack(side=tk.LEFT, padx=10)
+    Tooltip(opt_output_format, "Output format: xlsx, or CSV/Parquet/Feather for further processing")
+
+    job_widgets = [btn_form_to_excel, btn_excel_to_form, btn_xml_to_excel, btn_excel_on_excel, chk_native_engine, chk_cache,
+                   chk_fuzzy, opt_output_format]
+
+    btn_cancel = tk.Button(status_frame, text="Cancel", command=cancel_job, width=10, state='disabled',
+                           bg="#B71C1C", fg="#E0E0E0", activebackground="#D32F2F", activeforeground="#E0E0E0",
+                           disabledforeground="#9E9E9E", font=("Arial", 10), bd=0, relief="flat")
+    btn_cancel.pack(side=tk.LEFT)
+    Tooltip(btn_cancel, "Stop the running conversion (the document is closed without saving)")
+
+    # Log level shown in the window, and the optional full-trace log file
+    log_level = tk.StringVar(value="DEBUG")
+
+    def apply_logging_options(*_):
+        set_file_logging(log_to_file.get())
+        set_log_level(text_handler, getattr(logging, log_level.get()))
+
+    opt_log_level = tk.OptionMenu(button_frame, log_level, "DEBUG", "INFO", "WARNING", "ERROR", command=apply_logging_options)
+    opt_log_level.configure(bg="#37474F", fg="#E0E0E0", activebackground="#546E7A", activeforeground="#E0E0E0",
+                            font=("Arial", 10), bd=0, highlightthickness=0)
+    opt_log_level.pack(side=tk.LEFT, padx=10)
+    Tooltip(opt_log_level, "Log level shown in this window")
+
+    log_to_file = tk.BooleanVar(value=False)
+    chk_log_file = tk.Checkbutton(button_frame, text="Log file", variable=log_to_file, command=apply_logging_options,
+                                  bg="#1C2526", fg="#E0E0E0", selectcolor="#37474F", activebackground="#1C2526",
+                                  activeforeground="#E0E0E0", font=("Arial", 10), bd=0)
+    chk_log_file.pack(side=tk.LEFT, padx=10)
+    Tooltip(chk_log_file, f"Write the full debug trace to {LOG_FILE_PATH} (rotating) and the timings of the last run to {METRICS_FILE_PATH}")
+
     # Help button
     btn_help = tk.Button(button_frame, text="?", command=show_help_dialog, width=5,bg="#0288D1", fg="#E0E0E0", activebackground="#03A9F4",font=("Arial", 10), bd=0, relief="flat")
     btn_help.pack(side=tk.LEFT, padx=10)
@@ -965,8 +2078,17 @@ def gui():
 
     update_tooltip_style()
 
+    def on_shown():
+        logging.info(startup_summary("Window shown"))  # Time to first window
+        if background_warm_up:
+            threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
+    root.after_idle(on_shown)
     root.mainloop()
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Worker processes of the frozen (PyInstaller) build
+    if len(sys.argv) > 1:
+        sys.exit(cli())
     gui()
\ No newline at end of file
@@ -0,0 +1,92 @@
+import json
+import time
+import contextlib
+
+# Lightweight instrumentation of one conversion run: named spans timed with perf_counter and the latency
+# of every processed row, reported as a summary table or JSON when the run ends.
+
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(sorted_values, p):
+    # Nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Metrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished = None
+        self.spans = {}  # name -> [count, seconds], in the order the stages first ran
+        self.row_latencies = []
+        self._last_row = None  # When the previous row was produced
+
+    @contextlib.contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds):
+        entry = self.spans.setdefault(name, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    def rows_begin(self):
+        # Start of a row loop: the first row's latency is measured from here
+        self._last_row = time.perf_counter()
+
+    def row_done(self):
+        # Called where each row is produced: its latency is the time since the previous row (or rows_begin)
+        now = time.perf_counter()
+        if self._last_row is not None:
+            self.row_latencies.append(now - self._last_row)
+        self._last_row = now
+
+    def finish(self):
+        if self.finished is None:
+            self.finished = time.perf_counter()
+
+    @property
+    def total_seconds(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    def as_dict(self):
+        latencies = sorted(self.row_latencies)
+        return {
+            "total_seconds": self.total_seconds,
+            "spans": {name: {"count": count, "seconds": seconds} for name, (count, seconds) in self.spans.items()},
+            "rows": len(latencies),
+            "row_latency_ms": {f"p{p}": percentile(latencies, p) * 1000 for p in PERCENTILES} if latencies else {},
+        }
+
+    def summary(self):
+        return format_summary(self.as_dict())
+
+    def write_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+
+def format_summary(data):
+    # Summary table of a run, from Metrics.as_dict() (which is what crosses process boundaries)
+    total = data["total_seconds"]
+    lines = [f"{'stage':<20}{'calls':>7}{'seconds':>10}{'share':>8}"]
+    for name, span in data["spans"].items():
+        share = span["seconds"] / total if total else 0
+        lines.append(f"{name:<20}{span['count']:>7}{span['seconds']:>10.3f}{share:>8.0%}")
+    lines.append(f"{'total':<20}{'':>7}{total:>10.3f}")
+    if data["rows"]:
+        latency = ", ".join(f"{name} {value:.3f} ms" for name, value in data["row_latency_ms"].items())
+        lines.append(f"{data['rows']} rows, latency per row: {latency}")
+    return "\n".join(lines)
+
+
+def null_span(name):
+    # Stand-in for Metrics.span where no run is being measured
+    return contextlib.nullcontext()
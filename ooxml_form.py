@@ -0,0 +1,467 @@
+import os
+import re
+import tempfile
+import zipfile
+import xml.etree.ElementTree as ET
+import xml.parsers.expat
+
+# Native reader for EFOD forms (.docx), working directly on the OOXML package instead of Word COM
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_W = "{%s}" % W_NS
+DOCUMENT_PART = "word/document.xml"
+
+# Characters Word reports in Range.Text for special run content
+_RUN_CHARS = {
+    _W + "tab": "\t",
+    _W + "br": "\x0b",  # Manual line break
+    _W + "cr": "\x0b",
+    _W + "noBreakHyphen": "\x1e",
+    _W + "softHyphen": "\x1f",
+}
+_CELL_END = "\r\x07"  # End-of-cell marker as returned by Word's Range.Text
+_FALSE_VALUES = ("0", "false", "off")
+
+
+class FormTableError(ValueError):
+    pass
+
+
+def _on_off(element, default=True):
+    # OOXML on/off property: present without w:val means "on"
+    if element is None:
+        return default
+    value = element.get(_W + "val")
+    if value is None:
+        return True
+    return value.lower() not in _FALSE_VALUES
+
+
+def _checkbox_state(checkbox):
+    checked = checkbox.find(_W + "checked")
+    if checked is not None:
+        return _on_off(checked)
+    return _on_off(checkbox.find(_W + "default"), default=False)
+
+
+def read_form_table(docx_path):
+    """Stream-parse the first table of a .docx and return (column_count, rows).
+
+    Each row is a list of cells, each cell a (raw_text, checkboxes, text_fields) tuple where raw_text
+    mimics Word's Cell.Range.Text (paragraphs separated by '\\r', ending with the end-of-cell marker),
+    checkboxes lists the state of every legacy checkbox form field in the cell and text_fields the
+    current result of every legacy text form field.
+    """
+    grid_columns, rows = 0, []
+    for grid_columns, row in iter_form_table(docx_path):
+        rows.append(row)
+    column_count = grid_columns or max((len(r) for r in rows), default=0)
+    return column_count, rows
+
+
+def iter_form_table(docx_path):
+    # Rows of the first table as read_form_table returns them, each yielded as soon as it is parsed
+    # together with the table's grid column count (0 if the table has no grid)
+    try:
+        package = zipfile.ZipFile(docx_path)
+    except zipfile.BadZipFile as e:
+        raise FormTableError(f"Not a valid .docx package: {e}")
+
+    with package:
+        try:
+            stream = package.open(DOCUMENT_PART)
+        except KeyError:
+            raise FormTableError(f"Missing {DOCUMENT_PART} in package")
+
+        with stream:
+            grid_columns = 0
+            table_depth = 0
+            run_depth = 0
+            table_done = False
+            row = None
+            paragraphs = None
+            chars = None
+            checkboxes = None
+            text_fields = None
+            fields = []  # Stack of complex fields: [state ('code' until separate, then 'result'), kind, result]
+            field_kind = None
+
+            for event, elem in ET.iterparse(stream, events=("start", "end")):
+                tag = elem.tag
+                if event == "start":
+                    if tag == _W + "tbl":
+                        table_depth += 1
+                    elif table_depth != 1:
+                        continue
+                    elif tag == _W + "tr":
+                        row = []
+                    elif tag == _W + "tc":
+                        paragraphs, checkboxes, text_fields = [], [], []
+                    elif tag == _W + "p" and paragraphs is not None:
+                        chars = []
+                    elif tag == _W + "r":
+                        run_depth += 1
+                    continue
+
+                # End events
+                if tag == _W + "tbl":
+                    table_depth -= 1
+                    if table_depth == 0:
+                        table_done = True
+                        break
+                    continue
+                if table_depth != 1:
+                    if table_depth == 0 and tag == _W + "p":
+                        elem.clear()  # Body content before the table is not needed
+                    continue
+
+                if tag == _W + "gridCol":
+                    grid_columns += 1
+                elif tag == _W + "t" or (tag in _RUN_CHARS and run_depth):
+                    text = elem.text if tag == _W + "t" else _RUN_CHARS[tag]
+                    if chars is not None and text and all(field[0] == "result" for field in fields):
+                        chars.append(text)
+                        if fields:
+                            fields[-1][2].append(text)
+                elif tag == _W + "fldChar":
+                    kind = elem.get(_W + "fldCharType")
+                    if kind == "begin":
+                        # ffData (and so the field's kind) is parsed before its fldChar closes
+                        fields.append(["code", field_kind, []])
+                        field_kind = None
+                    elif kind == "separate" and fields:
+                        fields[-1][0] = "result"
+                    elif kind == "end" and fields:
+                        field = fields.pop()
+                        if field[1] == "text" and text_fields is not None:
+                            text_fields.append("".join(field[2]))
+                elif tag == _W + "textInput":
+                    field_kind = "text"
+                elif tag == _W + "checkBox":
+                    field_kind = "checkbox"
+                    if checkboxes is not None:
+                        checkboxes.append(_checkbox_state(elem))
+                elif tag == _W + "r":
+                    run_depth -= 1
+                elif tag == _W + "p":
+                    if paragraphs is not None and chars is not None:
+                        paragraphs.append("".join(chars))
+                    chars = None
+                    elem.clear()
+                elif tag == _W + "tc":
+                    if row is not None:
+                        row.append(("\r".join(paragraphs) + _CELL_END, checkboxes, text_fields))
+                    paragraphs = checkboxes = text_fields = None
+                    fields = []
+                elif tag == _W + "tr":
+                    if row is not None:
+                        yield grid_columns, row
+                    row = None
+                    elem.clear()
+
+    if not table_done:
+        raise FormTableError("No tables found in the document.")
+
+
+# Native writer: patches legacy form fields in word/document.xml in place.
+# Byte offsets from expat are used to splice only the changed field results and checkbox states,
+# so the rest of the part (and every other part of the package) is left untouched.
+
+_EMPTY_TEXT_RESULT = "\u2002" * 5  # What Word shows for an empty text form field
+
+
+class RowCountMismatch(FormTableError):
+    def __init__(self, expected, found):
+        super().__init__(f"Row count mismatch: Excel has {expected} rows, Word table has {found} rows")
+        self.expected = expected
+        self.found = found
+
+
+class _FormField:
+    __slots__ = ("kind", "paragraph", "separate_end", "end_start", "end_paragraph", "result_rpr",
+                 "begin_rpr", "checkbox", "checked", "default")
+
+    def __init__(self, paragraph, begin_rpr):
+        self.kind = None  # 'text' or 'checkbox'
+        self.paragraph = paragraph
+        self.separate_end = None  # Byte offset just after the run holding fldChar separate
+        self.end_start = None  # Byte offset of the run holding fldChar end
+        self.end_paragraph = None
+        self.result_rpr = None
+        self.begin_rpr = begin_rpr
+        self.checkbox = None  # (start, end, self_closing) of w:checkBox
+        self.checked = None  # (start, end) of w:checked
+        self.default = False
+
+
+def _scan_fields(data):
+    """Locate the legacy form fields of the first table's cells; returns (column_count, rows)."""
+    parser = xml.parsers.expat.ParserCreate()
+    prefix = {"w": "w:"}  # Resolved from the document element's xmlns declarations
+    stack = []  # (qname, start offset)
+    state = {
+        "table_depth": 0, "done": False, "grid": 0, "paragraph": 0,
+        "row": None, "cell": None, "run_start": None, "run_rpr": None, "fields": [],
+    }
+    rows = []
+
+    def name(local):
+        return prefix["w"] + local
+
+    def element_end(start):
+        # End offset of the element opened at start: its self-closing start tag or its end tag
+        tag_end = data.index(b">", start) + 1
+        if data[tag_end - 2:tag_end] == b"/>":
+            return tag_end
+        return data.index(b">", parser.CurrentByteIndex) + 1
+
+    def start_element(qname, attrs):
+        index = parser.CurrentByteIndex
+        if not stack:
+            for key, value in attrs.items():
+                if key.startswith("xmlns:") and value == W_NS:
+                    prefix["w"] = key[6:] + ":"
+        stack.append((qname, index))
+        if state["done"]:
+            return
+        if qname == name("tbl"):
+            state["table_depth"] += 1
+            return
+        if state["table_depth"] != 1:
+            return
+        if qname == name("tr"):
+            state["row"] = []
+        elif qname == name("tc"):
+            state["cell"] = []
+            state["fields"] = []
+        elif qname == name("p"):
+            state["paragraph"] += 1
+        elif qname == name("r"):
+            state["run_start"] = index
+            state["run_rpr"] = None
+        elif state["cell"] is None:
+            return
+        elif qname == name("fldChar"):
+            kind = attrs.get(name("fldCharType"))
+            if kind == "begin":
+                field = _FormField(state["paragraph"], state["run_rpr"])
+                state["fields"].append(field)
+                state["cell"].append(field)
+            elif state["fields"]:
+                field = state["fields"][-1]
+                if kind == "separate":
+                    field.separate_end = -1  # Filled in when the run closes
+                elif kind == "end":
+                    field.end_start = state["run_start"]
+                    field.end_paragraph = state["paragraph"]
+                    state["fields"].pop()
+        elif qname == name("textInput") and state["fields"]:
+            state["fields"][-1].kind = "text"
+        elif qname == name("checkBox") and state["fields"]:
+            state["fields"][-1].kind = "checkbox"
+        elif qname == name("default") and stack[-2][0] == name("checkBox") and state["fields"]:
+            state["fields"][-1].default = attrs.get(name("val"), "1").lower() not in _FALSE_VALUES
+
+    def end_element(qname):
+        _, start = stack.pop()
+        if state["done"]:
+            return
+        if qname == name("tbl"):
+            state["table_depth"] -= 1
+            if state["table_depth"] == 0:
+                state["done"] = True
+            return
+        if state["table_depth"] != 1:
+            return
+        if qname == name("gridCol"):
+            state["grid"] += 1
+        elif qname == name("tr"):
+            rows.append(state["row"])
+            state["row"] = None
+        elif qname == name("tc"):
+            if state["row"] is not None:
+                state["row"].append(state["cell"])
+            state["cell"] = None
+        elif qname == name("rPr") and stack and stack[-1][0] == name("r"):
+            state["run_rpr"] = (start, element_end(start))
+        elif qname == name("r"):
+            end = element_end(start)
+            for field in state["fields"]:
+                if field.separate_end == -1:
+                    field.separate_end = end
+                    field.result_rpr = None
+                elif field.separate_end is not None and field.result_rpr is None and state["run_rpr"]:
+                    field.result_rpr = state["run_rpr"]
+            state["run_start"] = None
+        elif qname == name("checked") and stack and stack[-1][0] == name("checkBox") and state["fields"]:
+            state["fields"][-1].checked = (start, element_end(start))
+        elif qname == name("checkBox") and state["fields"]:
+            end = element_end(start)
+            self_closing = data[end - 2:end] == b"/>"
+            state["fields"][-1].checkbox = (start, end, self_closing)
+
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = end_element
+    parser.Parse(data, True)
+
+    if not state["done"]:
+        raise FormTableError("No tables found in the document.")
+    column_count = state["grid"] or max((len(r) for r in rows), default=0)
+    return column_count, rows
+
+
+# Characters outside the XML 1.0 Char range; written into document.xml they make the part unreadable
+_NOT_XML_CHAR = re.compile("[^\t\n\r\x20-\ud7ff\ue000-\ufffd\U00010000-\U0010ffff]")
+
+
+def _xml_text(text):
+    # Field text that can be stored in the part: a vertical tab (Word's manual line break) becomes a
+    # line break, other control characters are dropped
+    return _NOT_XML_CHAR.sub("", text.replace("\x0b", "\n"))
+
+
+def _escape(text):
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _result_runs(text, rpr, w):
+    runs = []
+    for line_number, line in enumerate(text.replace("\r\n", "\n").replace("\r", "\n").split("\n")):
+        parts = []
+        if line_number:
+            parts.append(f"<{w}br/>")
+        for tab_number, chunk in enumerate(line.split("\t")):
+            if tab_number:
+                parts.append(f"<{w}tab/>")
+            if chunk:
+                parts.append(f'<{w}t xml:space="preserve">{_escape(chunk)}</{w}t>')
+        runs.append(f"<{w}r>{rpr}{''.join(parts)}</{w}r>")
+    return "".join(runs).encode("utf-8")
+
+
+def _field_result(data, field):
+    # Text between the separate and end runs, with field formatting stripped (same as Word's Result)
+    if field.separate_end in (None, -1) or field.end_start is None:
+        return ""
+    segment = data[field.separate_end:field.end_start].decode("utf-8")
+    segment = re.sub(r"<[^>]*?:tab/>", "\t", segment)
+    segment = re.sub(r"<[^>]*?:br/>", "\n", segment)
+    segment = re.sub(r"<[^>]*>", "", segment)
+    return segment.replace("&lt;", "<").replace("&gt;", ">").replace("&quot;", '"').replace("&apos;", "'").replace("&amp;", "&")
+
+
+def fill_form_table(docx_path, rows, output_path=None):
+    """Write form-field values into the first table of a .docx without Word.
+
+    rows holds one (texts, expected_col) pair per table row: texts maps a column (3, 10, 11) to the
+    text for the first text form field of that cell, expected_col is the checkbox column (4-9) that
+    should be checked, or None for all unchecked. Only fields whose value changes are rewritten.
+    Returns (changes, warnings) where changes counts rewritten fields and warnings lists
+    (row, col, message) tuples for cells without the expected form field.
+    """
+    output_path = output_path or docx_path
+    with zipfile.ZipFile(docx_path) as package:
+        try:
+            data = package.read(DOCUMENT_PART)
+        except KeyError:
+            raise FormTableError(f"Missing {DOCUMENT_PART} in package")
+
+        column_count, table_rows = _scan_fields(data)
+        if column_count != 11:
+            raise FormTableError(f"Expected 11 columns in Word table, found {column_count}")
+        if len(rows) != len(table_rows):
+            raise RowCountMismatch(len(rows), len(table_rows))
+
+        w = re.match(rb"\s*(?:<\?.*?\?>\s*)?<([\w.-]+:)?document\b", data, re.S)
+        w = w.group(1).decode() if w and w.group(1) else "w:"
+        patches = []  # (start, end, replacement bytes)
+        warnings = []
+        changes = 0
+
+        for row_idx, ((texts, expected_col), cells) in enumerate(zip(rows, table_rows), start=1):
+            for col_idx, text in texts.items():
+                cell_fields = cells[col_idx - 1] if col_idx <= len(cells) else []
+                if not cell_fields:
+                    warnings.append((row_idx, col_idx, "No form field - skipping"))
+                    continue
+                field = cell_fields[0]
+                if field.kind != "text":
+                    warnings.append((row_idx, col_idx, f"Expected text field, found {field.kind or 'other'} field"))
+                    continue
+                if field.end_start is None or field.end_paragraph != field.paragraph:
+                    warnings.append((row_idx, col_idx, "Field result spans paragraphs - skipping"))
+                    continue
+                result = _xml_text(text) or _EMPTY_TEXT_RESULT
+                if _field_result(data, field) == result:
+                    continue
+                rpr_span = field.result_rpr or field.begin_rpr
+                rpr = data[rpr_span[0]:rpr_span[1]].decode("utf-8") if rpr_span else ""
+                runs = _result_runs(result, rpr, w)
+                if field.separate_end in (None, -1):
+                    separator = f'<{w}r>{rpr}<{w}fldChar {w}fldCharType="separate"/></{w}r>'.encode("utf-8")
+                    patches.append((field.end_start, field.end_start, separator + runs))
+                else:
+                    patches.append((field.separate_end, field.end_start, runs))
+                changes += 1
+
+            for col_idx in range(4, 10):
+                if col_idx > len(cells):
+                    continue
+                for field in cells[col_idx - 1]:
+                    if field.kind != "checkbox" or field.checkbox is None:
+                        continue
+                    want = col_idx == expected_col
+                    if field.checked is not None:
+                        checked_xml = data[field.checked[0]:field.checked[1]]
+                        value = re.search(rb'val="([^"]*)"', checked_xml)
+                        current = value is None or value.group(1).decode().lower() not in _FALSE_VALUES
+                    else:
+                        current = field.default
+                    if current == want:
+                        continue
+                    replacement = f"<{w}checked/>" if want else (f'<{w}checked {w}val="0"/>' if field.default else "")
+                    replacement = replacement.encode("utf-8")
+                    start, end, self_closing = field.checkbox
+                    if field.checked is not None:
+                        patches.append((field.checked[0], field.checked[1], replacement))
+                    elif self_closing:
+                        patches.append((start, end, f"<{w}checkBox>".encode("utf-8") + replacement + f"</{w}checkBox>".encode("utf-8")))
+                    else:
+                        close = data.rindex(b"</", start, end)
+                        patches.append((close, close, replacement))
+                    changes += 1
+
+        if patches:
+            patches.sort(key=lambda patch: patch[0])
+            pieces = []
+            position = 0
+            for start, end, replacement in patches:
+                pieces.append(data[position:start])
+                pieces.append(replacement)
+                position = end
+            pieces.append(data[position:])
+            data = b"".join(pieces)
+            try:
+                xml.parsers.expat.ParserCreate().Parse(data, True)  # Never replace a form with a broken part
+            except xml.parsers.expat.ExpatError as e:
+                raise FormTableError(f"Filled {DOCUMENT_PART} is not well-formed: {e}")
+
+        if not patches and output_path == docx_path:
+            return changes, warnings
+
+        # Rewrite the package: every other part is copied unchanged with its original entry metadata
+        directory = os.path.dirname(os.path.abspath(output_path))
+        handle, temp_path = tempfile.mkstemp(suffix=".docx", dir=directory)
+        os.close(handle)
+        try:
+            with zipfile.ZipFile(temp_path, "w") as target:
+                target.comment = package.comment
+                for info in package.infolist():
+                    content = data if info.filename == DOCUMENT_PART else package.read(info.filename)
+                    target.writestr(info, content, compress_type=info.compress_type)
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+    os.replace(temp_path, output_path)
+    return changes, warnings
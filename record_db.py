@@ -0,0 +1,88 @@
+import os
+import time
+import sqlite3
+from annex_ref import sortable_ref
+
+# Optional SQLite repository of converted rows, for queries across forms and reports ("how did every
+# state answer 4.2.1"). Rows are upserted per source file in one transaction; lookups go through indexes
+# on the Annex Ref. sort key, the source and the Difference; the sort key also makes chapter and range
+# lookups ("all of chapter 3") index range scans.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    source      TEXT NOT NULL,     -- Input file the row came from
+    row_number  INTEGER NOT NULL,  -- 1-based position in that file
+    state       TEXT,
+    annex_ref   TEXT,
+    ref_key     TEXT,              -- Annex Ref. in natural order, see annex_ref.sortable_ref()
+    standard    TEXT,
+    difference  TEXT,
+    state_ref   TEXT,
+    details     TEXT,
+    remark      TEXT,
+    updated_at  REAL NOT NULL,
+    PRIMARY KEY (source, row_number)  -- Also the index for lookups by source
+);
+CREATE INDEX IF NOT EXISTS idx_records_ref_key ON records (ref_key, state);
+CREATE INDEX IF NOT EXISTS idx_records_difference ON records (difference);
+"""
+
+RECORD_COLUMNS = ["annex_ref", "standard", "difference", "state_ref", "details", "remark"]  # EXCEL_HEADERS order
+
+
+class RecordDatabase:
+    def __init__(self, path, timeout=30.0):
+        self.path = path
+        # Several CLI worker processes may write at once: WAL lets readers continue, the timeout waits for locks
+        self.connection = sqlite3.connect(path, timeout=timeout)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def upsert_rows(self, source, rows, state=None):
+        # Rows in EXCEL_HEADERS order replace the source's previous rows, all in one transaction
+        source = os.path.abspath(source)
+        state = state or os.path.splitext(os.path.basename(source))[0]
+        now = time.time()
+        records = [(source, row_number, state, row[0], sortable_ref(row[0]), *row[1:6], now)
+                   for row_number, row in enumerate(rows, start=1)]
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO records (source, row_number, state, annex_ref, ref_key, standard, difference, "
+                "state_ref, details, remark, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (source, row_number) DO UPDATE SET state = excluded.state, "
+                "annex_ref = excluded.annex_ref, ref_key = excluded.ref_key, standard = excluded.standard, "
+                "difference = excluded.difference, state_ref = excluded.state_ref, details = excluded.details, "
+                "remark = excluded.remark, updated_at = excluded.updated_at", records)
+            # Rows beyond the new end belonged to a longer earlier version of the file
+            self.connection.execute("DELETE FROM records WHERE source = ? AND row_number > ?", (source, len(records)))
+        return len(records)
+
+    def query(self, annex_ref, states=None, difference=None, last=None):
+        # Every row for one Annex Ref., or with last for the range annex_ref to last (including the
+        # references under last), as dicts in natural reference order, then by state
+        sql = ("SELECT state, source, row_number, annex_ref, " + ", ".join(RECORD_COLUMNS[1:]) + " FROM records ")
+        if last is None:
+            sql += "WHERE ref_key = ?"
+            params = [sortable_ref(annex_ref)]
+        else:
+            sql += "WHERE ref_key >= ? AND ref_key < ?"
+            params = [sortable_ref(annex_ref), (sortable_ref(last) or "") + "/"]  # "/" sorts right after "."
+        if states:
+            sql += f" AND state IN ({', '.join('?' * len(states))})"
+            params.extend(states)
+        if difference:
+            sql += " AND difference = ?"
+            params.append(difference)
+        cursor = self.connection.execute(sql + " ORDER BY ref_key, state, source, row_number", params)
+        names = [description[0] for description in cursor.description]
+        return [dict(zip(names, row)) for row in cursor]
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
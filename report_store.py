@@ -0,0 +1,96 @@
+import os
+import re
+import glob
+import logging
+import tempfile
+import pandas as pd
+try:
+    import pyarrow  # noqa: F401  (pandas uses it for Parquet)
+except ImportError:
+    pyarrow = None
+
+# Consolidated columnar store of Crystal Reports rows from many states. The store is a directory with
+# one part file per ingested report of a state, so worker processes can write their parts in parallel and
+# re-ingesting a report replaces its part instead of duplicating its rows. Both reload far faster than
+# the xlsx outputs.
+#
+# Parts are Parquet files; pyarrow is in requirements.txt for that. When it is missing the store falls
+# back to pickled DataFrames and logs a warning. The two kinds of parts do not mix: load() raises
+# ReportStoreError for a store whose parts were all written by the other engine.
+
+PARQUET_AVAILABLE = pyarrow is not None
+SOURCE_COLUMNS = ["State", "Report"]  # Added to every row: where it came from
+SUFFIXES = {"parquet": ".parquet", "pickle": ".pkl"}
+_fallback_logged = False
+
+
+class ReportStoreError(Exception):
+    pass
+
+
+def part_name(state, report):
+    # One part per state and report file name: re-ingesting a state's report replaces its part, while
+    # equally named reports of different states ("fr/report.xml", "de/report.xml") never overwrite each other
+    return re.sub(r"[^\w.-]+", "_", f"{state}__{report}")
+
+
+class ReportStore:
+    def __init__(self, directory, engine=None):
+        global _fallback_logged
+        if engine is None and not PARQUET_AVAILABLE and not _fallback_logged:
+            logging.warning("pyarrow is not installed: the report store keeps its parts as pickled DataFrames "
+                            "instead of Parquet files (pip install pyarrow)")
+            _fallback_logged = True
+        self.directory = directory
+        self.engine = engine or ("parquet" if PARQUET_AVAILABLE else "pickle")
+        self.suffix = SUFFIXES[self.engine]
+
+    def write_part(self, state, report, frame):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, part_name(state, report) + self.suffix)
+        fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        os.close(fd)
+        try:
+            if self.engine == "parquet":
+                frame.to_parquet(temp_path, index=False)
+            else:
+                frame.to_pickle(temp_path)
+            os.replace(temp_path, path)  # Readers never see a half-written part
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return path
+
+    def parts(self, engine=None):
+        return sorted(glob.glob(os.path.join(self.directory, "*" + SUFFIXES[engine or self.engine])))
+
+    def load(self, columns=None, states=None):
+        # All rows of the store as one DataFrame; states selects the rows, then columns the columns, so
+        # states works whether or not "State" is among the columns
+        paths = self.parts()
+        if not paths:
+            other = next(engine for engine in SUFFIXES if engine != self.engine)
+            if self.parts(other):
+                raise ReportStoreError(f"{self.directory} holds {other} parts, which the {self.engine} engine "
+                                       f"cannot read" + (" (pyarrow is not installed)" if other == "parquet" else ""))
+        states = None if states is None else list(states)
+        frames = []
+        for path in paths:
+            if self.engine == "parquet":
+                filters = None if states is None else [("State", "in", states)]
+                frame = pd.read_parquet(path, columns=columns, filters=filters)
+            else:
+                frame = pd.read_pickle(path)
+                if states is not None:
+                    frame = frame[frame["State"].isin(states)]
+                if columns is not None:
+                    frame = frame[columns]
+            frames.append(frame)
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        frame = pd.concat(frames, ignore_index=True)
+        for column in SOURCE_COLUMNS:
+            if column in frame.columns:
+                frame[column] = frame[column].astype("category")
+        return frame
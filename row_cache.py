@@ -0,0 +1,178 @@
+import os
+import io
+import gzip
+import json
+import shutil
+import hashlib
+import logging
+import tempfile
+
+# On-disk cache of the rows extracted from input files (EFOD forms, Crystal Reports XML), keyed by the
+# file's content hash and the version of the extractor that produced them. Each entry is a compact
+# columnar sidecar (one array per column, gzip-compressed JSON); the least recently used entries are
+# evicted once the cache grows past its size bound.
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".efod-helper-cache")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+ENTRY_SUFFIX = ".cols.json.gz"
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class RowCache:
+    """Content-addressed row cache with a size-bounded LRU eviction policy.
+
+    Safe to share between processes: entries are written to a temporary file and renamed into
+    place, and a hit refreshes the entry's modification time, which is the LRU order.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def key(self, path, version):
+        # The extractor version is part of the key, so changing the extraction invalidates old entries
+        return hashlib.sha256(f"{version}\0{file_digest(path)}".encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    def get(self, key):
+        # Returns (columns, values column by column) or None on a miss
+        path = self._path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)  # Most recently used
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logging.warning(f"Discarding unreadable cache entry {path}: {e}")
+            self._remove(path)
+            return None
+        return entry["columns"], entry["data"]
+
+    def put(self, key, columns, data):
+        # data holds the values column by column, as RowTable.data does
+        self._write(key, lambda f: f.write(json.dumps({"columns": list(columns), "data": data}, separators=(",", ":"))))
+
+    def writer(self, key, columns):
+        # Entry filled row by row while the rows stream past, see CacheWriter
+        return CacheWriter(self, key, columns)
+
+    def _write(self, key, write):
+        # write(f) writes the entry's JSON text into f
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6) as compressed, \
+                    io.TextIOWrapper(compressed, encoding="utf-8") as f:
+                write(f)
+            os.replace(temp_path, self._path(key))
+        except BaseException:
+            self._remove(temp_path)
+            raise
+        self.evict()
+
+    def entries(self):
+        # (mtime, size, path) of every entry, oldest first
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return entries
+        for name in names:
+            if not name.endswith(ENTRY_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue  # Evicted by another process
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        return entries
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            logging.debug(f"Evicted cache entry {path}")
+
+    def clear(self):
+        for _, _, path in self.entries():
+            self._remove(path)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class CacheWriter:
+    """Cache entry written while its rows stream past, without holding them in memory.
+
+    Each column is spooled to its own temporary file as JSON values; commit() assembles the columnar
+    entry from the spools. Any OSError disables the writer instead of failing the conversion.
+    """
+
+    def __init__(self, cache, key, columns):
+        self.cache = cache
+        self.key = key
+        self.columns = list(columns)
+        self.rows = 0
+        self._encode = json.JSONEncoder(separators=(",", ":")).encode
+        self._spools = [tempfile.TemporaryFile("w+", encoding="utf-8") for _ in self.columns]
+
+    def append(self, row):
+        if self._spools is None:
+            return
+        separator = "," if self.rows else ""
+        try:
+            for spool, value in zip(self._spools, row):
+                spool.write(separator + self._encode(value))
+        except OSError as e:
+            logging.warning(f"Failed to write row cache: {e}")
+            self.close()
+            return
+        self.rows += 1
+
+    def commit(self):
+        # Stores the entry; False when the writer was disabled or the entry could not be written
+        if self._spools is None:
+            return False
+
+        def write(f):
+            f.write('{"columns":' + self._encode(self.columns) + ',"data":[')
+            for position, spool in enumerate(self._spools):
+                spool.seek(0)
+                f.write(",[" if position else "[")
+                shutil.copyfileobj(spool, f)
+                f.write("]")
+            f.write("]}")
+
+        try:
+            self.cache._write(self.key, write)
+        except OSError as e:
+            logging.warning(f"Failed to write row cache: {e}")
+            return False
+        finally:
+            self.close()
+        return True
+
+    def close(self):
+        for spool in self._spools or ():
+            spool.close()
+        self._spools = None
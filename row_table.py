@@ -0,0 +1,54 @@
+import sys
+
+# Compact container for the extracted rows of a form or report. Rows are stored column by column, one
+# list per column, instead of one list per row: a row costs only its six value references, and the values
+# of low-cardinality columns (Difference) are interned, so the thousands of equal labels share one string.
+# Iterating yields each row as a tuple made on the fly, which is what the table writers consume.
+
+DIFFERENCE_COLUMN = 2  # "Difference" in EXCEL_HEADERS order
+
+
+class RowTable:
+    __slots__ = ("columns", "data", "_intern")
+
+    def __init__(self, columns, rows=(), interned=(DIFFERENCE_COLUMN,)):
+        self.columns = list(columns)
+        self.data = [[] for _ in self.columns]
+        self._intern = [position in interned for position in range(len(self.columns))]
+        for row in rows:
+            self.append(row)
+
+    @classmethod
+    def from_columns(cls, columns, data, interned=(DIFFERENCE_COLUMN,)):
+        table = cls(columns, interned=interned)
+        for position, values in enumerate(data):
+            table.set_column(position, values)
+        return table
+
+    def append(self, row):
+        for values, intern, value in zip(self.data, self._intern, row):
+            values.append(sys.intern(value) if intern and type(value) is str else value)
+
+    def column(self, position):
+        return self.data[position]
+
+    def set_column(self, position, values):
+        if self._intern[position]:
+            values = [sys.intern(value) if type(value) is str else value for value in values]
+        self.data[position] = list(values)
+
+    def take(self, positions):
+        # New table of the rows at positions (in that order); the values themselves are shared, not copied
+        table = RowTable(self.columns)
+        table._intern = self._intern
+        table.data = [[values[position] for position in positions] for values in self.data]
+        return table
+
+    def __len__(self):
+        return len(self.data[0]) if self.data else 0
+
+    def __iter__(self):
+        return zip(*self.data)
+
+    def __getitem__(self, index):
+        return tuple(values[index] for values in self.data)
@@ -0,0 +1,74 @@
+import re
+
+# Cell text cleanup shared by the extraction (Word table -> rows) and the fill (rows -> form fields).
+# Everything is done with precompiled regexes and translate tables, each a single pass in C over the
+# text, so the cost grows linearly with the cell length; the *_texts functions clean a whole column.
+
+FIELD_TEXT_LIMIT = 255  # Word form field limit
+PRESERVED_COLUMNS = frozenset((2, 3, 10, 11))  # Word columns whose spaces, tabs and line breaks are kept
+ANNEX_REF_COLUMN = 1
+
+# Control characters other than tab, newline and carriage return end the visible text of a cell
+# (the end-of-cell marker '\r\x07', form field marks)
+_CONTROL = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_ANNEX_NUMBER = re.compile(r"\d+(?:\.\d+)?(?![.\d])")
+# Exotic Unicode spaces that are effectively empty; regular spaces, tabs and newlines are not in it
+_EXOTIC_SPACES = str.maketrans(dict.fromkeys(
+    [chr(code) for code in range(0x2000, 0x200C)] + ["\u2028", "\u2029", "\u202f", "\u205f", "\u3000"]))
+_EXOTIC_LENGTH = 3  # Only texts this short are checked for exotic spaces, longer ones are kept as they are
+
+
+def visible_text(raw_text):
+    # Text up to the first control character
+    match = _CONTROL.search(raw_text)
+    return raw_text[:match.start()] if match else raw_text
+
+
+def annex_number(text):
+    # Leading "3" or "3.1" of an Annex Ref. cell ("3.1 (a)" -> "3.1"), None if it does not start with one
+    match = _ANNEX_NUMBER.match(text)
+    return match.group(0) if match else None
+
+
+def cell_text(raw_text, col_idx):
+    """Cleaned text of a Word cell (raw_text as Range.Text returns it) for the Excel column of col_idx.
+
+    Columns 2, 3, 10 and 11 keep their whitespace, the others are stripped; the Annex Ref. column is
+    reduced to its leading number when it has one, and left unstripped otherwise.
+    """
+    visible = visible_text(raw_text)
+    if col_idx in PRESERVED_COLUMNS:
+        return visible
+    text = visible.strip()
+    if col_idx == ANNEX_REF_COLUMN:
+        return annex_number(text) or visible
+    return text
+
+
+def cell_texts(raw_texts, col_idx):
+    # cell_text over a whole column
+    search = _CONTROL.search
+    visible = [raw_text[:match.start()] if (match := search(raw_text)) else raw_text for raw_text in raw_texts]
+    if col_idx in PRESERVED_COLUMNS:
+        return visible
+    if col_idx == ANNEX_REF_COLUMN:
+        number = _ANNEX_NUMBER.match
+        return [match.group(0) if (match := number(text.strip())) else text for text in visible]
+    return [text.strip() for text in visible]
+
+
+def field_text(value):
+    """Text for a form field: empty cells (None, NaN) are "", the rest is stripped, and short texts made
+    only of exotic Unicode spaces become "". Not truncated; see FIELD_TEXT_LIMIT.
+    """
+    if value is None or value != value:  # None or NaN
+        return ""
+    text = str(value).strip()
+    if len(text) <= _EXOTIC_LENGTH:
+        text = text.translate(_EXOTIC_SPACES)
+    return text
+
+
+def field_texts(values):
+    # field_text over a whole column
+    return [field_text(value) for value in values]
@@ -0,0 +1,178 @@
+import random
+import zipfile
+from xml.sax.saxutils import escape, quoteattr
+from openpyxl import Workbook
+
+# Generators of realistic synthetic inputs for every pipeline: Crystal Reports XML exports, 6-column EFOD
+# workbooks and 11-column EFOD forms (.docx with legacy form fields). All three are built from the same
+# records, so a generated form, workbook and report describe the same State's compliance data.
+
+EXCEL_COLUMNS = ["Annex Ref.", "Standard", "Difference", "State Ref.", "Details", "Remark"]
+
+# Difference labels as exported by EFOD, and the form checkbox column (4-9) each one selects
+DIFFERENCE_LABELS = [
+    ("No difference", 4),
+    ("More exacting or exceeds", 5),
+    ("Difference in character or other means of compliance", 6),
+    ("Less protective or partially implemented or not implemented", 7),
+    ("Significant difference", 8),
+    ("Not applicable", 9),
+]
+_DIFFERENCE_COLUMNS = dict(DIFFERENCE_LABELS)
+
+_WORDS = ("aircraft operator shall ensure that the flight crew aerodrome approach procedures established "
+          "by the State of Registry including safety management system records maintenance personnel "
+          "licence certificate instrument meteorological conditions navigation equipment appropriate "
+          "authority provisions manual").split()
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+
+def _sentence(rng, low, high):
+    words = rng.choices(_WORDS, k=rng.randint(low, high))
+    return " ".join(words).capitalize() + "."
+
+
+def synthetic_records(rows, seed=0):
+    """Rows of EFOD data in EXCEL_COLUMNS order, with unique hierarchical Annex Ref. numbers."""
+    rng = random.Random(seed)
+    records = []
+    chapter, section, paragraph = 1, 1, 0
+    for _ in range(rows):
+        paragraph += 1
+        if rng.random() < 0.08:
+            section, paragraph = section + 1, 1
+        if rng.random() < 0.01:
+            chapter, section, paragraph = chapter + 1, 1, 1
+        annex_ref = f"{chapter}.{section}.{paragraph}"
+        if rng.random() < 0.2:
+            annex_ref += f".{rng.randint(1, 9)}"  # Sub-paragraph
+        standard = " ".join(_sentence(rng, 12, 40) for _ in range(rng.randint(1, 4)))
+        if rng.random() < 0.3:
+            difference, state_ref, details, remark = "", "", "", ""
+        else:
+            difference = rng.choice(DIFFERENCE_LABELS)[0]
+            state_ref = f"{rng.choice(['CAR', 'ANR', 'OPS', 'AGA'])} {rng.randint(1, 99)}.{rng.randint(1, 999)}"
+            details = _sentence(rng, 5, 30) if difference != "No difference" else ""
+            remark = _sentence(rng, 3, 12) if rng.random() < 0.2 else ""
+        records.append([annex_ref, standard, difference, state_ref, details, remark])
+    return records
+
+
+def mutate_records(records, fraction=0.05, seed=1):
+    """Copy of records with about fraction of the rows changed, like a quarterly update."""
+    rng = random.Random(seed)
+    mutated = [list(record) for record in records]
+    for record in rng.sample(mutated, int(len(mutated) * fraction)):
+        record[2] = rng.choice(DIFFERENCE_LABELS)[0]
+        record[3] = f"ANR {rng.randint(1, 99)}.{rng.randint(1, 999)}"
+        record[4] = _sentence(rng, 5, 20)
+    return mutated
+
+
+def make_efod_workbook(path, records):
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(EXCEL_COLUMNS)
+    for record in records:
+        ws.append([value or None for value in record])
+    wb.save(path)
+    return path
+
+
+def make_crystal_xml(path, records):
+    # urn:crystal-reports:schemas:report-detail export with the six EFOD fields per Details record
+    fields = ["AnnexReferenceNumber1", "SARP11", "StateDifferenceLevel1", "StateReference1",
+              "StateDifference1", "StateComments1"]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8" ?>\n'
+                '<CrystalReport xmlns="urn:crystal-reports:schemas:report-detail" '
+                'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">\n<Group Level="1">\n')
+        for record in records:
+            f.write('<Details Level="2"><Section SectionNumber="0">')
+            for name, value in zip(fields, record):
+                f.write(f'<Field Name={quoteattr(name)} FieldName="{{EFOD.{name}}}">')
+                if value:  # Null fields carry no value
+                    value = escape(value)
+                    f.write(f'<FormattedValue>{value}</FormattedValue><Value>{value}</Value>')
+                f.write('</Field>')
+            f.write('</Section></Details>\n')
+        f.write('</Group>\n</CrystalReport>\n')
+    return path
+
+
+def _run(text):
+    return f'<w:r><w:t xml:space="preserve">{escape(text)}</w:t></w:r>'
+
+
+def _text_field(name, value):
+    result = _run(value or "\u2002" * 5)  # Word shows an empty text field as five en spaces
+    return ('<w:r><w:fldChar w:fldCharType="begin"><w:ffData>'
+            f'<w:name w:val="{name}"/><w:enabled/><w:calcOnExit w:val="0"/><w:textInput/></w:ffData></w:fldChar></w:r>'
+            '<w:r><w:instrText xml:space="preserve"> FORMTEXT </w:instrText></w:r>'
+            f'<w:r><w:fldChar w:fldCharType="separate"/></w:r>{result}<w:r><w:fldChar w:fldCharType="end"/></w:r>')
+
+
+def _checkbox(name, checked):
+    state = '<w:checked/>' if checked else ''
+    return ('<w:r><w:fldChar w:fldCharType="begin"><w:ffData>'
+            f'<w:name w:val="{name}"/><w:enabled/><w:calcOnExit w:val="0"/>'
+            f'<w:checkBox><w:sizeAuto/><w:default w:val="0"/>{state}</w:checkBox></w:ffData></w:fldChar></w:r>'
+            '<w:r><w:instrText xml:space="preserve"> FORMCHECKBOX </w:instrText></w:r>'
+            '<w:r><w:fldChar w:fldCharType="end"/></w:r>')
+
+
+def _cell(*paragraphs):
+    return "<w:tc>" + "".join(f"<w:p>{content}</w:p>" for content in paragraphs) + "</w:tc>"
+
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '<Override PartName="/word/settings.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.settings+xml"/>'
+    '</Types>')
+_PACKAGE_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="word/document.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+    '</Relationships>')
+_DOCUMENT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="settings.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/settings"/>'
+    '</Relationships>')
+_SETTINGS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    f'<w:settings xmlns:w="{W_NS}"><w:documentProtection w:edit="comments" w:enforcement="1"/></w:settings>')
+
+
+def make_efod_form(path, records):
+    # 11-column EFOD table: Annex Ref., Standard, State Ref. (text field), six Difference checkboxes,
+    # Details and Remark (text fields)
+    grid = "<w:tblGrid>" + '<w:gridCol w:w="900"/>' * 11 + "</w:tblGrid>"
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as package:
+        package.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        package.writestr("_rels/.rels", _PACKAGE_RELS)
+        package.writestr("word/_rels/document.xml.rels", _DOCUMENT_RELS)
+        package.writestr("word/settings.xml", _SETTINGS)
+        with package.open("word/document.xml", "w") as part:
+            part.write((f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><w:document xmlns:w="{W_NS}"><w:body>'
+                        f'<w:p>{_run("Compliance checklist")}</w:p><w:tbl><w:tblPr><w:tblW w:w="0" w:type="auto"/>'
+                        f'</w:tblPr>{grid}').encode("utf-8"))
+            for row, (annex_ref, standard, difference, state_ref, details, remark) in enumerate(records, start=1):
+                checked_col = _DIFFERENCE_COLUMNS.get(difference)
+                cells = [_cell(_run(annex_ref)),
+                         _cell(*(_run(sentence.strip() + ".") for sentence in standard.split(".") if sentence.strip())),
+                         _cell(_text_field(f"StateRef{row}", state_ref))]
+                cells += [_cell(_checkbox(f"Check{row}_{col}", col == checked_col)) for col in range(4, 10)]
+                cells += [_cell(_text_field(f"Details{row}", details)), _cell(_text_field(f"Remark{row}", remark))]
+                part.write(("<w:tr>" + "".join(cells) + "</w:tr>").encode("utf-8"))
+            part.write(b'</w:tbl><w:p/><w:sectPr/></w:body></w:document>')
+    return path
@@ -0,0 +1,115 @@
+import os
+import csv
+import tempfile
+import importlib.util
+from xlsx_reader import TableLayoutError, read_xlsx_table
+
+# Table files other than xlsx, for runs whose output is read by programs rather than people: CSV,
+# Parquet and Feather hold the same columns as the xlsx outputs and are much cheaper to write and read.
+# xlsx itself is written by main.write_excel_table and read by xlsx_reader; read_table reads all four.
+
+FORMATS = ("xlsx", "csv", "parquet", "feather")
+PYARROW_FORMATS = ("parquet", "feather")
+INPUT_EXTENSIONS = tuple("." + fmt for fmt in FORMATS)
+# Checked without importing: pandas and pyarrow are only loaded by the reads and writes that need them
+PYARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+
+class FormatUnavailable(Exception):
+    pass
+
+
+def available_formats():
+    return [fmt for fmt in FORMATS if PYARROW_AVAILABLE or fmt not in PYARROW_FORMATS]
+
+
+def check_format(fmt):
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown table format: {fmt}")
+    if fmt in PYARROW_FORMATS and not PYARROW_AVAILABLE:
+        raise FormatUnavailable(f"Writing {fmt} needs pyarrow (pip install pyarrow)")
+
+
+def table_format(path):
+    # Format of a table file, from its extension
+    fmt = os.path.splitext(path)[1].lower().lstrip(".")
+    check_format(fmt)
+    return fmt
+
+
+def write_table(path, headers, rows):
+    # Written to a temporary file next to path and renamed into place, so a failed or cancelled run
+    # (rows is often a generator still parsing the input) leaves no partial output behind
+    fmt = table_format(path)
+    headers = [str(header) for header in headers]
+    fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(os.path.abspath(path)))
+    os.close(fd)
+    try:
+        row_count = _write_table(temp_path, fmt, headers, rows)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return row_count
+
+
+def _write_table(path, fmt, headers, rows):
+    # CSV is streamed row by row; Parquet and Feather are columnar, so their rows are gathered first
+    # and stored as text
+    if fmt == "csv":
+        row_count = 0
+        with open(path, "w", encoding="utf-8-sig", newline="") as f:  # The BOM lets Excel detect UTF-8
+            writer = csv.writer(f)
+            writer.writerow(headers)
+            for row in rows:
+                writer.writerow(row)
+                row_count += 1
+        return row_count
+    import pandas as pd
+
+    frame = pd.DataFrame(list(rows), columns=headers, dtype=object)
+    frame = frame.astype(str).where(frame.notna(), None)  # Text columns: Arrow rejects columns of mixed types
+    if fmt == "parquet":
+        frame.to_parquet(path, index=False)
+    else:
+        frame.to_feather(path)
+    return len(frame)
+
+
+def _frame(headers, rows, dtype=None):
+    # DataFrame of reader rows with the dtypes pd.read_excel would give it
+    import numpy as np
+    import pandas as pd
+
+    frame = pd.DataFrame(rows, columns=headers, dtype=object)
+    frame = frame.where(frame.notna(), np.nan).infer_objects()
+    for col, col_type in (dtype or {}).items():
+        values = frame.iloc[:, col]
+        frame.isetitem(col, values.where(values.isna(), values.astype(col_type)))
+    return frame
+
+
+def read_table(path, dtype=None, columns=None, count=None):
+    """Table file as a DataFrame with empty cells as NaN, the way pd.read_excel returns it.
+
+    With columns, only those leading columns are read and the header must match them (TableLayoutError
+    otherwise); count only limits the columns read. xlsx files are streamed by xlsx_reader.
+    """
+    import pandas as pd
+
+    fmt = table_format(path)
+    if fmt == "xlsx":
+        headers, rows = read_xlsx_table(path, columns, count)
+        return _frame(headers, rows, dtype)
+    if fmt == "csv":
+        # Only empty fields are missing: "N/A" or "None" in a Details text stay text
+        frame = pd.read_csv(path, dtype=dtype, encoding="utf-8-sig", keep_default_na=False, na_values=[""])
+    else:
+        frame = pd.read_parquet(path) if fmt == "parquet" else pd.read_feather(path)
+        frame = frame.where(frame.notna(), float("nan"))  # Every column is text already; None becomes NaN
+    if columns is not None:
+        if list(frame.columns[:len(columns)]) != list(columns):
+            raise TableLayoutError(f"Expected the columns {list(columns)}, found {list(frame.columns[:len(columns)])}")
+        count = len(columns)
+    return frame.iloc[:, :count] if count is not None else frame
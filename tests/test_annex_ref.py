@@ -0,0 +1,50 @@
+import pytest
+
+from annex_ref import RefIndex, canonical_ref, parse_ref_range, ref_key, sortable_ref
+
+
+@pytest.mark.parametrize("spelling", ["3.1-3.4", "3.1 - 3.4", "3.1/3.4", "3.1 / 3.4", "3.1, 3.4", "3.1–3.4",
+                                      " 3.1  -  3.4 "])
+def test_separated_references_share_one_delimiter(spelling):
+    assert canonical_ref(spelling) == "3.1-3.4"
+
+
+def test_separators_never_merge_references():
+    assert ref_key("3.1-3.4") != ref_key("3.13.4")
+    assert ref_key("3.1 3.4") != ref_key("3.1.3.4")
+    assert canonical_ref("1 2") != canonical_ref("12")
+
+
+@pytest.mark.parametrize("spelling", ["4.2.1", "4.2.1.", " 4.2 .1", "04.2.1", "4 . 2 . 1", "\t4.2.1\n", "4.2.1 -"])
+def test_whitespace_and_stray_separators_are_formatting(spelling):
+    assert canonical_ref(spelling) == "4.2.1"
+
+
+def test_bracketed_suffix_joins_its_number():
+    assert canonical_ref("4.2.1 (a)") == canonical_ref("4.2.1(a)") == "4.2.1a"
+
+
+def test_empty_references_have_no_key():
+    for value in (None, float("nan"), "", "  ", " - ", "()"):
+        assert ref_key(value) is None
+
+
+def test_canonical_ref_is_idempotent():
+    for spelling in ("3.1-3.4", "4.2.1 (a)", "Appendix 2", " 04.2 .1."):
+        assert ref_key(canonical_ref(spelling)) == ref_key(spelling)
+
+
+def test_sortable_ref_orders_like_the_key():
+    refs = ["2.10", "2.9", "3.1.1", "3.1-3.4", "3.1", "3.1a", "3.2", "Appendix", "3.1-3.10", "3"]
+    assert sorted(refs, key=sortable_ref) == sorted(refs, key=ref_key)
+    # A separated reference stays within its first part's section
+    assert sortable_ref("3.1") < sortable_ref("3.1-3.4") < sortable_ref("3.1") + "/"
+
+
+def test_ref_index_range_and_within():
+    refs = ["3.1", "3.1-3.4", "3.2", "3.4.1", "3.5", "3.13.4", None]
+    index = RefIndex(refs)
+    assert [refs[i] for i in index.within("3.1")] == ["3.1", "3.1-3.4"]
+    assert [refs[i] for i in index.range(*parse_ref_range("3.2 - 3.4"))] == ["3.2", "3.4.1"]
+    assert index.find("3.13.4") == [5]
+    assert index.unkeyed == [6]
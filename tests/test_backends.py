@@ -0,0 +1,23 @@
+import pytest
+
+from backends import DocumentBackend, DocumentSession, FakeWordBackend
+
+
+def test_incomplete_backend_fails_when_created():
+    class OpenOnly(DocumentBackend):
+        def open(self, path):
+            return None
+
+    with pytest.raises(TypeError):
+        OpenOnly()
+
+
+def test_session_starts_the_backend_once(tmp_path):
+    from synthetic_data import make_efod_form, synthetic_records
+
+    form_path = make_efod_form(str(tmp_path / "form.docx"), synthetic_records(3))
+    backend = FakeWordBackend()
+    with DocumentSession(backend) as session:
+        for _ in range(3):
+            session.close(session.open(form_path))
+    assert backend.starts == 1
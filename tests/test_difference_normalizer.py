@@ -0,0 +1,48 @@
+import main
+
+
+def test_normalizer_maps_every_spelling_and_reports_the_rest():
+    values = ["No", "  more exacting ", "DIFFERENCE IN CHARACTER", None, "", "error-multi checkbox",
+              "Not Applicable", "maybe", "less"]
+    row_columns, invalid_rows = main.DIFFERENCE_NORMALIZER.normalize(values)
+    assert row_columns.tolist() == [4, 5, 6, 0, 0, 0, 9, main.UNRECOGNIZED, 7]
+    assert invalid_rows == [(9, "maybe")]  # Excel row: header is row 1
+
+
+def test_normalizer_accepts_every_exported_label():
+    # A table exported from a form must fill back into it: each label selects its own checkbox column
+    labels = main.DIFFERENCE_NORMALIZER.labels
+    assert sorted(labels) == list(main.CHECKBOX_COLUMNS)
+    row_columns, invalid_rows = main.DIFFERENCE_NORMALIZER.normalize(list(labels.values()))
+    assert row_columns.tolist() == list(labels)
+    assert invalid_rows == []
+
+
+def test_export_labels_come_from_the_normalizer():
+    cell_texts = {col_idx: f"c{col_idx}" for col_idx in (1, 2, 3, 10, 11)}
+    for column, label in main.DIFFERENCE_NORMALIZER.labels.items():
+        assert main.build_excel_row(cell_texts, [str(column)])[2] == label
+    assert main.build_excel_row(cell_texts, [])[2] == ""
+    multi = main.build_excel_row(cell_texts, ["4", "5"])[2]
+    assert multi == main.MULTI_CHECKBOX_DIFFERENCE
+    assert main.DIFFERENCE_NORMALIZER.normalize([multi])[0].tolist() == [0]
+
+
+def test_crystal_normalizer_relabels_by_prefix():
+    values = ["Less protective", "More exacting", "Difference in character", "No Difference", None]
+    relabeled = main.CRYSTAL_DIFFERENCE_NORMALIZER.relabel(values, main.CRYSTAL_DIFFERENCE_LABELS)
+    assert relabeled == [main.CRYSTAL_DIFFERENCE_LABELS[7], main.CRYSTAL_DIFFERENCE_LABELS[5],
+                         main.CRYSTAL_DIFFERENCE_LABELS[6], "No Difference", None]
+
+
+def test_error_message_lists_the_rows_and_every_accepted_value():
+    _, invalid_rows = main.DIFFERENCE_NORMALIZER.normalize(["No", "maybe", "perhaps"])
+    message = main.difference_error_message(invalid_rows)
+    assert "Row 3: 'maybe'" in message
+    assert "Row 4: 'perhaps'" in message
+    accepted = message.split("Expected values are: ", 1)[1]
+    for value in main.DIFFERENCE_NORMALIZER.columns:
+        if value:
+            assert f"'{value}'" in accepted
+    for label in main.CHECKBOX_TEXT_MAP.values():
+        assert f"'{label.lower()}'" in accepted
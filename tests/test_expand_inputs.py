@@ -0,0 +1,17 @@
+import main
+
+
+def test_excel_on_excel_folder_skips_sample_and_outputs(tmp_path):
+    for name in ("a.xlsx", "b.csv", "sample.xlsx", "a_filled.xlsx", "a_filled_2.xlsx",
+                 "a_filled_fuzzy_matches.xlsx", "a_filled_1_fuzzy_matches.xlsx", "~$a.xlsx", "notes.txt"):
+        (tmp_path / name).write_text("")
+    inputs = main.expand_inputs([str(tmp_path)], (".xlsx", ".csv"), exclude=[str(tmp_path / "sample.xlsx")],
+                                skip_names=main.EXCEL_ON_EXCEL_OUTPUT)
+    assert inputs == [str(tmp_path / "a.xlsx"), str(tmp_path / "b.csv")]
+
+
+def test_files_named_explicitly_are_kept(tmp_path):
+    output = tmp_path / "a_filled.xlsx"
+    output.write_text("")
+    inputs = main.expand_inputs([str(output), str(output)], (".xlsx",), skip_names=main.EXCEL_ON_EXCEL_OUTPUT)
+    assert inputs == [str(output)]
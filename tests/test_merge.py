@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+
+import main
+
+COLUMNS = main.EXCEL_HEADERS
+
+
+def loop_merge(sample_df, fillable_df):
+    # The row loop merge_on_annex_ref replaced: last sample row per stripped key, Standard kept
+    sample_dict = {str(row.iloc[0]).strip(): row for _, row in sample_df.iterrows()}
+    merged = fillable_df.copy()
+    for index, row in fillable_df.iterrows():
+        if pd.isna(row.iloc[0]):
+            continue
+        sample_row = sample_dict.get(str(row.iloc[0]).strip())
+        if sample_row is not None:
+            for col in (0, 2, 3, 4, 5):
+                merged.iloc[index, col] = sample_row.iloc[col]
+    return merged
+
+
+def frame(rows):
+    return pd.DataFrame(rows, columns=COLUMNS, dtype=object)
+
+
+def test_key_join_matches_the_row_loop():
+    sample = frame([
+        ["1.1", "S", "No difference", "CAR 1", "first", np.nan],
+        ["1.2", "S", "More exacting or exceeds", "CAR 2", np.nan, "r"],
+        ["1.2", "S", "Significant difference", "CAR 2b", "last wins", np.nan],  # Duplicate key
+        ["2.1 ", "S", np.nan, np.nan, np.nan, np.nan],  # NaN values are copied as NaN
+        [np.nan, "S", "Not applicable", "X", "no key", "x"],
+    ])
+    fillable = frame([
+        ["1.1", "own standard", np.nan, np.nan, np.nan, np.nan],
+        [" 1.2", "own", "old", "old", "old", "old"],
+        ["2.1", "own", "old", "old", "old", "old"],
+        ["9.9", "missing key", "kept", "kept", "kept", "kept"],
+        [np.nan, "no ref", "kept", "kept", "kept", "kept"],
+        ["1.2", "duplicate fillable key", np.nan, np.nan, np.nan, np.nan],
+    ])
+    merged, report = main.merge_on_annex_ref(sample, fillable, fuzzy_threshold=None)
+    expected = loop_merge(sample, fillable)
+    pd.testing.assert_frame_equal(merged, expected)
+    assert report["matched"] == 4
+    assert report["unmatched"] == ["9.9"]
+    assert report["skipped"] == 1
+    assert report["duplicate_sample_keys"] == ["1.2"]
+
+
+def test_rows_keep_their_order_and_other_columns():
+    sample = frame([["1", "S", "No difference", "A", "B", "C"]])
+    fillable = frame([["2", "x", np.nan, np.nan, np.nan, np.nan], ["1", "y", np.nan, np.nan, np.nan, np.nan]])
+    fillable["Note"] = ["n2", "n1"]
+    merged, _ = main.merge_on_annex_ref(sample, fillable, fuzzy_threshold=None)
+    assert merged["Note"].tolist() == ["n2", "n1"]
+    assert merged.iloc[1].tolist()[:6] == ["1", "y", "No difference", "A", "B", "C"]
+
+
+STANDARD = "Each operator shall establish a safety management system acceptable to the State of the Operator"
+
+
+def test_fuzzy_matching_is_off_by_default():
+    sample = frame([["4.2.1", STANDARD, "No difference", "A", "B", "C"]])
+    fillable = frame([["4.3.1", STANDARD, np.nan, np.nan, np.nan, np.nan]])
+    merged, report = main.merge_on_annex_ref(sample, fillable)
+    assert report["fuzzy"] == []
+    assert report["unmatched"] == ["4.3.1"]
+    assert merged.iloc[0].tolist()[2:] == [np.nan] * 4
+
+
+def test_fuzzy_threshold_is_a_minimum():
+    sample = frame([["4.2.1", STANDARD, "No difference", "A", "B", "C"]])
+    fillable = frame([["4.3.1", STANDARD + " concerned", np.nan, np.nan, np.nan, np.nan]])
+    _, report = main.merge_on_annex_ref(sample, fillable, fuzzy_threshold=0.5)
+    score = report["fuzzy"][0]["score"]
+    assert 0.5 < score < 1
+
+    merged, report = main.merge_on_annex_ref(sample, fillable, fuzzy_threshold=score)
+    assert [match["row"] for match in report["fuzzy"]] == [2]
+    assert merged.iloc[0].tolist() == ["4.3.1", STANDARD + " concerned", "No difference", "A", "B", "C"]
+
+    _, report = main.merge_on_annex_ref(sample, fillable, fuzzy_threshold=score + 1e-9)
+    assert report["fuzzy"] == []
+    assert report["unmatched"] == ["4.3.1"]
+
+
+def test_fuzzy_ties_go_to_the_first_sample_row_and_each_is_used_once():
+    sample = frame([
+        ["1.1", STANDARD, "No difference", "first", np.nan, np.nan],
+        ["1.2", STANDARD, "Not applicable", "second", np.nan, np.nan],
+        ["1.3", STANDARD, "Significant difference", "third", np.nan, np.nan],
+    ])
+    fillable = frame([
+        ["1.3", STANDARD, np.nan, np.nan, np.nan, np.nan],  # Key match: claims the third sample row
+        ["9.1", STANDARD, np.nan, np.nan, np.nan, np.nan],
+        ["9.2", STANDARD, np.nan, np.nan, np.nan, np.nan],
+        ["9.3", STANDARD, np.nan, np.nan, np.nan, np.nan],
+    ])
+    merged, report = main.merge_on_annex_ref(sample, fillable, fuzzy_threshold=main.FUZZY_THRESHOLD)
+    assert [(match["fillable_ref"], match["sample_ref"]) for match in report["fuzzy"]] == [("9.1", "1.1"), ("9.2", "1.2")]
+    assert merged["State Ref."].tolist() == ["third", "first", "second", np.nan]
+    assert report["unmatched"] == ["9.3"]
+
+
+def _cli_files(tmp_path):
+    sample = tmp_path / "sample.csv"
+    fillable = tmp_path / "fillable.csv"
+    frame([["4.2.1", STANDARD, "No difference", "A", "B", "C"]]).to_csv(sample, index=False)
+    frame([["4.3.1", STANDARD, np.nan, np.nan, np.nan, np.nan]]).to_csv(fillable, index=False)
+    return str(sample), str(fillable)
+
+
+def test_cli_matches_by_text_only_with_fuzzy(tmp_path):
+    sample, fillable = _cli_files(tmp_path)
+    assert main.cli(["-j", "1", "--format", "csv", "excel-on-excel", fillable, "--sample", sample]) == 0
+    assert pd.read_csv(tmp_path / "fillable_filled.csv").iloc[0].isna().sum() == 4
+    assert not (tmp_path / "fillable_filled_fuzzy_matches.xlsx").exists()
+
+    assert main.cli(["-j", "1", "--format", "csv", "excel-on-excel", fillable, "--sample", sample, "--fuzzy"]) == 0
+    assert pd.read_csv(tmp_path / "fillable_filled_1.csv").iloc[0].tolist()[2:] == ["No difference", "A", "B", "C"]
+    assert (tmp_path / "fillable_filled_1_fuzzy_matches.xlsx").exists()
@@ -0,0 +1,30 @@
+import metrics
+import main
+from metrics import Metrics
+
+
+def test_each_row_is_one_latency_sample(monkeypatch):
+    clock = iter([0.0, 10.0, 10.001, 10.003, 10.006, 10.106, 10.2])
+    monkeypatch.setattr(metrics.time, "perf_counter", lambda: next(clock))
+    run = Metrics()  # started at 0.0
+    run.rows_begin()  # 10.0
+    for _ in range(4):
+        run.row_done()
+    latencies_ms = [round(value * 1000, 3) for value in run.row_latencies]
+    assert latencies_ms == [1.0, 2.0, 3.0, 100.0]  # The first row counts, from rows_begin
+    run.finish()  # 10.2
+    data = run.as_dict()
+    assert data["rows"] == 4
+    assert round(data["row_latency_ms"]["p50"], 3) == 2.0
+    assert round(data["row_latency_ms"]["p99"], 3) == 100.0
+
+
+def test_streaming_xml_reports_one_sample_per_row(tmp_path):
+    from synthetic_data import make_crystal_xml, synthetic_records
+
+    xml_path = make_crystal_xml(str(tmp_path / "report.xml"), synthetic_records(250))
+    job = main.Job()
+    assert main.xml_to_excel(xml_path, str(tmp_path), job, fmt="csv")
+    data = job.metrics.as_dict()
+    assert data["rows"] == 250
+    assert data["row_latency_ms"]["p50"] < data["row_latency_ms"]["p99"]
@@ -0,0 +1,72 @@
+import zipfile
+
+import pytest
+
+from ooxml_form import RowCountMismatch, fill_form_table, read_form_table
+from synthetic_data import make_efod_form
+
+EMPTY = "\u2002" * 5  # What Word shows for an empty text field
+
+RECORDS = [
+    ["1.1", "First standard.", "", "", "", ""],
+    ["1.2", "Second standard.", "No difference", "CAR 1.2", "Old details", ""],
+    ["1.3", "Third standard.", "Significant difference", "OPS 3", "Old", "Old remark"],
+]
+
+
+def fields(form_path):
+    # Per row: {col: first text field result} for cols 3, 10, 11 and the checked checkbox columns
+    _, rows = read_form_table(form_path)
+    result = []
+    for cells in rows:
+        texts = {col: cells[col - 1][2][0] for col in (3, 10, 11)}
+        checked = [col for col in range(4, 10) if any(cells[col - 1][1])]
+        result.append((texts, checked))
+    return result
+
+
+@pytest.fixture
+def form(tmp_path):
+    return make_efod_form(str(tmp_path / "form.docx"), RECORDS)
+
+
+def test_fill_round_trip(form, tmp_path):
+    output = str(tmp_path / "filled.docx")
+    plan = [
+        ({3: "CAR 1.1", 10: "a & b <c> \"d\"", 11: "line one\nline two"}, 5),
+        ({3: "", 10: "", 11: ""}, None),
+        ({3: "OPS 3", 10: "tab\there", 11: "Old remark"}, 8),
+    ]
+    changes, warnings = fill_form_table(form, plan, output)
+    assert warnings == []
+    assert fields(output) == [
+        ({3: "CAR 1.1", 10: "a & b <c> \"d\"", 11: "line one\x0bline two"}, [5]),  # Word reads a break as \x0b
+        ({3: EMPTY, 10: EMPTY, 11: EMPTY}, []),
+        ({3: "OPS 3", 10: "tab\there", 11: "Old remark"}, [8]),
+    ]
+    # Unchanged fields are not rewritten: row 3 only changes its Details
+    assert changes == 3 + 1 + 2 + 1 + 1
+
+
+def test_fill_is_idempotent_and_keeps_other_parts(form, tmp_path):
+    output = str(tmp_path / "filled.docx")
+    plan = [({3: "A", 10: "x\ny", 11: ""}, 4), ({3: "", 10: "", 11: ""}, None), ({3: "B", 10: "", 11: ""}, 9)]
+    fill_form_table(form, plan, output)
+    changes, _ = fill_form_table(output, plan)
+    assert changes == 0
+    with zipfile.ZipFile(form) as before, zipfile.ZipFile(output) as after:
+        for name in before.namelist():
+            if name != "word/document.xml":
+                assert before.read(name) == after.read(name)
+
+
+def test_fill_drops_characters_that_are_not_xml(form, tmp_path):
+    output = str(tmp_path / "filled.docx")
+    plan = [({3: "", 10: "bad\x01ctl and vt\x0bhere", 11: ""}, None)] + [({3: "", 10: "", 11: ""}, None)] * 2
+    fill_form_table(form, plan, output)
+    assert fields(output)[0][0][10] == "badctl and vt\x0bhere"
+
+
+def test_fill_rejects_a_plan_of_another_length(form):
+    with pytest.raises(RowCountMismatch):
+        fill_form_table(form, [({3: "", 10: "", 11: ""}, None)], str(form) + ".out.docx")
@@ -0,0 +1,58 @@
+import logging
+
+import pandas as pd
+import pytest
+
+import report_store
+from report_store import ReportStore, ReportStoreError
+
+
+def _frame(state, report, rows):
+    frame = pd.DataFrame({"Annex Ref.": [f"{state}.{i}" for i in range(rows)], "Value": range(rows)})
+    frame.insert(0, "Report", report)
+    frame.insert(0, "State", state)
+    return frame
+
+
+@pytest.fixture(params=["pickle", "parquet"])
+def store(request, tmp_path):
+    if request.param == "parquet":
+        pytest.importorskip("pyarrow")
+    store = ReportStore(str(tmp_path / "store"), engine=request.param)
+    store.write_part("fr", "report.xml", _frame("fr", "report.xml", 3))
+    store.write_part("de", "report.xml", _frame("de", "report.xml", 2))
+    return store
+
+
+def test_load_filters_states_before_projecting(store):
+    frame = store.load(columns=["Annex Ref."], states=["de"])
+    assert list(frame.columns) == ["Annex Ref."]
+    assert sorted(frame["Annex Ref."]) == ["de.0", "de.1"]
+
+
+def test_load_all_rows_with_source_columns(store):
+    frame = store.load(states={"fr", "de"})
+    assert len(frame) == 5
+    assert frame["State"].dtype == "category"
+    assert set(frame["State"]) == {"fr", "de"}
+
+
+def test_rewriting_a_report_replaces_its_part(store):
+    store.write_part("fr", "report.xml", _frame("fr", "report.xml", 1))
+    assert len(store.load(states=["fr"])) == 1
+
+
+def test_pickle_fallback_is_logged(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(report_store, "PARQUET_AVAILABLE", False)
+    monkeypatch.setattr(report_store, "_fallback_logged", False)
+    with caplog.at_level(logging.WARNING):
+        assert ReportStore(str(tmp_path)).engine == "pickle"
+        ReportStore(str(tmp_path))
+    assert len(caplog.records) == 1  # Once per process, not once per store
+    assert "pyarrow" in caplog.records[0].message
+
+
+def test_load_refuses_parts_of_the_other_engine(tmp_path):
+    ReportStore(str(tmp_path), engine="pickle").write_part("fr", "report.xml", _frame("fr", "report.xml", 1))
+    with pytest.raises(ReportStoreError):
+        ReportStore(str(tmp_path), engine="parquet").load()
@@ -0,0 +1,26 @@
+import os
+
+from row_cache import RowCache
+
+COLUMNS = ["Annex Ref.", "Standard"]
+ROWS = [["1.1", "First"], ["1.2", None], ["1.3", "Ünïcode \"quoted\""]]
+
+
+def test_streamed_entry_equals_stored_entry(tmp_path):
+    cache = RowCache(str(tmp_path / "cache"))
+    cache.put("stored", COLUMNS, [list(column) for column in zip(*ROWS)])
+    writer = cache.writer("streamed", COLUMNS)
+    for row in ROWS:
+        writer.append(row)
+    assert writer.commit()
+    assert cache.get("streamed") == cache.get("stored")
+
+
+def test_commit_failure_does_not_raise(tmp_path):
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("")
+    cache = RowCache(str(blocker))  # The entry cannot be written below a file
+    writer = cache.writer("key", COLUMNS)
+    writer.append(ROWS[0])
+    assert writer.commit() is False
+    assert os.path.isfile(blocker)
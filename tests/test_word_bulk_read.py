@@ -0,0 +1,38 @@
+import main
+from backends import DocumentSession, FakeWordBackend
+from synthetic_data import make_efod_form, synthetic_records
+
+
+def bulk_read_calls(form_path):
+    # COM calls of read_rows_bulk alone, and the rows it returned
+    backend = FakeWordBackend()
+    with DocumentSession(backend) as session:
+        doc = session.open(form_path)
+        table = doc.Tables(1)
+        max_rows = table.Rows.Count
+        before = backend.calls
+        rows = main.read_rows_bulk(table, max_rows, main.Job())
+        calls = backend.calls - before
+        session.close(doc)
+    return calls, max_rows, rows
+
+
+def test_bulk_read_calls_per_row_are_constant(tmp_path):
+    calls = {}
+    for count in (1, 10, 100):
+        form_path = make_efod_form(str(tmp_path / f"form{count}.docx"), synthetic_records(count))
+        calls[count], max_rows, rows = bulk_read_calls(form_path)
+        assert rows is not None and len(rows) == max_rows == count
+    # A fixed number of table-wide calls plus the same number per row, whatever the table size
+    per_row = (calls[100] - calls[10]) / 90
+    assert per_row == (calls[10] - calls[1]) / 9
+    assert per_row <= 30
+
+
+def test_bulk_read_matches_cell_by_cell_read(tmp_path):
+    form_path = make_efod_form(str(tmp_path / "form.docx"), synthetic_records(50))
+    with DocumentSession(FakeWordBackend()) as session:
+        bulk = main.read_table_word(form_path, main.Job(), session=session, bulk=True)
+        by_cell = main.read_table_word(form_path, main.Job(), session=session, bulk=False)
+    assert bulk is not None and len(bulk) == 50
+    assert list(bulk) == list(by_cell)
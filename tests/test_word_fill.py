@@ -0,0 +1,52 @@
+import main
+from backends import WD_COMMENTS, WD_NO_PROTECTION, DocumentSession, FakeWordBackend
+from synthetic_data import make_efod_form, make_efod_workbook, mutate_records, synthetic_records
+
+
+def test_word_fill_saves_the_form_protected(tmp_path):
+    records = synthetic_records(20)
+    form_path = make_efod_form(str(tmp_path / "form.docx"), records)
+    workbook = make_efod_workbook(str(tmp_path / "updated.xlsx"), mutate_records(records, fraction=0.5))
+
+    backend = FakeWordBackend()
+    open_document = backend.open
+
+    def open_unprotected(path):
+        doc = open_document(path)
+        doc.protection_type = WD_NO_PROTECTION
+        return doc
+
+    backend.open = open_unprotected
+    with DocumentSession(backend) as session:
+        assert main.fill_form_from_excel(workbook, form_path, main.Job(), engine="word", session=session)
+    saved = backend.saved[form_path]
+    assert saved.saved_protection_type == WD_COMMENTS
+
+
+def test_line_breaks_compare_equal_in_any_form():
+    assert main.same_field_text("line one\x0bline two", "line one\nline two")
+    assert main.same_field_text("a\rb", "a\r\nb")
+    assert main.same_field_text(" " * 5, "")
+    assert not main.same_field_text("line one\x0bline two", "line one line two")
+
+
+def test_refill_with_multi_line_details_changes_nothing(tmp_path):
+    records = synthetic_records(10)
+    for record in records[:3]:
+        record[4] = "first line\nsecond line"
+    form_path = make_efod_form(str(tmp_path / "form.docx"), synthetic_records(10))
+    workbook = make_efod_workbook(str(tmp_path / "updated.xlsx"), records)
+    assert main.fill_form_from_excel(workbook, form_path, main.Job(), engine="ooxml")
+
+    plan = main.build_fill_plan(*_plan_inputs(workbook))
+    snapshot, _ = main.snapshot_form_fields(form_path, len(plan))
+    updates, _ = main.plan_field_updates(plan, snapshot)
+    assert updates == []
+
+
+def _plan_inputs(workbook):
+    from table_formats import read_table
+
+    df = read_table(workbook, dtype={0: str}, columns=main.EXCEL_HEADERS)
+    checkbox_columns, _ = main.DIFFERENCE_NORMALIZER.normalize(df["Difference"])
+    return df, checkbox_columns
@@ -0,0 +1,114 @@
+import datetime
+import zipfile
+
+import numpy as np
+import openpyxl
+import pandas as pd
+import pytest
+from openpyxl.utils.datetime import CALENDAR_MAC_1904
+
+from table_formats import read_table
+from xlsx_reader import read_xlsx_table
+
+HEADERS = ["Annex Ref.", "Value", "Note"]
+
+
+def _workbook(path, rows, formats=None, iso_dates=False, epoch=None):
+    workbook = openpyxl.Workbook(iso_dates=iso_dates)
+    if epoch is not None:
+        workbook.epoch = epoch
+    sheet = workbook.active
+    sheet.append(HEADERS)
+    for row in rows:
+        sheet.append(row)
+    for cell, number_format in (formats or {}).items():
+        sheet[cell].number_format = number_format
+    workbook.save(path)
+    return str(path)
+
+
+def _assert_same_as_read_excel(path):
+    # The repo's NA policy: only empty cells are missing, so "N/A" typed as text stays text
+    expected = pd.read_excel(path, keep_default_na=False, na_values=[""])
+    pd.testing.assert_frame_equal(read_table(path), expected)
+
+
+def test_dates_in_builtin_and_custom_formats(tmp_path):
+    moment = datetime.datetime(2024, 3, 1, 14, 30, 15)
+    rows = [["4.1.1", moment, "datetime"],
+            ["4.1.2", datetime.datetime(2023, 12, 31), "date"],
+            ["4.1.3", datetime.datetime(1900, 2, 1), "before the 1900 leap day"]]
+    path = _workbook(tmp_path / "dates.xlsx", rows, formats={"B2": "yyyy-mm-dd hh:mm:ss", "B3": "mm-dd-yy",
+                                                              "B4": 'd" de "mmmm yyyy'})
+    _assert_same_as_read_excel(path)
+    _, values = read_xlsx_table(path)
+    assert values[0][1] == moment
+
+
+def test_times_durations_and_plain_numbers(tmp_path):
+    rows = [["4.1.1", datetime.time(8, 15), "time"],
+            ["4.1.2", datetime.timedelta(hours=30, minutes=5), "duration"],
+            ["4.1.3", 3.0, "whole float"],
+            ["4.1.4", 2.5, "fraction"],
+            ["4.1.5", 45000, "number, not a date"],
+            ["4.1.6", 0.25, "percentage"]]
+    path = _workbook(tmp_path / "times.xlsx", rows, formats={"B7": "0%", "B6": '"Day "0'})
+    _assert_same_as_read_excel(path)
+    _, values = read_xlsx_table(path)
+    assert values[0][1] == datetime.time(8, 15)
+    assert values[1][1] == datetime.timedelta(hours=30, minutes=5)
+    assert values[4][1] == 45000
+
+
+def test_1904_epoch(tmp_path):
+    moment = datetime.datetime(2020, 5, 17, 6, 0)
+    path = _workbook(tmp_path / "mac.xlsx", [["4.1.1", moment, "x"]], epoch=CALENDAR_MAC_1904)
+    _assert_same_as_read_excel(path)
+    assert read_xlsx_table(path)[1][0][1] == moment
+
+
+def test_iso_date_cells(tmp_path):
+    moment = datetime.datetime(2024, 3, 1, 14, 30, 15)
+    path = _workbook(tmp_path / "iso.xlsx", [["4.1.1", moment, "x"]], iso_dates=True)
+    with zipfile.ZipFile(path) as package:
+        assert 't="d"' in package.read("xl/worksheets/sheet1.xml").decode()
+    _assert_same_as_read_excel(path)
+    assert read_xlsx_table(path)[1][0][1] == moment
+
+
+def test_error_cells_and_empty_strings_are_empty(tmp_path):
+    rows = [["4.1.1", "#N/A", "N/A"],
+            ["4.1.2", "#DIV/0!", "None"],
+            ["4.1.3", 7, ""]]
+    path = _workbook(tmp_path / "errors.xlsx", rows)
+    _assert_same_as_read_excel(path)
+    _, values = read_xlsx_table(path)
+    assert values == [["4.1.1", None, "N/A"], ["4.1.2", None, "None"], ["4.1.3", 7, None]]
+
+
+def test_inline_strings(tmp_path):
+    path = _workbook(tmp_path / "inline.xlsx", [["4.1.1", "x", "y"], ["4.1.2", "x", "y"]])
+    # Rewrite the data cells as inline strings, one of them empty, as other writers produce them
+    with zipfile.ZipFile(path) as package:
+        parts = {name: package.read(name) for name in package.namelist()}
+    sheet = parts["xl/worksheets/sheet1.xml"].decode()
+    for ref, text in (("C2", "inline text"), ("C3", "")):
+        start = sheet.index(f'<c r="{ref}"')
+        end = sheet.index("</c>", start) + len("</c>")
+        sheet = sheet[:start] + f'<c r="{ref}" t="inlineStr"><is><t>{text}</t></is></c>' + sheet[end:]
+    parts["xl/worksheets/sheet1.xml"] = sheet.encode()
+    with zipfile.ZipFile(path, "w") as package:
+        for name, data in parts.items():
+            package.writestr(name, data)
+
+    _assert_same_as_read_excel(path)
+    _, values = read_xlsx_table(path)
+    assert [row[2] for row in values] == ["inline text", None]
+
+
+@pytest.mark.parametrize("count", [None, 2])
+def test_projected_columns_match_read_excel(tmp_path, count):
+    rows = [["4.1.1", datetime.datetime(2024, 1, 2), "#N/A"], ["4.1.2", np.nan, "text"]]
+    path = _workbook(tmp_path / "projected.xlsx", rows, formats={"B2": "dd/mm/yyyy"})
+    expected = pd.read_excel(path, keep_default_na=False, na_values=[""])
+    pd.testing.assert_frame_equal(read_table(path, count=count), expected.iloc[:, :count])
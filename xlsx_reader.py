@@ -0,0 +1,245 @@
+import re
+import zipfile
+import datetime
+import posixpath
+import xml.etree.ElementTree as ET
+
+# Streaming read-only reader for the xlsx tables this tool exchanges: it parses the first worksheet row
+# by row, keeps only the leading columns that are needed, checks the header row before reading any data
+# and stops at the last row of the FormDataTable range, without building openpyxl cells or styles.
+# Cell values are those pd.read_excel returns: numbers in a date or time format become datetimes, times
+# or timedeltas, error cells ("#N/A") and empty strings are empty (None).
+
+TABLE_NAME = "FormDataTable"
+
+_S = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_R = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_CELL_REF = re.compile(r"([A-Z]+)(\d+)")
+
+# Number formats: built-in date and time ids, and what marks a custom format code as a date or a duration
+# (the tests openpyxl applies; quoted text and [$-409] style locale blocks do not count)
+_DATE_FORMAT_IDS = frozenset(range(14, 23)) | {45, 46, 47}
+_DURATION_FORMAT_IDS = frozenset({46})  # [h]:mm:ss
+_FORMAT_LITERALS = re.compile(r'".*?"|\[(?!hh?\]|mm?\]|ss?\])[^\]]*\]')
+_DATE_FORMAT_CODE = re.compile(r"(?<![_\\])[dmhysDMHYS]")
+_DURATION_FORMAT_CODE = re.compile(r"\[hh?\](:mm(:ss(\.0*)?)?)?|\[mm?\](:ss(\.0*)?)?|\[ss?\](\.0*)?", re.IGNORECASE)
+_EPOCHS = {False: datetime.datetime(1899, 12, 30), True: datetime.datetime(1904, 1, 1)}
+
+
+class TableLayoutError(ValueError):
+    pass
+
+
+def _column_index(letters):
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - 64
+    return index - 1
+
+
+def _relationships(package, part):
+    # Relationship id -> package path of the target, for the rels of part
+    rels_path = posixpath.join(posixpath.dirname(part), "_rels", posixpath.basename(part) + ".rels")
+    if rels_path not in package.namelist():
+        return {}
+    targets = {}
+    for rel in ET.fromstring(package.read(rels_path)).iter(_REL + "Relationship"):
+        target = rel.get("Target")
+        if target.startswith("/"):
+            target = target[1:]
+        else:
+            target = posixpath.normpath(posixpath.join(posixpath.dirname(part), target))
+        targets[rel.get("Id")] = target
+    return targets
+
+
+def _shared_strings(package):
+    if "xl/sharedStrings.xml" not in package.namelist():
+        return []
+    strings = []
+    with package.open("xl/sharedStrings.xml") as f:
+        for _, element in ET.iterparse(f):
+            if element.tag == _S + "si":
+                # Plain (<t>) or rich text (<r><t>); phonetic runs (<rPh>) are not part of the value
+                text = element.findtext(_S + "t")
+                if text is None:
+                    text = "".join(run.findtext(_S + "t") or "" for run in element.iterfind(_S + "r"))
+                strings.append(text)
+                element.clear()
+    return strings
+
+
+def _date_styles(package):
+    # Style indices (the s attribute of a cell) of the date formats, and those of the duration formats
+    if "xl/styles.xml" not in package.namelist():
+        return frozenset(), frozenset()
+    styles = ET.fromstring(package.read("xl/styles.xml"))
+    codes = {int(fmt.get("numFmtId")): fmt.get("formatCode", "")
+             for fmt in styles.iterfind(f"{_S}numFmts/{_S}numFmt")}
+    dates, durations = set(), set()
+    for index, xf in enumerate(styles.iterfind(f"{_S}cellXfs/{_S}xf")):
+        format_id = int(xf.get("numFmtId", 0))
+        if format_id in codes:
+            code = codes[format_id].split(";")[0]
+            is_date = _DATE_FORMAT_CODE.search(_FORMAT_LITERALS.sub("", code)) is not None
+            is_duration = _DURATION_FORMAT_CODE.search(code) is not None
+        else:
+            is_date, is_duration = format_id in _DATE_FORMAT_IDS, format_id in _DURATION_FORMAT_IDS
+        if is_date:
+            dates.add(index)
+        if is_duration:
+            durations.add(index)
+    return frozenset(dates), frozenset(durations)
+
+
+def _serial_date(serial, epoch, duration):
+    # Excel serial number of a date-formatted cell as a datetime (a time below one day, a timedelta for
+    # durations), rounded to the millisecond; None when it is no valid date
+    try:
+        if duration:
+            return datetime.timedelta(seconds=round(serial * 86400, 3))
+        day, fraction = divmod(serial, 1)
+        time = datetime.timedelta(milliseconds=round(fraction * 86400000))
+        if 0 <= serial < 1 and time.days == 0:
+            return (datetime.datetime.min + time).time()
+        if 0 < serial < 60 and epoch == _EPOCHS[False]:
+            day += 1  # Excel counts the 29 February 1900 that never was
+        return epoch + datetime.timedelta(days=day) + time
+    except (OverflowError, ValueError):
+        return None
+
+
+def _iso_date(text):
+    # Value of a t="d" cell: an ISO 8601 date, time or date and time; None when it is none of them
+    try:
+        if "T" in text or ("-" in text and ":" in text):
+            return datetime.datetime.fromisoformat(text)
+        if ":" in text:
+            return datetime.time.fromisoformat(text.rstrip("Z"))
+        return datetime.date.fromisoformat(text)
+    except ValueError:
+        return None
+
+
+def _table_last_row(package, sheet_part, table_name):
+    # Last row of the named table (or of the sheet's first table), None when the sheet has no table
+    last_row = None
+    for target in _relationships(package, sheet_part).values():
+        if not target.startswith("xl/tables/"):
+            continue
+        table = ET.fromstring(package.read(target))
+        match = _CELL_REF.fullmatch(table.get("ref", "").split(":")[-1])
+        if match is None:
+            continue
+        if table.get("displayName") == table_name or table.get("name") == table_name:
+            return int(match.group(2))
+        if last_row is None:
+            last_row = int(match.group(2))
+    return last_row
+
+
+def _cell_value(cell, strings, dates):
+    # dates is (date style indices, duration style indices, epoch) from _date_styles and the workbook
+    kind = cell.get("t", "n")
+    if kind == "inlineStr":
+        return "".join(t.text or "" for t in cell.iter(_S + "t")) or None
+    value = cell.findtext(_S + "v")
+    if not value or kind == "e":  # Empty, or an error such as #N/A
+        return None
+    if kind == "s":
+        return strings[int(value)] or None
+    if kind == "b":
+        return value == "1"
+    if kind == "str":
+        return value
+    if kind == "d":
+        return _iso_date(value)
+    number = float(value)
+    date_styles, duration_styles, epoch = dates
+    style = int(cell.get("s", 0))
+    if style in date_styles:
+        return _serial_date(number, epoch, style in duration_styles)
+    return int(number) if number.is_integer() else number
+
+
+def _dedup_headers(values):
+    # Header names as pd.read_excel makes them: empty cells are "Unnamed: <col>", repeated names get .1,
+    # .2, ... skipping names taken elsewhere in the row ("Note", "Note", "Note.1" -> "Note", "Note.2",
+    # "Note.1"), and named columns are numbered before unnamed ones
+    headers = [str(value) if value is not None else f"Unnamed: {col}" for col, value in enumerate(values)]
+    unnamed = [col for col, value in enumerate(values) if value is None]
+    counts = {}
+    for col in [col for col, value in enumerate(values) if value is not None] + unnamed:
+        header = name = headers[col]
+        count = counts.get(name, 0)
+        while count > 0:
+            counts[name] = count + 1
+            header = f"{name}.{count}"
+            count = count + 1 if header in headers else counts.get(header, 0)
+        headers[col] = header
+        counts[header] = count + 1
+    return headers
+
+
+def read_xlsx_table(path, columns=None, count=None, table_name=TABLE_NAME):
+    """Read the first worksheet of an xlsx file and return (headers, rows).
+
+    With columns, only those leading columns are read and the header row must match them, otherwise
+    TableLayoutError is raised before any data row is parsed; count only limits the columns read.
+    Empty cells are None; rows end at the table range (or the sheet) without trailing empty rows.
+    """
+    try:
+        package = zipfile.ZipFile(path)
+    except zipfile.BadZipFile as e:
+        raise TableLayoutError(f"Not a valid xlsx file: {e}")
+
+    with package:
+        workbook = ET.fromstring(package.read("xl/workbook.xml"))
+        first_sheet = workbook.find(f"{_S}sheets/{_S}sheet")
+        if first_sheet is None:
+            raise TableLayoutError("The workbook has no worksheet")
+        sheet_part = _relationships(package, "xl/workbook.xml")[first_sheet.get(_R + "id")]
+        strings = _shared_strings(package)
+        properties = workbook.find(_S + "workbookPr")
+        date1904 = properties is not None and properties.get("date1904", "0").lower() in ("1", "true")
+        dates = _date_styles(package) + (_EPOCHS[date1904],)
+        last_row = _table_last_row(package, sheet_part, table_name)
+        width = len(columns) if columns is not None else count
+
+        headers, rows = None, []
+        expected_row = 1
+        with package.open(sheet_part) as f:
+            for _, element in ET.iterparse(f):
+                if element.tag != _S + "row":
+                    continue
+                row_number = int(element.get("r", expected_row))
+                if last_row is not None and row_number > last_row:
+                    break  # Rows after the table are not part of it
+                values = []
+                for position, cell in enumerate(element.iter(_S + "c")):
+                    match = _CELL_REF.fullmatch(cell.get("r", ""))
+                    col = _column_index(match.group(1)) if match else position
+                    if width is not None and col >= width:
+                        break  # Cells are stored left to right
+                    if col >= len(values):
+                        values.extend([None] * (col + 1 - len(values)))
+                    values[col] = _cell_value(cell, strings, dates)
+                element.clear()
+
+                if headers is None:
+                    headers = _dedup_headers(values)
+                    if columns is not None and headers[:len(columns)] != list(columns):
+                        raise TableLayoutError(f"Expected the columns {list(columns)}, found {headers[:len(columns)]}")
+                    width = min(width, len(headers)) if width else len(headers)
+                    headers = headers[:width]
+                else:
+                    rows.extend([[None] * width for _ in range(row_number - expected_row)])  # Skipped empty rows
+                    rows.append(values + [None] * (width - len(values)))
+                expected_row = row_number + 1
+
+    if headers is None:
+        raise TableLayoutError("The worksheet is empty")
+    while rows and all(value is None for value in rows[-1]):
+        rows.pop()  # Trailing empty rows are dropped, as pd.read_excel does
+    return headers, rows